@@ -0,0 +1,215 @@
+"""
+Almacén local de WODs en SQLite.
+
+Cada WOD se identifica por box + id + fecha_iso y se guarda con un hash de
+su contenido (wod.WOD.hash), de modo que en cada sincronización solo se
+detectan (y se envían, según el modo de correo) los WODs nuevos o
+modificados.
+
+Si SQLite tiene FTS5, el contenido de los WODs se indexa además para buscar
+en el histórico (ver buscar.py). Unos triggers mantienen el índice al
+insertar, modificar o borrar WODs, así que se actualiza solo al sincronizar.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import configuracion
+
+# Ruta por defecto de la base de datos
+RUTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wods.sqlite3")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS wods (
+    box TEXT NOT NULL,
+    id TEXT NOT NULL,
+    fecha_iso TEXT NOT NULL,
+    fecha_formateada TEXT NOT NULL DEFAULT '',
+    dia_semana TEXT NOT NULL DEFAULT '',
+    contenido TEXT NOT NULL DEFAULT '',
+    hash TEXT NOT NULL,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL,
+    PRIMARY KEY (box, id, fecha_iso)
+);
+CREATE INDEX IF NOT EXISTS wods_box_fecha ON wods (box, fecha_iso);
+"""
+
+# Índice de texto completo del contenido. Las abreviaturas de movimientos
+# (c2b, du, t2b...) son términos completos: unicode61 no separa letras y
+# números, y no hay lista de palabras vacías ni stemming.
+ESQUEMA_BUSQUEDA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS wods_fts USING fts5(
+    contenido, content='wods', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS wods_fts_insertar AFTER INSERT ON wods BEGIN
+    INSERT INTO wods_fts (rowid, contenido) VALUES (new.rowid, new.contenido);
+END;
+CREATE TRIGGER IF NOT EXISTS wods_fts_borrar AFTER DELETE ON wods BEGIN
+    INSERT INTO wods_fts (wods_fts, rowid, contenido) VALUES ('delete', old.rowid, old.contenido);
+END;
+CREATE TRIGGER IF NOT EXISTS wods_fts_actualizar AFTER UPDATE OF contenido ON wods BEGIN
+    INSERT INTO wods_fts (wods_fts, rowid, contenido) VALUES ('delete', old.rowid, old.contenido);
+    INSERT INTO wods_fts (rowid, contenido) VALUES (new.rowid, new.contenido);
+END;
+"""
+
+# Palabras de contexto a cada lado de los términos encontrados
+PALABRAS_FRAGMENTO = 12
+
+
+class AlmacenWODs:
+    """Base de datos SQLite con los WODs sincronizados de todos los boxes."""
+
+    def __init__(self, ruta=RUTA):
+        self.ruta = ruta
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        if ruta != ":memory:":
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(ESQUEMA)
+        self.busqueda = self._crear_indice()
+
+    def _crear_indice(self):
+        """Crea el índice de texto completo (y lo llena si la base ya tenía WODs)."""
+        existia = self._conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'wods_fts'").fetchone() is not None
+        try:
+            self._conexion.executescript(ESQUEMA_BUSQUEDA)
+        except sqlite3.OperationalError:  # SQLite sin FTS5
+            return False
+        if not existia:
+            self.reconstruir_indice()
+        return True
+
+    def reconstruir_indice(self):
+        """Vuelve a indexar todos los WODs (p. ej. tras un VACUUM, que puede cambiar los rowid)."""
+        with self._lock, self._conexion:
+            self._conexion.execute("INSERT INTO wods_fts (wods_fts) VALUES ('rebuild')")
+
+    def cambios(self, box, wods):
+        """Devuelve los WODs nuevos o modificados respecto a lo guardado."""
+        if not wods:
+            return []
+        with self._lock:
+            guardados = dict(
+                ((fila["id"], fila["fecha_iso"]), fila["hash"])
+                for fila in self._conexion.execute(
+                    "SELECT id, fecha_iso, hash FROM wods WHERE box = ? AND fecha_iso BETWEEN ? AND ?",
+                    (box, min(w.fecha for w in wods).isoformat(), max(w.fecha for w in wods).isoformat())
+                )
+            )
+        return [
+            wod for wod in wods
+            if guardados.get((str(wod.id), wod.fecha_iso)) != wod.hash
+        ]
+
+    def guardar(self, box, wods):
+        """Inserta o actualiza los WODs indicados."""
+        if not wods:
+            return
+        ahora = time.time()
+        filas = [
+            (box, str(wod.id), wod.fecha_iso, wod.fecha_formateada,
+             wod.dia_semana, wod.contenido, wod.hash, ahora, ahora)
+            for wod in wods
+        ]
+        with self._lock, self._conexion:
+            self._conexion.executemany("""
+                INSERT INTO wods (box, id, fecha_iso, fecha_formateada, dia_semana, contenido,
+                                  hash, creado, actualizado)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (box, id, fecha_iso) DO UPDATE SET
+                    fecha_formateada = excluded.fecha_formateada,
+                    dia_semana = excluded.dia_semana,
+                    contenido = excluded.contenido,
+                    hash = excluded.hash,
+                    actualizado = excluded.actualizado
+                WHERE hash != excluded.hash
+            """, filas)
+
+    def wods(self, box=None, desde=None, hasta=None):
+        """Devuelve los WODs guardados de un box (o de todos), ordenados por fecha."""
+        consulta = "SELECT * FROM wods WHERE 1"
+        parametros = []
+        if box:
+            consulta += " AND box = ?"
+            parametros.append(box)
+        if desde:
+            consulta += " AND fecha_iso >= ?"
+            parametros.append(desde)
+        if hasta:
+            consulta += " AND fecha_iso <= ?"
+            parametros.append(hasta)
+        consulta += " ORDER BY fecha_iso, id"
+        with self._lock:
+            return [dict(fila) for fila in self._conexion.execute(consulta, parametros)]
+
+    def _consulta_busqueda(self, columnas, expresion, box, desde, hasta):
+        if not self.busqueda:
+            raise sqlite3.NotSupportedError("Esta versión de SQLite no tiene FTS5")
+        consulta = f"""
+            SELECT {columnas}
+            FROM wods_fts JOIN wods w ON w.rowid = wods_fts.rowid
+            WHERE wods_fts MATCH ?"""
+        parametros = [expresion]
+        if box:
+            consulta += " AND w.box = ?"
+            parametros.append(box)
+        if desde:
+            consulta += " AND w.fecha_iso >= ?"
+            parametros.append(desde)
+        if hasta:
+            consulta += " AND w.fecha_iso <= ?"
+            parametros.append(hasta)
+        return consulta, parametros
+
+    def buscar(self, expresion, box=None, desde=None, hasta=None, limite=10, recientes=False):
+        """Busca una expresión FTS5 en el contenido de los WODs.
+
+        Devuelve los WODs encontrados (como mucho limite), ordenados por
+        relevancia (bm25) o por fecha, del más reciente al más antiguo, con
+        un "fragmento" del contenido con los términos entre « ».
+        """
+        consulta, parametros = self._consulta_busqueda(f"""
+            w.box, w.id, w.fecha_iso, w.fecha_formateada, w.dia_semana,
+            snippet(wods_fts, 0, '«', '»', '…', {PALABRAS_FRAGMENTO}) AS fragmento,
+            bm25(wods_fts) AS rango""", expresion, box, desde, hasta)
+        consulta += " ORDER BY w.fecha_iso DESC, rango" if recientes else " ORDER BY rango, w.fecha_iso DESC"
+        consulta += " LIMIT ?"
+        with self._lock:
+            return [dict(fila) for fila in self._conexion.execute(consulta, parametros + [limite])]
+
+    def contar(self, expresion, box=None, desde=None, hasta=None):
+        """Número de WODs que contienen una expresión FTS5."""
+        consulta, parametros = self._consulta_busqueda("COUNT(*)", expresion, box, desde, hasta)
+        with self._lock:
+            return self._conexion.execute(consulta, parametros).fetchone()[0]
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+_almacen = None
+_lock_almacen = threading.Lock()
+
+
+def obtener_almacen():
+    """Devuelve el almacén del proceso según ALMACEN de config.py, o None si está desactivado."""
+    global _almacen
+    if _almacen is None:
+        with _lock_almacen:
+            if _almacen is None:
+                opciones = configuracion.obtener("ALMACEN", {})
+                if opciones is None or not opciones.get("activo", True):
+                    _almacen = False
+                else:
+                    _almacen = AlmacenWODs(opciones.get("ruta", RUTA))
+    return _almacen or None
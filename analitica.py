@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Estadísticas de la programación de los boxes a partir del histórico del almacén.
+
+    python analitica.py [--box n8] [--desde 2024-01-01] [--semanas 8] [--json informe.json]
+
+Los WODs guardados se leen una sola vez y se convierten en una tabla por
+columnas (array.array) con los textos codificados como enteros: una fila por
+WOD y una por cada movimiento, modalidad (TIPOS_ENTRENAMIENTO) y título de
+sección que aparece en él, con el día, la semana y el box del WOD. Las
+agregaciones (frecuencia por semana, modalidades por box, días desde la
+última vez) trabajan con columnas enteras (Counter, zip, bisect y cortes de
+los arrays, que se recorren en C) en lugar de recorrer los WODs en Python.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+from itertools import compress
+
+import configuracion
+from almacen import AlmacenWODs, obtener_almacen
+from buscar import MOVIMIENTOS as ABREVIATURAS
+from configuracion import ConfiguracionError
+from formato import REGLAS, ReglasFormato
+
+# Movimientos que se reconocen en los WODs y otros nombres con los que
+# aparecen (además de las abreviaturas de buscar.MOVIMIENTOS y de las
+# MOVIMIENTOS de config.py). Se cuentan también en plural.
+MOVIMIENTOS = {
+    "back squat": [],
+    "front squat": [],
+    "overhead squat": [],
+    "squat clean": [],
+    "power clean": [],
+    "clean and jerk": [],
+    "deadlift": ["peso muerto"],
+    "snatch": [],
+    "push press": [],
+    "thruster": [],
+    "wall ball": [],
+    "pull up": ["dominada"],
+    "chest to bar": ["c2b pull up", "chest to bar pull up"],
+    "toes to bar": [],
+    "bar muscle up": [],
+    "ring muscle up": [],
+    "handstand push up": [],
+    "push up": ["flexion"],
+    "sit up": [],
+    "double under": ["comba"],
+    "box jump": [],
+    "burpee": [],
+    "kettlebell swing": [],
+    "russian kettlebell swing": [],
+    "lunge": ["zancada"],
+    "pistol": [],
+    "rope climb": [],
+    "row": ["remo"],
+    "run": ["carrera"],
+    "assault bike": ["bike"],
+}
+
+# Semanas que se muestran en la evolución de cada movimiento
+SEMANAS = 8
+
+# Movimientos y títulos de sección que se muestran
+TOP = 10
+
+_SECCION = re.compile(r"^\s*[A-Za-z][)\.]\s*([^:\n]*)", re.MULTILINE)
+_BARRAS = "▁▂▃▄▅▆▇█"
+
+
+class Codigos:
+    """Codifica textos como enteros consecutivos (y al revés)."""
+
+    def __init__(self):
+        self.nombres = []
+        self._codigos = {}
+
+    def codigo(self, nombre):
+        codigo = self._codigos.get(nombre)
+        if codigo is None:
+            codigo = self._codigos[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return codigo
+
+    def __len__(self):
+        return len(self.nombres)
+
+
+class Hechos:
+    """Columnas con una fila por cada valor (movimiento, modalidad...) de cada WOD.
+
+    Las filas se añaden en el orden de los WODs, por fecha, así que dia y
+    semana están ordenadas.
+    """
+
+    def __init__(self):
+        self.valores = Codigos()
+        self.valor = array("H")
+        self.dia = array("l")     # date.toordinal() del WOD
+        self.semana = array("l")  # toordinal() del lunes de su semana
+        self.box = array("H")
+
+    def añadir(self, valores, dia, semana, box):
+        codigo = self.valores.codigo
+        codigos = [codigo(valor) for valor in valores]
+        self.valor.extend(codigos)
+        cantidad = len(codigos)
+        self.dia.extend([dia] * cantidad)
+        self.semana.extend([semana] * cantidad)
+        self.box.extend([box] * cantidad)
+
+    def __len__(self):
+        return len(self.valor)
+
+    def frecuencia(self):
+        """WODs en los que aparece cada valor."""
+        return Counter(self.valor)
+
+    def por_box(self):
+        """WODs de cada box en los que aparece cada valor: {(box, valor): n}."""
+        return Counter(zip(self.box, self.valor))
+
+    def por_semana(self, desde=None):
+        """WODs de cada semana (desde el lunes indicado) con cada valor: {(semana, valor): n}."""
+        inicio = bisect_left(self.semana, desde) if desde is not None else 0
+        return Counter(zip(self.semana[inicio:], self.valor[inicio:]))
+
+    def ultimo_dia(self):
+        """Último día (ordinal) en que aparece cada valor."""
+        # Las filas están ordenadas por día: cada valor se queda con el último
+        return dict(zip(self.valor, self.dia))
+
+
+class TablaWODs:
+    """WODs del histórico por columnas, con sus movimientos, modalidades y secciones."""
+
+    def __init__(self, reglas=None, movimientos=None):
+        self.reglas = reglas or REGLAS
+        self.boxes = Codigos()
+        self.dia = array("l")
+        self.box = array("H")
+        self.secciones_por_wod = array("B")
+        self.movimientos = Hechos()
+        self.modalidades = Hechos()
+        self.secciones = Hechos()
+        self._patron, self._alias = patron_movimientos(movimientos)
+
+    def añadir(self, box, fecha, contenido):
+        """Añade un WOD (en orden de fecha) con sus movimientos, modalidades y secciones."""
+        dia = fecha.toordinal()
+        semana = dia - fecha.weekday()
+        codigo_box = self.boxes.codigo(box)
+        alias = self._alias
+        # El texto puede tener varios espacios seguidos dentro de un nombre
+        encontrados = {alias[" ".join(m.split())] for m in self._patron.findall(contenido.lower())}
+        secciones = [titulo.strip().lower() for titulo in _SECCION.findall(contenido)]
+
+        self.dia.append(dia)
+        self.box.append(codigo_box)
+        self.secciones_por_wod.append(min(len(secciones), 255))
+        self.movimientos.añadir(encontrados, dia, semana, codigo_box)
+        self.modalidades.añadir(self.reglas.tipos_de_texto(contenido), dia, semana, codigo_box)
+        self.secciones.añadir(set(filter(None, secciones)), dia, semana, codigo_box)
+
+    @classmethod
+    def desde_almacen(cls, almacen, box=None, desde=None, hasta=None, **opciones):
+        """Tabla con los WODs guardados de un box (o de todos) entre dos fechas."""
+        tabla = cls(**opciones)
+        for wod in almacen.wods(box, desde, hasta):
+            tabla.añadir(wod["box"], date.fromisoformat(wod["fecha_iso"]), wod["contenido"])
+        return tabla
+
+    def __len__(self):
+        return len(self.dia)
+
+    def wods_por_box(self):
+        return Counter(self.box)
+
+
+def patron_movimientos(extra=None):
+    """Expresión que encuentra los movimientos y {nombre encontrado: movimiento}."""
+    alias = {}
+    for movimiento, otros in MOVIMIENTOS.items():
+        for nombre in (movimiento, *otros):
+            alias[nombre] = movimiento
+    # De las abreviaturas de la búsqueda solo las de movimientos ("ygig" no lo es)
+    abreviaturas = {abreviatura: nombres for abreviatura, nombres in ABREVIATURAS.items()
+                    if nombres[0] in alias}
+    for abreviatura, nombres in {**abreviaturas, **(extra or {})}.items():
+        movimiento = alias.get(nombres[0].lower(), nombres[0].lower())
+        for nombre in (abreviatura, *nombres):
+            alias.setdefault(nombre.lower(), movimiento)
+    patron = re.compile(r"(?<!\w)(" + _expresion_arbol(alias) + r")(?:es|s)?(?!\w)")
+    return patron, alias
+
+
+def _expresion_arbol(nombres):
+    """Expresión regular que encuentra cualquiera de los nombres (en minúsculas).
+
+    Los nombres se agrupan por sus prefijos comunes ("pull up", "push up",
+    "push press"...), así que en cada posición del texto se prueba cada letra
+    una sola vez en lugar de cada nombre entero (unas cinco veces más rápido
+    que una alternativa por nombre). Como los finales de nombre son
+    opcionales y voraces, gana el nombre más largo ("c2b pull up" antes que
+    "c2b").
+    """
+    arbol = {}
+    for nombre in nombres:
+        nodo = arbol
+        for letra in nombre:
+            nodo = nodo.setdefault(letra, {})
+        nodo[""] = {}
+
+    def expresion(nodo):
+        ramas = [(r"[ \t]+" if letra == " " else re.escape(letra)) + expresion(hijo)
+                 for letra, hijo in sorted(nodo.items()) if letra]
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        return f"(?:{cuerpo})?" if "" in nodo else cuerpo
+
+    return expresion(arbol)
+
+
+def informe(tabla, hoy=None, semanas=SEMANAS, top=TOP):
+    """Agrega la tabla en un diccionario serializable en JSON."""
+    hoy = (hoy or date.today()).toordinal()
+    total = len(tabla)
+    boxes = tabla.boxes.nombres
+    wods_box = tabla.wods_por_box()
+
+    movimientos = tabla.movimientos
+    nombres = movimientos.valores.nombres
+    lunes = hoy - date.fromordinal(hoy).weekday()
+    semanas_mostradas = [lunes - 7 * n for n in range(semanas - 1, -1, -1)]
+    por_semana = movimientos.por_semana(semanas_mostradas[0]) if semanas else Counter()
+    ultimo = movimientos.ultimo_dia()
+    frecuentes = [{
+        "movimiento": nombres[codigo],
+        "wods": wods,
+        "porcentaje": round(100 * wods / total, 1),
+        "dias_desde_ultima_vez": hoy - ultimo[codigo],
+        "semanas": [por_semana[(semana, codigo)] for semana in semanas_mostradas],
+    } for codigo, wods in movimientos.frecuencia().most_common(top)]
+
+    modalidades = {box: {} for box in boxes}
+    for (box, codigo), wods in sorted(tabla.modalidades.por_box().items(), key=lambda par: -par[1]):
+        modalidades[boxes[box]][tabla.modalidades.valores.nombres[codigo]] = round(
+            100 * wods / wods_box[box], 1)
+
+    secciones_box = {box: sum(compress(tabla.secciones_por_wod, map(box.__eq__, tabla.box)))
+                     for box in wods_box}
+    nombres_secciones = tabla.secciones.valores.nombres
+
+    return {
+        "wods": total,
+        "desde": date.fromordinal(tabla.dia[0]).isoformat() if total else None,
+        "hasta": date.fromordinal(tabla.dia[-1]).isoformat() if total else None,
+        "semanas": [date.fromordinal(semana).isoformat() for semana in semanas_mostradas],
+        "boxes": {boxes[box]: {
+            "wods": wods,
+            "secciones_por_wod": round(secciones_box[box] / wods, 1),
+            "modalidades": modalidades[boxes[box]],
+        } for box, wods in sorted(wods_box.items())},
+        "movimientos": frecuentes,
+        "secciones": [{"titulo": nombres_secciones[codigo], "wods": wods}
+                      for codigo, wods in tabla.secciones.frecuencia().most_common(top)],
+    }
+
+
+def barras(valores):
+    """Minigráfico de barras de una serie de números."""
+    maximo = max(valores, default=0)
+    if not maximo:
+        return "·" * len(valores)
+    return "".join(_BARRAS[round(v * (len(_BARRAS) - 1) / maximo)] if v else "·" for v in valores)
+
+
+def imprimir_informe(datos):
+    if not datos["wods"]:
+        print("⚠️ No hay WODs guardados en ese rango")
+        return
+    desde = date.fromisoformat(datos["desde"]).strftime("%d/%m/%Y")
+    hasta = date.fromisoformat(datos["hasta"]).strftime("%d/%m/%Y")
+    print(f"📊 {datos['wods']} WODs de {len(datos['boxes'])} boxes ({desde} - {hasta})")
+    for box, resumen in datos["boxes"].items():
+        mezcla = " · ".join(f"{modalidad.upper()} {porcentaje:.0f}%"
+                            for modalidad, porcentaje in resumen["modalidades"].items())
+        print(f"📦 {box}: {resumen['wods']} WODs, {resumen['secciones_por_wod']} secciones por WOD")
+        if mezcla:
+            print(f"    {mezcla}")
+
+    print("-" * 50)
+    print(f"{'movimiento':<26} {'WODs':>6} {'%':>6} {'hace':>6}  últimas {len(datos['semanas'])} semanas")
+    for movimiento in datos["movimientos"]:
+        print(f"{movimiento['movimiento']:<26} {movimiento['wods']:>6} {movimiento['porcentaje']:>5.1f}% "
+              f"{movimiento['dias_desde_ultima_vez']:>5}d  {barras(movimiento['semanas'])}")
+
+    if datos["secciones"]:
+        print("-" * 50)
+        print("📅 Secciones: " + ", ".join(f"{s['titulo']} ({s['wods']})" for s in datos["secciones"]))
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Estadísticas de la programación de los boxes")
+    parser.add_argument("--box", help="Solo este box")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (AAAA-MM-DD)")
+    parser.add_argument("--semanas", type=int, default=SEMANAS, help="Semanas de la evolución de cada movimiento")
+    parser.add_argument("--top", type=int, default=TOP, help="Movimientos y secciones que se muestran")
+    parser.add_argument("--json", metavar="RUTA", help="Guardar además el informe en JSON")
+    parser.add_argument("--almacen", default=None,
+                        help="Base de datos que analizar (por defecto: la de ALMACEN)")
+    args = parser.parse_args(argv)
+
+    try:
+        almacen = AlmacenWODs(args.almacen) if args.almacen else obtener_almacen()
+        opciones = configuracion.obtener("REGLAS_FORMATO", None)
+        reglas = ReglasFormato.desde_dict(opciones) if opciones else REGLAS
+        movimientos = configuracion.obtener("MOVIMIENTOS", None)
+    except (ConfiguracionError, ValueError) as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    if almacen is None:
+        print("❌ ERROR: las estadísticas usan el almacén; activa ALMACEN o indica --almacen")
+        return False
+
+    inicio = time.perf_counter()
+    tabla = TablaWODs.desde_almacen(almacen, args.box,
+                                    args.desde.isoformat() if args.desde else None,
+                                    args.hasta.isoformat() if args.hasta else None,
+                                    reglas=reglas, movimientos=movimientos)
+    cargado = time.perf_counter()
+    datos = informe(tabla, args.hasta, args.semanas, args.top)
+    fin = time.perf_counter()
+
+    imprimir_informe(datos)
+    print(f"⏱️ {len(tabla)} WODs en {(fin - inicio) * 1000:.0f} ms "
+          f"(lectura y extracción {(cargado - inicio) * 1000:.0f} ms, agregación {(fin - cargado) * 1000:.1f} ms)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        print(f"💾 Informe guardado en {args.json}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
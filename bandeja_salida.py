@@ -0,0 +1,318 @@
+"""
+Bandeja de salida persistente para los correos.
+
+Los correos ya construidos se guardan en disco (un archivo JSON por mensaje)
+y un despachador en segundo plano los envía por el pool SMTP compartido. Si
+el envío falla el mensaje se reintenta con backoff exponencial, también en
+ejecuciones posteriores, y tras MAX_INTENTOS se mueve a la carpeta de
+fallidos. Así obtener y formatear los WODs no espera al envío, y una caída
+temporal del servidor de correo no obliga a volver a descargarlos.
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+
+import configuracion
+from envio import obtener_pool
+
+# Directorio por defecto de la bandeja de salida
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "bandeja_salida")
+
+# Intentos de envío antes de dar un mensaje por fallido
+MAX_INTENTOS = 5
+
+# Espera inicial y máxima entre reintentos, en segundos
+BACKOFF = 30
+MAX_BACKOFF = 3600
+
+# Segundos que se espera a que se vacíe la bandeja al terminar
+TIMEOUT_DRENADO = 120
+
+
+class BandejaSalida:
+    """Cola de mensajes en disco ordenada por el momento del próximo intento."""
+
+    def __init__(self, directorio=DIRECTORIO, max_intentos=MAX_INTENTOS,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF):
+        self.directorio_pendientes = os.path.join(directorio, "pendientes")
+        self.directorio_fallidos = os.path.join(directorio, "fallidos")
+        self.max_intentos = max_intentos
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        os.makedirs(self.directorio_pendientes, exist_ok=True)
+        os.makedirs(self.directorio_fallidos, exist_ok=True)
+
+        self._cola = []
+        self._en_curso = 0
+        # Box de cada mensaje encolado por este proceso que aún no se ha
+        # enviado, y de los que han pasado a fallidos (ya no se reintentan)
+        self._sin_entregar = {}
+        self._descartados = {}
+        self._cond = threading.Condition()
+        self.estadisticas = {"encolados": 0, "enviados": 0, "reintentos": 0, "fallidos": 0}
+
+        for nombre in os.listdir(self.directorio_pendientes):
+            if nombre.endswith(".json"):
+                entrada = self._leer(nombre[:-5])
+                if entrada is not None:
+                    self._cola.append((entrada["proximo_intento"], entrada["id"]))
+        heapq.heapify(self._cola)
+
+    def _ruta(self, id_mensaje, directorio=None):
+        return os.path.join(directorio or self.directorio_pendientes, f"{id_mensaje}.json")
+
+    def _leer(self, id_mensaje):
+        try:
+            with open(self._ruta(id_mensaje), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _escribir(self, entrada):
+        ruta = self._ruta(entrada["id"])
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def encolar(self, mensaje, remitente, destinatarios, texto=None, box=""):
+        """Guarda un mensaje en la bandeja y devuelve su id.
+
+        texto es el mensaje ya serializado, si se tiene (si no, se serializa),
+        y box el del WOD (ver sin_entregar).
+        """
+        ahora = time.time()
+        entrada = {
+            "id": f"{int(ahora * 1000)}-{os.urandom(6).hex()}",
+            "remitente": remitente,
+            "destinatarios": list(destinatarios),
+            "asunto": mensaje["Subject"],
+            "box": box,
+            "texto": texto if texto is not None else mensaje.as_string(),
+            "intentos": 0,
+            "creado": ahora,
+            "proximo_intento": ahora,
+            "ultimo_error": None,
+        }
+        self._escribir(entrada)
+        with self._cond:
+            heapq.heappush(self._cola, (entrada["proximo_intento"], entrada["id"]))
+            self._sin_entregar[entrada["id"]] = box
+            self.estadisticas["encolados"] += 1
+            self._cond.notify()
+        return entrada["id"]
+
+    def tomar(self, parar):
+        """Espera y devuelve el siguiente mensaje cuyo intento ya toca.
+
+        Devuelve None cuando parar() es cierto y no hay mensajes pendientes
+        de enviar ahora (los que esperan un reintento quedan para más tarde).
+        """
+        with self._cond:
+            while True:
+                espera = None
+                if self._cola:
+                    proximo, id_mensaje = self._cola[0]
+                    espera = proximo - time.time()
+                    if espera <= 0:
+                        heapq.heappop(self._cola)
+                        entrada = self._leer(id_mensaje)
+                        if entrada is None:
+                            continue
+                        self._en_curso += 1
+                        return entrada
+                if parar():
+                    return None
+                self._cond.wait(1.0 if espera is None else min(espera, 1.0))
+
+    def completar(self, entrada):
+        """Elimina de la bandeja un mensaje enviado."""
+        try:
+            os.remove(self._ruta(entrada["id"]))
+        except OSError:
+            pass
+        with self._cond:
+            self._en_curso -= 1
+            self._sin_entregar.pop(entrada["id"], None)
+            self.estadisticas["enviados"] += 1
+            self._cond.notify_all()
+
+    def fallar(self, entrada, error):
+        """Programa el reintento de un mensaje o lo mueve a fallidos."""
+        entrada["intentos"] += 1
+        entrada["ultimo_error"] = str(error)
+        fallido = entrada["intentos"] >= self.max_intentos
+        if fallido:
+            self._escribir(entrada)
+            os.replace(self._ruta(entrada["id"]), self._ruta(entrada["id"], self.directorio_fallidos))
+        else:
+            espera = min(self.max_backoff, self.backoff * (2 ** (entrada["intentos"] - 1)))
+            entrada["proximo_intento"] = time.time() + espera
+            self._escribir(entrada)
+
+        with self._cond:
+            self._en_curso -= 1
+            if fallido:
+                self.estadisticas["fallidos"] += 1
+                if entrada["id"] in self._sin_entregar:
+                    self._descartados[entrada["id"]] = self._sin_entregar.pop(entrada["id"])
+            else:
+                self.estadisticas["reintentos"] += 1
+                heapq.heappush(self._cola, (entrada["proximo_intento"], entrada["id"]))
+            self._cond.notify_all()
+        return fallido
+
+    def avisar(self):
+        """Despierta a los hilos que esperan mensajes."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def sin_entregar(self):
+        """Mensajes encolados por este proceso que siguen en la bandeja, por box."""
+        with self._cond:
+            return _por_box(self._sin_entregar)
+
+    def descartados(self):
+        """Mensajes encolados por este proceso que han pasado a fallidos, por box."""
+        with self._cond:
+            return _por_box(self._descartados)
+
+    def pendientes(self):
+        """Número de mensajes que quedan en la bandeja (incluidos los que esperan reintento)."""
+        with self._cond:
+            return len(self._cola) + self._en_curso
+
+
+class Despachador:
+    """Hilos en segundo plano que vacían la bandeja de salida por SMTP."""
+
+    def __init__(self, bandeja, email_config, hilos=None):
+        self.bandeja = bandeja
+        self.email_config = email_config
+        self.pool = obtener_pool(email_config)
+        self.hilos = hilos or self.pool.tamaño
+        self._drenar = threading.Event()
+        self._hilos = []
+
+    def iniciar(self):
+        for i in range(self.hilos):
+            hilo = threading.Thread(target=self._bucle, name=f"despachador-{i}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def _bucle(self):
+        while True:
+            entrada = self.bandeja.tomar(self._drenar.is_set)
+            if entrada is None:
+                return
+            try:
+                rechazados = self.pool.enviar_texto(entrada["texto"], entrada["remitente"],
+                                                    entrada["destinatarios"])
+            except Exception as e:
+                if self.bandeja.fallar(entrada, e):
+                    print(f"❌ Correo descartado tras {entrada['intentos']} intentos "
+                          f"({entrada['asunto']}): {e}")
+                else:
+                    print(f"⚠️ Error al enviar el correo ({entrada['asunto']}), se reintentará: {e}")
+            else:
+                self.bandeja.completar(entrada)
+                if rechazados:
+                    print(f"⚠️ El servidor rechazó {len(rechazados)} destinatarios ({entrada['asunto']})")
+                print(f"✅ Correo enviado correctamente ({entrada['asunto']})")
+
+    def detener(self, timeout=TIMEOUT_DRENADO):
+        """Envía los mensajes que tocan ahora y detiene los hilos.
+
+        Los mensajes que esperan un reintento se quedan en la bandeja para la
+        siguiente ejecución.
+        """
+        self._drenar.set()
+        self.bandeja.avisar()
+        limite = time.monotonic() + timeout
+        for hilo in self._hilos:
+            hilo.join(max(0, limite - time.monotonic()))
+        self._hilos = [hilo for hilo in self._hilos if hilo.is_alive()]
+
+
+def _por_box(mensajes):
+    boxes = {}
+    for box in mensajes.values():
+        boxes[box] = boxes.get(box, 0) + 1
+    return boxes
+
+
+_bandeja = None
+_despachador = None
+_lock = threading.Lock()
+
+
+def obtener_bandeja():
+    """Devuelve la bandeja del proceso según BANDEJA_SALIDA de config.py, o None si está desactivada."""
+    global _bandeja
+    if _bandeja is None:
+        with _lock:
+            if _bandeja is None:
+                opciones = configuracion.obtener("BANDEJA_SALIDA", {})
+                if opciones is None or not opciones.get("activa", True):
+                    _bandeja = False
+                else:
+                    _bandeja = BandejaSalida(
+                        opciones.get("directorio", DIRECTORIO),
+                        opciones.get("max_intentos", MAX_INTENTOS),
+                        opciones.get("backoff", BACKOFF),
+                        opciones.get("max_backoff", MAX_BACKOFF),
+                    )
+    return _bandeja or None
+
+
+def iniciar_despachador(email_config):
+    """Arranca (una sola vez) el despachador de la bandeja y lo devuelve, o None sin bandeja."""
+    global _despachador
+    bandeja = obtener_bandeja()
+    if bandeja is None:
+        return None
+    with _lock:
+        if _despachador is None:
+            _despachador = Despachador(bandeja, email_config)
+            _despachador.iniciar()
+        return _despachador
+
+
+def detener_despachador(timeout=TIMEOUT_DRENADO):
+    """Detiene el despachador y devuelve las estadísticas de la bandeja, o None.
+
+    "sin_entregar" son los mensajes de esta ejecución que quedan en la
+    bandeja, por box: se reintentarán en la siguiente. "descartados" son los
+    que han agotado los intentos y están en fallidos/: ya no se envían.
+    """
+    global _despachador
+    with _lock:
+        despachador, _despachador = _despachador, None
+    if despachador is None:
+        return None
+    despachador.detener(timeout)
+    estadisticas = dict(despachador.bandeja.estadisticas)
+    estadisticas["pendientes"] = despachador.bandeja.pendientes()
+    estadisticas["sin_entregar"] = despachador.bandeja.sin_entregar()
+    estadisticas["descartados"] = despachador.bandeja.descartados()
+    return estadisticas
+
+
+def error_de_entrega(estadisticas, box):
+    """Describe los correos del box de esta ejecución que no se han entregado, o None.
+
+    estadisticas son las de detener_despachador (None sin bandeja).
+    """
+    estadisticas = estadisticas or {}
+    descartados = (estadisticas.get("descartados") or {}).get(box)
+    pendientes = (estadisticas.get("sin_entregar") or {}).get(box)
+    errores = []
+    if descartados:
+        errores.append(f"{descartados} correos descartados tras agotar los intentos (en fallidos/)")
+    if pendientes:
+        errores.append(f"{pendientes} correos sin entregar; se reintentarán en la próxima ejecución")
+    return "; ".join(errores) or None
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Genera el corpus real anonimizado a partir de la caché HTTP.
+
+Lee las respuestas guardadas de las APIs (.cache/http/*.body), se queda solo
+con el HTML de las notas de los WODs y elimina los datos personales que
+puedan contener (correos, URLs, teléfonos, menciones y las palabras que se
+indiquen con --ocultar, por ejemplo nombres de coaches). El resultado se
+guarda en benchmarks/datos/real.json, que no se sube al repositorio.
+
+    python benchmarks/anonimizar.py [--cache .cache/http] [--ocultar Ana Luis]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_http  # noqa: E402
+from corpus import CORPUS_REAL  # noqa: E402
+
+# Datos personales que se sustituyen en las notas
+PATRONES = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "correo@example.com"),
+    (re.compile(r"(?:https?://|www\.)[^\s<>\"']+"), "https://example.com"),
+    (re.compile(r"(?<![\w@])@[A-Za-z_]\w*"), "@usuario"),
+    (re.compile(r"(?<![\d-])(?:\+\d{2,3} ?)?\d{3}[ .]?\d{3}[ .]?\d{3}(?![\d-])"), "600000000"),
+]
+
+
+def anonimizar(nota, ocultar=()):
+    """Sustituye los datos personales de una nota."""
+    for patron, sustituto in PATRONES:
+        nota = patron.sub(sustituto, nota)
+    for palabra in ocultar:
+        nota = re.sub(rf"\b{re.escape(palabra)}\b", "Coach", nota, flags=re.IGNORECASE)
+    return nota
+
+
+def notas_de_respuesta(datos):
+    """Devuelve (proveedor, notas) de una respuesta de la API, o (None, [])."""
+    if isinstance(datos, dict) and "elements" in datos:
+        return "n8", [
+            tipo_wod.get("notes", "")
+            for elemento in datos["elements"]
+            for tipo_wod in elemento.get("TIPOWODs") or []
+            if tipo_wod.get("notes")
+        ]
+    if isinstance(datos, dict) and "wods" in datos:
+        return "crossfitdb", [wod.get("content", "") for wod in datos["wods"] if wod.get("content")]
+    return None, []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cache", default=cache_http.DIRECTORIO, help="directorio de la caché HTTP")
+    parser.add_argument("--salida", default=CORPUS_REAL)
+    parser.add_argument("--ocultar", nargs="*", default=[], help="palabras a ocultar (nombres...)")
+    args = parser.parse_args(argv)
+
+    corpus = {"n8": [], "crossfitdb": []}
+    vistas = set()
+    for ruta in sorted(glob.glob(os.path.join(args.cache, "*.body"))):
+        try:
+            with open(ruta, "rb") as f:
+                datos = json.loads(f.read().decode("utf-8"))
+        except (OSError, ValueError):
+            continue
+        proveedor, notas = notas_de_respuesta(datos)
+        for nota in notas:
+            if proveedor and nota not in vistas:
+                vistas.add(nota)
+                corpus[proveedor].append(anonimizar(nota, args.ocultar))
+
+    if not any(corpus.values()):
+        print(f"❌ No hay respuestas de N8 ni de CrossfitDB en {args.cache}")
+        return False
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False, indent=1)
+    print(f"✅ {len(corpus['n8'])} notas de N8 y {len(corpus['crossfitdb'])} de CrossfitDB en {args.salida}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
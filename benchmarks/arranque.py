@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Mide el tiempo de arranque de los scripts con python -X importtime.
+
+Importa cada módulo en un proceso nuevo, muestra cuánto tarda la
+importación y qué dependencias pesan más, y comprueba que no se cargan al
+arrancar las dependencias que solo hacen falta al descargar, guardar o
+enviar (requests, smtplib, email.mime, bs4, sqlite3, concurrent.futures).
+También mide el tiempo total de `python sync_wods.py --help` frente a un
+intérprete vacío.
+
+    python benchmarks/arranque.py [--presupuesto 50] [--json arranque.json]
+
+Termina con error si alguna importación supera el presupuesto (en ms) o
+carga una dependencia pesada.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos cuyo arranque se mide
+MODULOS = ["sync_wods", "n8", "crossfitdb"]
+
+# Dependencias que no deben cargarse al importar los módulos
+MODULOS_PESADOS = ["requests", "urllib3", "smtplib", "email.mime.text", "bs4", "sqlite3",
+                   "concurrent.futures"]
+
+# Tiempo máximo de importación de cada módulo, en ms
+PRESUPUESTO_MS = 50
+
+# Repeticiones de cada medición (se toma la mediana)
+REPETICIONES = 5
+
+
+def importtime(modulo):
+    """Importa el módulo con -X importtime y devuelve [(nivel, propio_us, acumulado_us, nombre)]."""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        filas.append((nivel, int(propio), int(acumulado), nombre.strip()))
+    return filas
+
+
+def medir_importacion(modulo, repeticiones=REPETICIONES):
+    """Devuelve la mediana del tiempo de importación (ms), sus filas y los módulos pesados cargados."""
+    tiempos = []
+    filas = []
+    for _ in range(repeticiones):
+        filas = importtime(modulo)
+        tiempos.append(next(acumulado for nivel, _, acumulado, nombre in reversed(filas)
+                            if nombre == modulo and nivel == 0) / 1000)
+    cargados = {nombre for _, _, _, nombre in filas}
+    return statistics.median(tiempos), filas, [m for m in MODULOS_PESADOS if m in cargados]
+
+
+def mas_pesados(filas, modulo, cantidad=8):
+    """Las importaciones directas del módulo que más tardan, como (nombre, ms)."""
+    # Las filas de un módulo aparecen justo antes de él, con un nivel más
+    fin = max(i for i, (nivel, _, _, nombre) in enumerate(filas) if nombre == modulo and nivel == 0)
+    inicio = fin
+    while inicio > 0 and filas[inicio - 1][0] > 0:
+        inicio -= 1
+    directas = [(nombre, acumulado / 1000) for nivel, _, acumulado, nombre in filas[inicio:fin] if nivel == 1]
+    return sorted(directas, key=lambda x: -x[1])[:cantidad]
+
+
+def tiempo_proceso(argumentos, repeticiones=REPETICIONES):
+    """Mediana del tiempo total (ms) de un proceso de Python con esos argumentos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, *argumentos], cwd=RAIZ, capture_output=True, check=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_MS, help="ms por importación")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    correcto = True
+    resultados = {"python": sys.version.split()[0], "presupuesto_ms": args.presupuesto, "modulos": {}}
+    for modulo in MODULOS:
+        ms, filas, pesados = medir_importacion(modulo, args.repeticiones)
+        estado = "✅" if ms <= args.presupuesto and not pesados else "❌"
+        correcto = correcto and estado == "✅"
+        print(f"{estado} import {modulo}: {ms:.1f} ms (presupuesto {args.presupuesto:.0f} ms)")
+        for nombre, ms_directo in mas_pesados(filas, modulo):
+            print(f"     {nombre:<26} {ms_directo:>6.1f} ms")
+        if pesados:
+            print(f"   ⚠️ carga al arrancar: {', '.join(pesados)}")
+        resultados["modulos"][modulo] = {"ms": ms, "pesados": pesados}
+
+    vacio = tiempo_proceso(["-c", "pass"], args.repeticiones)
+    ayuda = tiempo_proceso(["sync_wods.py", "--help"], args.repeticiones)
+    print(f"⏱️ python sync_wods.py --help: {ayuda:.0f} ms (intérprete vacío: {vacio:.0f} ms, "
+          f"propio: {ayuda - vacio:.0f} ms)")
+    resultados.update(interprete_ms=vacio, ayuda_ms=ayuda)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=1)
+        print(f"💾 Resultados guardados en {args.json}")
+    return correcto
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Mide las estadísticas de analitica.py sobre años de WODs de varios boxes.
+
+Compara la tabla por columnas (array.array con códigos enteros, agregada con
+Counter y zip) con un diccionario por WOD agregado recorriendo los WODs en
+Python, y comprueba que los dos dan el mismo informe. La extracción de
+movimientos, modalidades y secciones es la misma en los dos casos.
+
+    python benchmarks/bench_analitica.py [--años 3] [--boxes 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import wods_historico  # noqa: E402
+
+from almacen import AlmacenWODs  # noqa: E402
+from analitica import SEMANAS, TOP, TablaWODs, informe  # noqa: E402
+
+
+def como_dicts(tabla):
+    """Un diccionario por WOD con sus movimientos y modalidades, a partir de la tabla."""
+    wods = [{"box": tabla.boxes.nombres[box], "fecha": date.fromordinal(dia),
+             "movimientos": set(), "modalidades": set()}
+            for dia, box in zip(tabla.dia, tabla.box)]
+    # Cada WOD se identifica por su día y su box
+    indice = {(wod["fecha"].toordinal(), tabla.boxes.codigo(wod["box"])): wod for wod in wods}
+    for hechos, clave in ((tabla.movimientos, "movimientos"), (tabla.modalidades, "modalidades")):
+        for valor, dia, box in zip(hechos.valor, hechos.dia, hechos.box):
+            indice[(dia, box)][clave].add(hechos.valores.nombres[valor])
+    return wods
+
+
+def informe_dicts(wods, hoy, semanas=SEMANAS, top=TOP):
+    """Las mismas agregaciones que analitica.informe, recorriendo los WODs."""
+    lunes = hoy - timedelta(days=hoy.weekday())
+    semanas_mostradas = [lunes - timedelta(weeks=n) for n in range(semanas - 1, -1, -1)]
+    frecuencia = Counter()
+    ultimo = {}
+    por_semana = defaultdict(Counter)
+    wods_box = Counter()
+    modalidades = defaultdict(Counter)
+    for wod in wods:
+        semana = wod["fecha"] - timedelta(days=wod["fecha"].weekday())
+        wods_box[wod["box"]] += 1
+        for movimiento in wod["movimientos"]:
+            frecuencia[movimiento] += 1
+            if movimiento not in ultimo or wod["fecha"] > ultimo[movimiento]:
+                ultimo[movimiento] = wod["fecha"]
+            if semana >= semanas_mostradas[0]:
+                por_semana[movimiento][semana] += 1
+        for modalidad in wod["modalidades"]:
+            modalidades[wod["box"]][modalidad] += 1
+    return {
+        "movimientos": [(movimiento, wods, (hoy - ultimo[movimiento]).days,
+                         [por_semana[movimiento][semana] for semana in semanas_mostradas])
+                        for movimiento, wods in frecuencia.most_common(top)],
+        "modalidades": {box: {modalidad: round(100 * n / wods_box[box], 1)
+                              for modalidad, n in modalidades[box].items()} for box in wods_box},
+    }
+
+
+def tiempo(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--años", type=int, default=3)
+    parser.add_argument("--boxes", type=int, default=4)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    dias = 260 * args.años
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenWODs(os.path.join(directorio, "wods.sqlite3"))
+        for n in range(args.boxes):
+            almacen.guardar(f"box{n}", wods_historico(f"box{n}", dias, n))
+
+        t_tabla, tabla = tiempo(lambda: TablaWODs.desde_almacen(almacen), 1)
+        almacen.cerrar()
+    hoy = date.fromordinal(tabla.dia[-1])
+    wods = como_dicts(tabla)
+
+    t_columnas, datos = tiempo(lambda: informe(tabla, hoy), args.repeticiones)
+    t_dicts, datos_dicts = tiempo(lambda: informe_dicts(wods, hoy), args.repeticiones)
+
+    iguales = (
+        [(m["movimiento"], m["wods"], m["dias_desde_ultima_vez"], m["semanas"]) for m in datos["movimientos"]]
+        == datos_dicts["movimientos"]
+        and {box: resumen["modalidades"] for box, resumen in datos["boxes"].items()} == datos_dicts["modalidades"]
+    )
+    print(f"📦 {len(tabla)} WODs ({args.años} años, {args.boxes} boxes), "
+          f"{len(tabla.movimientos)} movimientos y {len(tabla.modalidades)} modalidades encontrados")
+    print(f"  lectura y extracción: {t_tabla * 1000:.0f} ms")
+    print(f"  agregación por columnas: {t_columnas * 1000:.1f} ms")
+    print(f"  agregación con un dict por WOD: {t_dicts * 1000:.1f} ms ({t_dicts / t_columnas:.1f}x)")
+    print(f"  {'✅' if iguales else '❌'} mismo informe")
+    return iguales
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
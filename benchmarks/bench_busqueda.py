@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Mide la búsqueda en el histórico del almacén (índice FTS5).
+
+Llena un almacén temporal con años de WODs sintéticos de varios boxes y
+mide el tiempo de indexarlos, de guardar una semana más (el índice se
+actualiza con triggers) y de las consultas de buscar.py, comparado con
+recorrer el contenido con LIKE.
+
+    python benchmarks/bench_busqueda.py [--años 3] [--boxes 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import wods_historico  # noqa: E402
+
+from almacen import AlmacenWODs  # noqa: E402
+from buscar import expresion_fts  # noqa: E402
+
+CONSULTAS = ["c2b + du", "thrusters", "hspu, back squat", "double unders + wall balls", "kbsr"]
+
+
+def tiempo(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--años", type=int, default=3)
+    parser.add_argument("--boxes", type=int, default=4)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    dias = 260 * args.años
+    boxes = {f"box{n}": wods_historico(f"box{n}", dias, n) for n in range(args.boxes)}
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenWODs(os.path.join(directorio, "wods.sqlite3"))
+        if not almacen.busqueda:
+            print("❌ Esta versión de SQLite no tiene FTS5")
+            return False
+
+        inicio = time.perf_counter()
+        for box, wods in boxes.items():
+            almacen.guardar(box, wods[:-5])
+        t_guardar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for box, wods in boxes.items():
+            almacen.guardar(box, wods[-5:])
+        t_semana = time.perf_counter() - inicio
+        t_reconstruir, _ = tiempo(almacen.reconstruir_indice, 1)
+
+        total = dias * args.boxes
+        print(f"📦 {total} WODs ({args.años} años, {args.boxes} boxes)")
+        print(f"  guardar e indexar: {t_guardar:.2f}s, una semana más: {t_semana * 1000:.1f} ms, "
+              f"reconstruir el índice: {t_reconstruir:.2f}s")
+        print(f"{'consulta':>28} {'WODs':>6} {'FTS ms':>8} {'recientes ms':>13} {'LIKE ms':>8}")
+        for consulta in CONSULTAS:
+            expresion = expresion_fts(consulta)
+            t_fts, _ = tiempo(lambda: almacen.buscar(expresion), args.repeticiones)
+            t_recientes, _ = tiempo(lambda: almacen.buscar(expresion, recientes=True), args.repeticiones)
+            # Sin índice: la primera palabra de cada término con LIKE
+            palabras = [termino.split()[0] for termino in consulta.replace(",", "+").split("+")]
+            condiciones = " AND ".join("contenido LIKE ?" for _ in palabras)
+            t_like, _ = tiempo(lambda: almacen._conexion.execute(
+                f"SELECT id FROM wods WHERE {condiciones} ORDER BY fecha_iso DESC LIMIT 10",
+                [f"%{palabra}%" for palabra in palabras]).fetchall(), args.repeticiones)
+            print(f"{consulta:>28} {almacen.contar(expresion):>6} {t_fts * 1000:>8.2f} "
+                  f"{t_recientes * 1000:>13.2f} {t_like * 1000:>8.2f}")
+        almacen.cerrar()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Mide la generación del correo para resúmenes de varias semanas.
+
+Compara la forma anterior (documento completo con += y formateo de cada WOD
+para cada destinatario) con CuerpoCorreo (tarjetas generadas una vez y parte
+MIME codificada y serializada una sola vez para todos los destinatarios).
+
+    python benchmarks/bench_correo.py [--semanas 1 4 52] [--destinatarios 1 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import correo  # noqa: E402
+from corpus import sintetico, wods_normalizados  # noqa: E402
+from formato import es_tipo_entrenamiento, formatear_wod_para_correo  # noqa: E402
+
+EMAIL_CONFIG = {"remitente": "box@example.com", "destinatario": "atleta@example.com", "asunto": "WODs"}
+
+
+def formatear_html(contenido):
+    return formatear_wod_para_correo(contenido, es_tipo_entrenamiento)
+
+
+def mensajes_antes(wods, destinatarios):
+    """Un documento completo por destinatario, concatenando con +=."""
+    textos = []
+    for destinatario in destinatarios:
+        cuerpo = correo.CABECERA_HTML + correo.TITULO_HTML.format(
+            titulo_box="Box", encabezado="WODs de la semana", lunes_fmt="1/1", viernes_fmt="5/1")
+        for wod in wods:
+            titulo = f"{wod.dia_semana} {wod.fecha_formateada}"
+            cuerpo += f'<div class="wod-card">\n<h2>WOD DEL {titulo}</h2>\n<div class="wod-content">'
+            cuerpo += f"{formatear_html(wod.contenido)}</div>\n</div>"
+        cuerpo += correo.PIE_HTML
+
+        mensaje = MIMEMultipart()
+        mensaje["From"] = EMAIL_CONFIG["remitente"]
+        mensaje["To"] = destinatario
+        mensaje["Subject"] = "Box - WODs (1/1 - 5/1)"
+        mensaje.attach(MIMEText(cuerpo, "html"))
+        textos.append(mensaje.as_string())
+    return textos
+
+
+def mensajes_ahora(wods, destinatarios):
+    """Un CuerpoCorreo para todos los destinatarios."""
+    cuerpo = correo.CuerpoCorreo(wods, formatear_html)
+    return [
+        cuerpo.serializar(correo.construir_mensaje(cuerpo, "1/1", "5/1", "Box", EMAIL_CONFIG, destinatario))
+        for destinatario in destinatarios
+    ]
+
+
+def medir(funcion, *args, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--semanas", type=int, nargs="+", default=[1, 4, 52])
+    parser.add_argument("--destinatarios", type=int, nargs="+", default=[1, 20])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'semanas':>8} {'destin.':>8} {'KiB':>8} {'antes ms':>10} {'ahora ms':>10} {'mejora':>8}")
+    for semanas in args.semanas:
+        wods = wods_normalizados(sintetico(semanas * 5)["crossfitdb"])
+        for n in args.destinatarios:
+            destinatarios = [f"atleta{i}@example.com" for i in range(n)]
+            tamaño = len(correo.construir_cuerpo_html(wods, "1/1", "5/1", "Box", formatear_html).encode("utf-8"))
+            antes = medir(mensajes_antes, wods, destinatarios, repeticiones=args.repeticiones)
+            ahora = medir(mensajes_ahora, wods, destinatarios, repeticiones=args.repeticiones)
+            print(f"{semanas:>8} {n:>8} {tamaño / 1024:>8.0f} {antes * 1000:>10.1f} "
+                  f"{ahora * 1000:>10.1f} {antes / ahora:>7.1f}x")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
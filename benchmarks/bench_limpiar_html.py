@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Compara el motor rápido de limpiar_html con BeautifulSoup.
+
+Comprueba primero que los dos motores producen el mismo texto para todo el
+corpus y después mide el tiempo de cada uno.
+
+    python benchmarks/bench_limpiar_html.py [--dias 260] [--repeticiones 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import formato  # noqa: E402
+from corpus import notas_n8, payload_crossfitdb  # noqa: E402
+
+
+def medir(funcion, notas, repeticiones):
+    """Devuelve el mejor tiempo de procesar todas las notas."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for nota in notas:
+            funcion(nota)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dias", type=int, default=260, help="WODs del corpus (por defecto un año)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = {
+        "n8": (notas_n8(args.dias), False),
+        "crossfitdb": ([w["content"] for w in payload_crossfitdb(args.dias)["wods"]], True),
+    }
+
+    for nombre, (notas, quitar_marcadores) in corpus.items():
+        rapido = [formato.limpiar_html(n, quitar_marcadores, motor="rapido") for n in notas]
+        referencia = [formato.limpiar_html(n, quitar_marcadores, motor="bs4") for n in notas]
+        distintos = sum(a != b for a, b in zip(rapido, referencia))
+        sin_fallback = sum(formato._html_a_texto_rapido(n) is not None for n in notas)
+
+        tamaño = sum(len(n.encode("utf-8")) for n in notas)
+        t_bs4 = medir(lambda n: formato.limpiar_html(n, quitar_marcadores, motor="bs4"),
+                      notas, args.repeticiones)
+        t_rapido = medir(lambda n: formato.limpiar_html(n, quitar_marcadores, motor="rapido"),
+                         notas, args.repeticiones)
+
+        print(f"📦 {nombre}: {len(notas)} WODs, {tamaño / 1024:.0f} KiB")
+        print(f"  resultados distintos: {distintos}, sin recurrir a bs4: {sin_fallback}/{len(notas)}")
+        print(f"  bs4:    {t_bs4 * 1000:8.1f} ms  ({len(notas) / t_bs4:8.0f} WODs/s)")
+        print(f"  rápido: {t_rapido * 1000:8.1f} ms  ({len(notas) / t_rapido:8.0f} WODs/s)")
+        print(f"  ⚡ {t_bs4 / t_rapido:.1f}x más rápido")
+
+        if distintos:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
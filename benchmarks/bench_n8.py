@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Mide la lectura del timeline de N8 con timelines de varias semanas.
+
+Compara la forma anterior (json.loads de toda la respuesta y limpieza del
+HTML de todas las notas antes de mirar su fecha) con la lectura por
+elementos de N8.normalizar_respuesta (fecha comprobada en el principio de
+la nota y parada al pasar la semana). El timeline empieza por la semana
+actual, como el de aimharder, y sigue hacia atrás.
+
+    python benchmarks/bench_n8.py [--semanas 1 4 52]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_http  # noqa: E402
+import formato  # noqa: E402
+import n8  # noqa: E402
+from corpus import fechas_laborables, nota_wod  # noqa: E402
+
+
+def timeline(semanas, semilla=0):
+    """Respuesta de /api/activity con semanas de WODs, de la actual hacia atrás."""
+    rng = random.Random(semilla)
+    hoy = date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    elementos = []
+    for fecha in reversed(fechas_laborables(lunes - timedelta(weeks=semanas - 1), semanas * 5)):
+        notas = nota_wod(rng, fecha).replace("<p>", "", 1).replace("</p>", "<br>", 1)
+        elementos.append({"id": fecha.isoformat(), "TIPOWODs": [{"id": fecha.isoformat(), "notes": notas}]})
+    return json.dumps({"elements": elementos}, ensure_ascii=False).encode("utf-8")
+
+
+def box(config):
+    proveedor = n8.N8({"user_id": 1, **config})
+    # Reglas por defecto sin leer config.py
+    proveedor.__dict__["reglas"] = formato.REGLAS
+    return proveedor
+
+
+def antes(contenido):
+    """json.loads completo, limpieza de todas las notas y sin parada."""
+    prefijo, n8.PREFIJO_FECHA = n8.PREFIJO_FECHA, float("inf")
+    try:
+        return box({"parada_temprana": None}).normalizar(json.loads(contenido), None, None)
+    finally:
+        n8.PREFIJO_FECHA = prefijo
+
+
+def ahora(contenido):
+    respuesta = cache_http.RespuestaHTTP(None, contenido, "")
+    return box({}).normalizar_respuesta(respuesta, None, None)
+
+
+def medir(funcion, contenido, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(contenido)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcion(contenido)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return mejor, pico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--semanas", type=int, nargs="+", default=[1, 4, 52])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'semanas':>8} {'KiB':>7} {'antes ms':>9} {'ahora ms':>9} {'mejora':>7} "
+          f"{'antes KiB':>10} {'ahora KiB':>10}")
+    for semanas in args.semanas:
+        contenido = timeline(semanas)
+        if len(antes(contenido)) != len(ahora(contenido)):
+            print(f"❌ {semanas} semanas: resultados distintos")
+            return False
+        t_antes, m_antes = medir(antes, contenido, args.repeticiones)
+        t_ahora, m_ahora = medir(ahora, contenido, args.repeticiones)
+        print(f"{semanas:>8} {len(contenido) / 1024:>7.0f} {t_antes * 1000:>9.1f} {t_ahora * 1000:>9.1f} "
+              f"{t_antes / t_ahora:>6.1f}x {m_antes / 1024:>10.0f} {m_ahora / 1024:>10.0f}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
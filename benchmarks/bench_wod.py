@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compara el registro wod.WOD con los diccionarios que se usaban antes.
+
+Mide la memoria por WOD (sin contar el contenido, que es el mismo en los
+dos casos), el tiempo de crearlos, de ordenarlos por día de la semana y por
+fecha, y el de calcular las cadenas derivadas que WOD no guarda.
+
+    python benchmarks/bench_wod.py [--wods 1000 50000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from operator import attrgetter, itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fechas import DIAS_SEMANA, valor_ordenamiento  # noqa: E402
+from wod import WOD  # noqa: E402
+
+
+def datos_crudos(cantidad, semilla=0):
+    """(fecha, contenido, id) de cantidad días laborables, desordenados."""
+    rng = random.Random(semilla)
+    fecha = date(2020, 1, 6)
+    crudos = []
+    while len(crudos) < cantidad:
+        if fecha.weekday() < 5:
+            crudos.append((fecha, f"A) WOD {len(crudos)}\nFor time: 21-15-9", len(crudos)))
+        fecha += timedelta(days=1)
+    rng.shuffle(crudos)
+    return crudos
+
+
+def como_dicts(crudos):
+    """Los diccionarios de antes (crear_wod), a partir de la fecha ISO de la API."""
+    wods = []
+    for fecha, contenido, id_wod in crudos:
+        fecha_iso = fecha.isoformat()
+        año, mes, dia = fecha_iso.split("-")
+        dia_semana = DIAS_SEMANA[datetime.strptime(fecha_iso, "%Y-%m-%d").weekday()]
+        wods.append({
+            "fecha_iso": fecha_iso,
+            "fecha_formateada": f"{dia}/{mes}/{año}",
+            "dia_semana": dia_semana,
+            "contenido": contenido,
+            "valor_orden": valor_ordenamiento(dia_semana),
+            "id": id_wod,
+            "estructura": None,
+        })
+    return wods
+
+
+def como_registros(crudos):
+    return [WOD(fecha, contenido, id_wod, "box") for fecha, contenido, id_wod in crudos]
+
+
+def memoria(funcion, crudos):
+    """Bytes por WOD que reserva funcion (incluida la lista)."""
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion(crudos)
+    usada = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultado
+    return usada / len(crudos)
+
+
+def tiempo(funcion, repeticiones=5):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wods", type=int, nargs="+", default=[1000, 50000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'WODs':>7} {'tipo':>9} {'B/WOD':>7} {'crear ms':>9} {'orden día':>10} "
+          f"{'orden fecha':>12} {'cadenas ms':>11}")
+    for cantidad in args.wods:
+        crudos = datos_crudos(cantidad)
+        dicts = como_dicts(crudos)
+        registros = como_registros(crudos)
+        casos = [
+            ("dict", como_dicts, dicts, itemgetter("valor_orden"), itemgetter("fecha_iso"),
+             lambda w: (w["fecha_iso"], w["fecha_formateada"], w["dia_semana"])),
+            ("WOD", como_registros, registros, attrgetter("valor_orden"), attrgetter("fecha"),
+             lambda w: (w.fecha_iso, w.fecha_formateada, w.dia_semana)),
+        ]
+        for nombre, crear, wods, por_dia, por_fecha, cadenas in casos:
+            bytes_wod = memoria(crear, crudos)
+            t_crear = tiempo(lambda: crear(crudos), args.repeticiones)
+            t_dia = tiempo(lambda: sorted(wods, key=por_dia), args.repeticiones)
+            t_fecha = tiempo(lambda: sorted(wods, key=por_fecha), args.repeticiones)
+            t_cadenas = tiempo(lambda: [cadenas(w) for w in wods], args.repeticiones)
+            print(f"{cantidad:>7} {nombre:>9} {bytes_wod:>7.0f} {t_crear * 1000:>9.1f} "
+                  f"{t_dia * 1000:>10.2f} {t_fecha * 1000:>12.2f} {t_cadenas * 1000:>11.2f}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
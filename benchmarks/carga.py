@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la sincronización completa contra servidores locales.
+
+Arranca ServidorAPI y SumideroSMTP (servidores.py), genera un config.py
+temporal con cientos de boxes simulados (mitad CrossfitDB, mitad N8) y
+ejecuta la sincronización de sync_wods varias veces seguidas. La primera
+ronda descarga y procesa todo; las siguientes usan la caché HTTP (304) como
+una ejecución real posterior. Con --destinatarios cada box envía su correo a
+una lista de socios (ver "Listas de destinatarios" en el README). Para cada
+ronda muestra el rendimiento de extremo a extremo y los percentiles de la
+duración por box.
+
+    python benchmarks/carga.py --boxes 200 --workers 16 --latencia 50 --errores 0.02
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from servidores import ServidorAPI, SumideroSMTP  # noqa: E402
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por rango más cercano."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def escribir_config(directorio, url_api, puerto_smtp, boxes, conexiones_smtp, bandeja,
+                    destinatarios=1, por_mensaje=None):
+    """Escribe el config.py de la prueba y devuelve su ruta."""
+    lista = []
+    for i in range(boxes):
+        if i % 2:
+            lista.append({"proveedor": "n8", "nombre": f"n8-{i}", "titulo": f"N8 {i}", "user_id": i,
+                          "api_url": f"{url_api}/box{i}/api/activity"})
+        else:
+            lista.append({"proveedor": "crossfitdb", "nombre": f"cfdb-{i}", "titulo": f"CrossfitDB {i}",
+                          "username": "u", "password": "p", "user_id": i, "app_id": 1,
+                          "api_url": f"{url_api}/box{i}/api/v1/wods"})
+
+    config = {
+        "EMAIL_CONFIG": {
+            "remitente": "box@example.com", "contraseña": "", "destinatario": "atleta@example.com",
+            "servidor_smtp": "127.0.0.1", "puerto_smtp": puerto_smtp, "asunto": "WODs de la semana",
+            "tls": False, "conexiones_smtp": conexiones_smtp,
+        },
+        "GRUPOS_DESTINATARIOS": {"socios": [f"socio{i}@example.com" for i in range(destinatarios)]},
+        "BOXES": lista,
+        "MODO_CORREO": "siempre",
+        "CACHE_HTTP": {"directorio": os.path.join(directorio, "http")},
+        "ALMACEN": {"ruta": os.path.join(directorio, "wods.sqlite3")},
+        "DISYUNTOR": {"estado": os.path.join(directorio, "disyuntores.json")},
+        "BANDEJA_SALIDA": {"directorio": os.path.join(directorio, "bandeja")} if bandeja else None,
+    }
+    if destinatarios > 1:
+        config["EMAIL_CONFIG"]["destinatarios"] = ["socios"]
+    if por_mensaje:
+        config["EMAIL_CONFIG"]["destinatarios_por_mensaje"] = por_mensaje
+    ruta = os.path.join(directorio, "config.py")
+    with open(ruta, "w", encoding="utf-8") as f:
+        for nombre, valor in config.items():
+            f.write(f"{nombre} = {valor!r}\n")
+    return ruta
+
+
+def ronda(boxes, email_config, workers, api, smtp):
+    """Ejecuta una sincronización completa y devuelve sus métricas."""
+    import bandeja_salida
+    import envio
+    import sync_wods
+
+    api_antes = dict(api.estadisticas)
+    smtp_antes = dict(smtp.estadisticas)
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bandeja_salida.iniciar_despachador(email_config)
+        resultados = sync_wods.ejecutar_boxes(boxes, email_config, workers)
+        fin_boxes = time.perf_counter()
+        bandeja_salida.detener_despachador()
+        envio.cerrar_pools()
+    total = time.perf_counter() - inicio
+
+    duraciones = [r.duracion for r in resultados]
+    mensajes = smtp.estadisticas["mensajes"] - smtp_antes["mensajes"]
+    destinatarios = smtp.estadisticas["destinatarios"] - smtp_antes["destinatarios"]
+    return {
+        "boxes": len(resultados),
+        "correctos": sum(r.exito for r in resultados),
+        "segundos_boxes": fin_boxes - inicio,
+        "segundos_total": total,
+        "boxes_por_segundo": len(resultados) / total,
+        "p50": percentil(duraciones, 50),
+        "p90": percentil(duraciones, 90),
+        "p99": percentil(duraciones, 99),
+        "max": max(duraciones, default=0.0),
+        "peticiones": api.estadisticas["peticiones"] - api_antes["peticiones"],
+        "errores_api": api.estadisticas["errores"] - api_antes["errores"],
+        "no_modificadas": api.estadisticas["no_modificadas"] - api_antes["no_modificadas"],
+        "mensajes": mensajes,
+        "mensajes_por_segundo": mensajes / total,
+        "destinatarios": destinatarios,
+        "destinatarios_por_segundo": destinatarios / total,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16, help="boxes procesados a la vez")
+    parser.add_argument("--rondas", type=int, default=2)
+    parser.add_argument("--latencia", type=float, default=50, help="latencia media de la API en ms")
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--wods", type=int, default=5, help="WODs por respuesta")
+    parser.add_argument("--elementos-extra", type=int, default=0, help="notas sin WOD en el timeline de N8")
+    parser.add_argument("--latencia-smtp", type=float, default=0, help="ms por mensaje en el SMTP")
+    parser.add_argument("--conexiones-smtp", type=int, default=4)
+    parser.add_argument("--destinatarios", type=int, default=1, help="destinatarios de cada box")
+    parser.add_argument("--por-mensaje", type=int, help="destinatarios por transacción SMTP")
+    parser.add_argument("--sin-bandeja", action="store_true", help="enviar sin bandeja de salida")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    api = ServidorAPI(latencia=args.latencia / 1000, tasa_errores=args.errores, wods=args.wods,
+                      elementos_extra=args.elementos_extra).iniciar()
+    smtp = SumideroSMTP(latencia=args.latencia_smtp / 1000).iniciar()
+
+    with tempfile.TemporaryDirectory(prefix="carga-wods-") as directorio:
+        escribir_config(directorio, api.url, smtp.puerto, args.boxes, args.conexiones_smtp,
+                        not args.sin_bandeja, args.destinatarios, args.por_mensaje)
+        # El config.py temporal tiene prioridad sobre el del repositorio
+        sys.path.insert(0, directorio)
+
+        import cliente_http
+        import configuracion
+        import proveedores
+
+        cliente_http.POOL_CONEXIONES = max(cliente_http.POOL_CONEXIONES, args.workers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            boxes = proveedores.crear_boxes()
+            email_config = configuracion.requerir("EMAIL_CONFIG")
+
+        print(f"🏋️ {len(boxes)} boxes, {args.workers} workers, API {args.latencia:.0f} ms "
+              f"({args.errores:.0%} errores), {args.wods} WODs y {args.destinatarios} destinatarios por box")
+        print(f"{'ronda':>5} {'ok':>5} {'total s':>8} {'boxes/s':>8} {'p50 ms':>7} {'p90 ms':>7} "
+              f"{'p99 ms':>7} {'max ms':>7} {'HTTP':>5} {'304':>5} {'503':>5} {'correos':>7} {'corr/s':>7} {'destin.':>7} {'dest/s':>7}")
+        rondas = []
+        for n in range(1, args.rondas + 1):
+            r = ronda(boxes, email_config, args.workers, api, smtp)
+            rondas.append(r)
+            print(f"{n:>5} {r['correctos']:>5} {r['segundos_total']:>8.2f} {r['boxes_por_segundo']:>8.1f} "
+                  f"{r['p50'] * 1000:>7.0f} {r['p90'] * 1000:>7.0f} {r['p99'] * 1000:>7.0f} "
+                  f"{r['max'] * 1000:>7.0f} {r['peticiones']:>5} {r['no_modificadas']:>5} "
+                  f"{r['errores_api']:>5} {r['mensajes']:>7} {r['mensajes_por_segundo']:>7.1f} "
+                  f"{r['destinatarios']:>7} {r['destinatarios_por_segundo']:>7.1f}")
+
+    api.shutdown()
+    smtp.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "rondas": rondas}, f, indent=1)
+        print(f"💾 Resultados guardados en {args.json}")
+    return all(r["correctos"] == r["boxes"] for r in rondas)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
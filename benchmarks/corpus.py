@@ -0,0 +1,174 @@
+"""
+Corpus de WODs para las pruebas de rendimiento.
+
+El corpus sintético genera notas HTML con la forma de las que publican N8
+(timeline de aimharder) y CrossfitDB: secciones "A) ...", listas, tipos de
+entrenamiento, entidades (&nbsp;, &amp;...) y el marcado que dejan los
+editores de texto (<strong>, <span style=...>). La generación es
+determinista (semilla fija) para que los resultados sean comparables entre
+ejecuciones.
+
+El corpus real es un JSON {"n8": [...], "crossfitdb": [...]} con notas
+reales anonimizadas, que genera anonimizar.py a partir de la caché HTTP.
+"""
+
+import json
+import os
+import random
+from datetime import date, timedelta
+
+# Corpus real anonimizado (no se incluye en el repositorio)
+CORPUS_REAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "real.json")
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+SECCIONES = ["warm up", "strength", "skill", "metcon", "wod", "accessory", "core",
+             "fuerza", "técnica", "cash out", "buy in"]
+TIPOS = ["AMRAP 12 min", "EMOM 10", "For time", "Tabata", "3 rounds for time",
+         "Every 2 minutes x 5", "eTabata", "5 rounds", "Complete 4 rounds", "AMRAP 20'"]
+MOVIMIENTOS = [
+    "back squat", "front squat", "deadlift", "power clean", "snatch", "thrusters",
+    "wall balls", "pull ups", "c2b pull ups", "t2b", "du", "burpees", "box jumps",
+    "kbs", "kbsr", "hspu", "row", "run", "sit ups", "push ups", "lunges", "ygig",
+    "sc", "pistols", "rope climbs", "bar muscle ups", "assault bike",
+]
+CARGAS = ["@70%", "@75%", "@80%", "24/16 kg", "60/40 kg", "rx", "scaled", "2/1 pood", ""]
+NOTAS = ["rest 2 min", "descanso 1'", "ritmo constante", "sin romper", "work 40\" rest 20\"",
+         "Rx: 43/30 kg", "técnica antes que carga", "a b c d"]
+
+
+def _item(rng):
+    movimiento = rng.choice(MOVIMIENTOS)
+    reps = rng.choice(["5", "10", "12", "15", "20", "21-15-9", "400m", "1000m", "5x5", "3x3"])
+    carga = rng.choice(CARGAS)
+    texto = f"{reps} {movimiento} {carga}".strip()
+    if rng.random() < 0.15:
+        texto = f"<strong>{texto}</strong>"
+    if rng.random() < 0.1:
+        texto = texto.replace(" ", "&nbsp;", 1)
+    return texto
+
+
+def _seccion(rng, letra):
+    partes = []
+    titulo = rng.choice(SECCIONES)
+    if rng.random() < 0.3:
+        partes.append(f'<p style="text-align: left;"><strong>{letra}) {titulo}</strong></p>')
+    else:
+        partes.append(f"<p>{letra}) {titulo}</p>")
+    if rng.random() < 0.7:
+        partes.append(f"<p>{rng.choice(TIPOS)}</p>")
+    items = [_item(rng) for _ in range(rng.randint(2, 6))]
+    estilo = rng.random()
+    if estilo < 0.4:
+        partes.append("<ul>" + "".join(f"<li>{i}</li>" for i in items) + "</ul>")
+    elif estilo < 0.6:
+        partes.append("<ol>" + "".join(f"<li>{i}</li>" for i in items) + "</ol>")
+    elif estilo < 0.8:
+        partes.append("<p>" + "<br>".join(f"- {i}" for i in items) + "</p>")
+    else:
+        partes.extend(f"<p>{n}. {i}</p>" for n, i in enumerate(items, 1))
+    if rng.random() < 0.5:
+        partes.append(f'<p><span style="color: #e74c3c;">{rng.choice(NOTAS)}</span> &amp; scaling</p>')
+    return "".join(partes)
+
+
+def nota_wod(rng, fecha, cabecera=True):
+    """Genera el HTML de un WOD para una fecha."""
+    partes = []
+    if cabecera:
+        partes.append(f"<p>WOD {DIAS[fecha.weekday()].capitalize()} "
+                      f"{fecha.day} de {MESES[fecha.month - 1]}</p>")
+    for letra in "ABCDE"[:rng.randint(2, 5)]:
+        partes.append(_seccion(rng, letra))
+    return "".join(partes)
+
+
+def fechas_laborables(inicio, dias):
+    """Devuelve los días de lunes a viernes a partir de inicio."""
+    fecha = inicio
+    resultado = []
+    while len(resultado) < dias:
+        if fecha.weekday() < 5:
+            resultado.append(fecha)
+        fecha += timedelta(days=1)
+    return resultado
+
+
+def notas_n8(dias, semilla=0, inicio=date(2024, 1, 1)):
+    """Lista de notas HTML al estilo de N8 (la nota empieza por "WOD <día> <n> de <mes>")."""
+    rng = random.Random(semilla)
+    return [nota_wod(rng, fecha) for fecha in fechas_laborables(inicio, dias)]
+
+
+def payload_n8(dias, semilla=0, inicio=date(2024, 1, 1)):
+    """Respuesta de /api/activity con un elemento por WOD."""
+    rng = random.Random(semilla)
+    elementos = []
+    for n, fecha in enumerate(fechas_laborables(inicio, dias)):
+        notas = nota_wod(rng, fecha)
+        # Las notas de N8 empiezan con el texto "WOD ..." sin etiqueta previa
+        notas = notas.replace("<p>", "", 1).replace("</p>", "<br>", 1)
+        elementos.append({"id": n, "TIPOWODs": [{"id": f"tw{n}", "notes": notas}]})
+    return {"elements": elementos}
+
+
+def payload_crossfitdb(dias, semilla=0, inicio=date(2024, 1, 1)):
+    """Respuesta de /api/v1/wods con un WOD por día."""
+    rng = random.Random(semilla)
+    return {"wods": [
+        {"id": n, "date": fecha.isoformat(), "content": nota_wod(rng, fecha, cabecera=False)}
+        for n, fecha in enumerate(fechas_laborables(inicio, dias))
+    ]}
+
+
+def sintetico(dias, semilla=0):
+    """Notas HTML sintéticas de N8 y CrossfitDB, con las mismas claves que el corpus real."""
+    return {
+        "n8": notas_n8(dias, semilla),
+        "crossfitdb": [w["content"] for w in payload_crossfitdb(dias, semilla)["wods"]],
+    }
+
+
+def cargar_real(dias, ruta=CORPUS_REAL):
+    """Notas del corpus real anonimizado (repetidas si hacen falta más), o None si no existe."""
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    except OSError:
+        return None
+
+    corpus = {}
+    for clave in ("n8", "crossfitdb"):
+        notas = datos.get(clave) or []
+        corpus[clave] = [notas[i % len(notas)] for i in range(dias)] if notas else []
+    return corpus
+
+
+def wods_normalizados(contenidos):
+    """Registros de WOD de CrossfitDB (con su árbol) a partir de notas HTML."""
+    from formato import analizar_wod, es_tipo_entrenamiento, limpiar_html
+    from wod import WOD
+
+    wods = []
+    for n, (fecha, contenido) in enumerate(zip(fechas_laborables(date(2024, 1, 1), len(contenidos)), contenidos)):
+        texto = limpiar_html(contenido, quitar_marcadores=True)
+        wods.append(WOD(fecha, texto, n, "crossfitdb",
+                        analizar_wod(texto, es_tipo_entrenamiento, formatear=False)))
+    return wods
+
+
+def wods_historico(box, dias, semilla=0, inicio=date(2020, 1, 6)):
+    """Registros de WOD de un box con el texto limpio de notas al estilo de N8, por fecha."""
+    from formato import limpiar_html
+    from wod import WOD
+
+    notas = notas_n8(dias, semilla, inicio)
+    return [WOD(fecha, limpiar_html(nota), n, box)
+            for n, (fecha, nota) in enumerate(zip(fechas_laborables(inicio, dias), notas))]
+
+
+# Tamaños de corpus habituales: un día, una semana y un año de historial
+TAMAÑOS = {"dia": 1, "semana": 5, "año": 260}
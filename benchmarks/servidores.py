@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Servidores locales que sustituyen a las APIs de los boxes y al SMTP.
+
+ServidorAPI responde como la API de CrossfitDB (/api/v1/wods → "wods") y
+como el timeline de aimharder que usa N8 (/api/activity → "elements" con
+"TIPOWODs" y "notes"), con latencia, tasa de errores y tamaño de respuesta
+configurables. CrossfitDB respeta start_date/end_date y el timeline de N8
+puede abarcar varias semanas, para probar la importación del histórico. Cualquier prefijo delante de la ruta identifica un box
+distinto (/box17/api/activity), de modo que cada box simulado tiene su
+propio contenido. Las respuestas llevan ETag y se responde 304 si no han
+cambiado, como un servidor real.
+
+SumideroSMTP acepta todos los mensajes (sin TLS; cualquier AUTH es válido)
+y solo los cuenta.
+
+    python benchmarks/servidores.py --puerto-http 8765 --puerto-smtp 8025 --latencia 50
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import socketserver
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import fechas_laborables, nota_wod  # noqa: E402
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende las peticiones de ServidorAPI."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass
+
+    def do_GET(self):
+        servidor = self.server
+        inicio = time.perf_counter()
+        partes = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(partes.query).items()}
+        box = partes.path.rsplit("/api/", 1)[0].strip("/") or "box"
+
+        if servidor.latencia:
+            time.sleep(max(0.0, random.gauss(servidor.latencia, servidor.latencia * servidor.variacion)))
+
+        if partes.path.endswith("/api/v1/wods"):
+            datos = servidor.datos_crossfitdb(box, params)
+        elif partes.path.endswith("/api/activity"):
+            datos = servidor.datos_n8(box)
+        else:
+            return self._responder(404, b'{"error": "not found"}', inicio)
+
+        if random.random() < servidor.tasa_errores:
+            return self._responder(503, b'{"error": "unavailable"}', inicio, error=True)
+
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        etag = '"%s"' % hashlib.sha256(cuerpo).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            return self._responder(304, b"", inicio, {"ETag": etag})
+        return self._responder(200, cuerpo, inicio, {"ETag": etag, "Content-Type": "application/json"})
+
+    def _responder(self, estado, cuerpo, inicio, cabeceras=None, error=False):
+        self.send_response(estado)
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        if cuerpo:
+            self.wfile.write(cuerpo)
+        self.server.registrar(estado, len(cuerpo), time.perf_counter() - inicio, error)
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    """API falsa de CrossfitDB y N8 para pruebas de carga.
+
+    latencia (segundos) es la media del retardo de cada respuesta, con una
+    desviación de variacion * latencia; tasa_errores es la probabilidad de
+    responder 503; wods es el número de WODs de cada respuesta (si la
+    petición no indica end_date), semanas las semanas del timeline de N8, de
+    la actual hacia atrás, y elementos_extra añade al timeline notas que no
+    son WODs, para simular respuestas más grandes.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", puerto=0, latencia=0.0, variacion=0.2, tasa_errores=0.0,
+                 wods=5, elementos_extra=0, semanas=1):
+        super().__init__((host, puerto), ManejadorAPI)
+        self.latencia = latencia
+        self.variacion = variacion
+        self.tasa_errores = tasa_errores
+        self.wods = wods
+        self.elementos_extra = elementos_extra
+        self.semanas = semanas
+        self.estadisticas = {"peticiones": 0, "errores": 0, "no_modificadas": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, puerto = self.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def registrar(self, estado, tamaño, duracion, error):
+        with self._lock:
+            self.estadisticas["peticiones"] += 1
+            self.estadisticas["bytes"] += tamaño
+            if error:
+                self.estadisticas["errores"] += 1
+            if estado == 304:
+                self.estadisticas["no_modificadas"] += 1
+
+    def datos_crossfitdb(self, box, params):
+        try:
+            inicio = date.fromisoformat(params.get("start_date", ""))
+        except ValueError:
+            inicio = _lunes_actual()
+        try:
+            fin = date.fromisoformat(params["end_date"])
+            fechas = [inicio + timedelta(days=n) for n in range((fin - inicio).days + 1)]
+            fechas = [fecha for fecha in fechas if fecha.weekday() < 5]
+        except (KeyError, ValueError):
+            fechas = fechas_laborables(inicio, self.wods)
+        # Cada día tiene siempre el mismo WOD, se pida en el tramo que se pida
+        return {"wods": [
+            {"id": f"{box}-{fecha.isoformat()}", "date": fecha.isoformat(),
+             "content": nota_wod(random.Random(f"{box}:{fecha}"), fecha, cabecera=False)}
+            for fecha in fechas
+        ]}
+
+    def datos_n8(self, box):
+        lunes = _lunes_actual() - timedelta(weeks=self.semanas - 1)
+        rng = random.Random(f"{box}:{lunes}")
+        elementos = []
+        fechas = fechas_laborables(lunes, max(self.wods, 5 * (self.semanas - 1) + self.wods))
+        # Como en aimharder, lo más reciente primero
+        for n, fecha in enumerate(reversed(fechas)):
+            notas = nota_wod(rng, fecha).replace("<p>", "", 1).replace("</p>", "<br>", 1)
+            elementos.append({"id": n, "TIPOWODs": [{"id": f"{box}-{fecha.isoformat()}", "notes": notas}]})
+        for n in range(self.elementos_extra):
+            elementos.append({"id": f"extra-{n}", "TIPOWODs": [], "text": "¡Buen trabajo! " * 20})
+        return {"elements": elementos}
+
+    def iniciar(self):
+        """Atiende peticiones en un hilo en segundo plano y devuelve el servidor."""
+        threading.Thread(target=self.serve_forever, name="servidor-api", daemon=True).start()
+        return self
+
+
+def _lunes_actual():
+    hoy = datetime.now().date()
+    return hoy - timedelta(days=hoy.weekday())
+
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+    """Diálogo SMTP mínimo: acepta cualquier remitente, destinatario y mensaje."""
+
+    def responder(self, linea):
+        self.wfile.write(linea.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        servidor = self.server
+        self.responder("220 sumidero ESMTP")
+        destinatarios = 0
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea.decode("utf-8", "replace").strip()
+            verbo = comando.split(" ", 1)[0].upper()
+
+            if verbo == "EHLO":
+                self.wfile.write(b"250-sumidero\r\n250-AUTH LOGIN PLAIN\r\n250 8BITMIME\r\n")
+            elif verbo == "HELO":
+                self.responder("250 sumidero")
+            elif verbo == "AUTH":
+                partes = comando.split()
+                if len(partes) > 1 and partes[1].upper() == "LOGIN":
+                    if len(partes) == 2:
+                        self.responder("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self.responder("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.responder("235 2.7.0 Authentication successful")
+            elif verbo == "MAIL":
+                destinatarios = 0
+                self.responder("250 OK")
+            elif verbo == "RCPT":
+                destinatarios += 1
+                self.responder("250 OK")
+            elif verbo == "DATA":
+                self.responder("354 End data with <CR><LF>.<CR><LF>")
+                tamaño = 0
+                while True:
+                    linea = self.rfile.readline()
+                    if not linea or linea in (b".\r\n", b".\n"):
+                        break
+                    tamaño += len(linea)
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                servidor.registrar(destinatarios, tamaño)
+                self.responder("250 OK")
+            elif verbo in ("RSET", "NOOP"):
+                self.responder("250 OK")
+            elif verbo == "QUIT":
+                self.responder("221 Bye")
+                return
+            else:
+                self.responder("502 Command not implemented")
+
+
+class SumideroSMTP(socketserver.ThreadingTCPServer):
+    """Servidor SMTP local que acepta y cuenta los mensajes sin entregarlos."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", puerto=0, latencia=0.0):
+        super().__init__((host, puerto), ManejadorSMTP)
+        self.latencia = latencia
+        self.estadisticas = {"mensajes": 0, "destinatarios": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def puerto(self):
+        return self.server_address[1]
+
+    def registrar(self, destinatarios, tamaño):
+        with self._lock:
+            self.estadisticas["mensajes"] += 1
+            self.estadisticas["destinatarios"] += destinatarios
+            self.estadisticas["bytes"] += tamaño
+
+    def iniciar(self):
+        """Atiende conexiones en un hilo en segundo plano y devuelve el servidor."""
+        threading.Thread(target=self.serve_forever, name="sumidero-smtp", daemon=True).start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--puerto-http", type=int, default=8765)
+    parser.add_argument("--puerto-smtp", type=int, default=8025)
+    parser.add_argument("--latencia", type=float, default=0, help="latencia media de la API en ms")
+    parser.add_argument("--errores", type=float, default=0, help="fracción de respuestas 503")
+    parser.add_argument("--wods", type=int, default=5, help="WODs por respuesta")
+    parser.add_argument("--elementos-extra", type=int, default=0, help="notas sin WOD en el timeline de N8")
+    parser.add_argument("--semanas", type=int, default=1, help="semanas del timeline de N8")
+    args = parser.parse_args(argv)
+
+    api = ServidorAPI(puerto=args.puerto_http, latencia=args.latencia / 1000, tasa_errores=args.errores,
+                      wods=args.wods, elementos_extra=args.elementos_extra,
+                      semanas=args.semanas).iniciar()
+    smtp = SumideroSMTP(puerto=args.puerto_smtp).iniciar()
+    print(f"🌐 API en {api.url} (CrossfitDB: /<box>/api/v1/wods, N8: /<box>/api/activity)")
+    print(f"📮 SMTP en 127.0.0.1:{smtp.puerto} (sin TLS)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 API {api.estadisticas} | SMTP {smtp.estadisticas}")
+    except KeyboardInterrupt:
+        api.shutdown()
+        smtp.shutdown()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Pruebas de rendimiento de las funciones de limpieza y formato.
+
+Mide cada función sobre corpus de un día, una semana y un año de WODs
+(sintético y, si existe, el real anonimizado de anonimizar.py) y muestra
+WODs/s, MB/s y la memoria máxima. No necesita red ni config.py.
+
+    python benchmarks/suite.py                      # todos los tamaños
+    python benchmarks/suite.py --rapido             # comprobación rápida
+    python benchmarks/suite.py --json base.json     # guardar resultados
+    python benchmarks/suite.py --comparar base.json # falla si algo empeora
+
+Con --comparar termina con error si el rendimiento de algún caso baja más
+de --tolerancia respecto a los resultados guardados.
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import correo  # noqa: E402
+import formato  # noqa: E402
+from corpus import CORPUS_REAL, TAMAÑOS, cargar_real, sintetico, wods_normalizados  # noqa: E402
+
+# Tiempo mínimo de cada medición (se repite la función hasta alcanzarlo)
+OBJETIVO = 0.2
+
+# Mediciones de cada caso (se toma la mejor)
+REPETICIONES = 3
+
+# Bajada de rendimiento admitida al comparar con resultados guardados (en la
+# misma máquina); detecta empeoramientos grandes sin fallar por el ruido
+TOLERANCIA = 0.5
+
+
+def _tamaño(textos):
+    return sum(len(t.encode("utf-8")) for t in textos)
+
+
+def caso_limpiar_html_n8(corpus):
+    notas = corpus["n8"]
+    return lambda: [formato.limpiar_html(n) for n in notas], len(notas), _tamaño(notas)
+
+
+def caso_limpiar_html_crossfitdb(corpus):
+    notas = corpus["crossfitdb"]
+    return (lambda: [formato.limpiar_html(n, quitar_marcadores=True) for n in notas],
+            len(notas), _tamaño(notas))
+
+
+def caso_aplicar_formato(corpus):
+    textos = [formato.limpiar_html(n) for n in corpus["n8"]]
+    return lambda: [formato.aplicar_formato(t) for t in textos], len(textos), _tamaño(textos)
+
+
+def caso_es_tipo_entrenamiento(corpus):
+    textos = [formato.limpiar_html(n, quitar_marcadores=True) for n in corpus["crossfitdb"]]
+    lineas = [t.split("\n") for t in textos]
+
+    def ejecutar():
+        es_tipo = formato.es_tipo_entrenamiento
+        return [[es_tipo(linea) for linea in wod] for wod in lineas]
+    return ejecutar, len(textos), _tamaño(textos)
+
+
+def caso_formatear_wod_para_correo(corpus):
+    textos = [formato.limpiar_html(n, quitar_marcadores=True) for n in corpus["crossfitdb"]]
+    return (lambda: [formato.formatear_wod_para_correo(t, formato.es_tipo_entrenamiento) for t in textos],
+            len(textos), _tamaño(textos))
+
+
+def caso_analizar_wod(corpus):
+    textos = [formato.limpiar_html(n) for n in corpus["n8"]]
+
+    def ejecutar():
+        arboles = [formato.analizar_wod(t) for t in textos]
+        return [(formato.texto_de_arbol(a), formato.html_de_arbol(a)) for a in arboles]
+    return ejecutar, len(textos), _tamaño(textos)
+
+
+def caso_construir_cuerpo_html(corpus):
+    wods = wods_normalizados(corpus["crossfitdb"])
+    return (lambda: correo.construir_cuerpo_html(wods, "1/1", "5/1", "Box"),
+            len(wods), _tamaño(w.contenido for w in wods))
+
+
+# Casos de la suite, por nombre
+CASOS = {
+    "limpiar_html n8": caso_limpiar_html_n8,
+    "limpiar_html crossfitdb": caso_limpiar_html_crossfitdb,
+    "aplicar_formato": caso_aplicar_formato,
+    "es_tipo_entrenamiento": caso_es_tipo_entrenamiento,
+    "formatear_wod_para_correo": caso_formatear_wod_para_correo,
+    "analizar_wod (+texto/html)": caso_analizar_wod,
+    "construir_cuerpo_html": caso_construir_cuerpo_html,
+}
+
+
+def medir(funcion, objetivo=OBJETIVO, repeticiones=REPETICIONES):
+    """Devuelve el mejor tiempo por llamada, repitiendo la función hasta llenar objetivo."""
+    funcion()
+    inicio = time.perf_counter()
+    funcion()
+    vueltas = max(1, math.ceil(objetivo / max(time.perf_counter() - inicio, 1e-6)))
+
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(vueltas):
+            funcion()
+        mejor = min(mejor, (time.perf_counter() - inicio) / vueltas)
+    return mejor
+
+
+def memoria_maxima(funcion):
+    """Memoria máxima (bytes) que reserva una llamada a la función."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        funcion()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def ejecutar_suite(corpus, tamaños, objetivo=OBJETIVO, repeticiones=REPETICIONES, casos=None):
+    """Ejecuta los casos y devuelve una lista de resultados (diccionarios)."""
+    resultados = []
+    for nombre_corpus in corpus:
+        for nombre_tamaño in tamaños:
+            datos = corpus[nombre_corpus](TAMAÑOS[nombre_tamaño])
+            if datos is None:
+                continue
+            for nombre_caso, caso in CASOS.items():
+                if casos and nombre_caso not in casos:
+                    continue
+                funcion, wods, tamaño = caso(datos)
+                if not wods:
+                    continue
+                segundos = medir(funcion, objetivo, repeticiones)
+                resultados.append({
+                    "corpus": nombre_corpus,
+                    "tamaño": nombre_tamaño,
+                    "caso": nombre_caso,
+                    "wods": wods,
+                    "bytes": tamaño,
+                    "segundos": segundos,
+                    "wods_por_segundo": wods / segundos,
+                    "mb_por_segundo": tamaño / segundos / 1e6,
+                    "memoria_maxima": memoria_maxima(funcion),
+                })
+    return resultados
+
+
+def imprimir(resultados):
+    print(f"{'corpus':<10} {'tamaño':<7} {'caso':<27} {'WODs':>5} {'WODs/s':>10} {'MB/s':>7} {'memoria':>10}")
+    for r in resultados:
+        print(f"{r['corpus']:<10} {r['tamaño']:<7} {r['caso']:<27} {r['wods']:>5} "
+              f"{r['wods_por_segundo']:>10.0f} {r['mb_por_segundo']:>7.2f} "
+              f"{r['memoria_maxima'] / 1024:>7.0f} KiB")
+
+
+def comparar(resultados, ruta, tolerancia=TOLERANCIA):
+    """Compara con resultados guardados; devuelve los casos que han empeorado."""
+    with open(ruta, encoding="utf-8") as f:
+        base = {(r["corpus"], r["tamaño"], r["caso"]): r for r in json.load(f)["resultados"]}
+
+    peores = []
+    for r in resultados:
+        anterior = base.get((r["corpus"], r["tamaño"], r["caso"]))
+        if anterior and r["wods_por_segundo"] < anterior["wods_por_segundo"] * (1 - tolerancia):
+            peores.append((r, anterior))
+    return peores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamaños", nargs="+", choices=list(TAMAÑOS), default=list(TAMAÑOS))
+    parser.add_argument("--corpus", nargs="+", choices=["sintetico", "real"], default=["sintetico", "real"],
+                        help="el corpus real solo se usa si existe --corpus-real")
+    parser.add_argument("--corpus-real", default=CORPUS_REAL, help="corpus real anonimizado (anonimizar.py)")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), help="casos a medir (por defecto todos)")
+    parser.add_argument("--rapido", action="store_true", help="solo un día y una semana, mediciones cortas")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="resultados guardados con los que comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args(argv)
+
+    objetivo, repeticiones, tamaños = OBJETIVO, REPETICIONES, args.tamaños
+    if args.rapido:
+        objetivo, repeticiones = 0.05, 3
+        tamaños = [t for t in tamaños if t != "año"]
+
+    corpus = {}
+    if "sintetico" in args.corpus:
+        corpus["sintetico"] = sintetico
+    if "real" in args.corpus:
+        corpus["real"] = functools.partial(cargar_real, ruta=args.corpus_real)
+
+    resultados = ejecutar_suite(corpus, tamaños, objetivo, repeticiones, args.casos)
+    imprimir(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "resultados": resultados}, f, ensure_ascii=False, indent=1)
+        print(f"💾 Resultados guardados en {args.json}")
+
+    if args.comparar:
+        peores = comparar(resultados, args.comparar, args.tolerancia)
+        for r, anterior in peores:
+            print(f"⚠️ {r['corpus']}/{r['tamaño']}/{r['caso']}: {r['wods_por_segundo']:.0f} WODs/s "
+                  f"(antes {anterior['wods_por_segundo']:.0f})")
+        if peores:
+            return False
+        print("✅ Sin pérdidas de rendimiento")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
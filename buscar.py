@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Busca en el histórico de WODs del almacén local.
+
+    python buscar.py "c2b + du" [--box n8] [--desde 2024-01-01] [--recientes]
+
+Cada movimiento o frase separado por "+" (o por comas) tiene que aparecer
+en el WOD; las palabras de una misma frase, seguidas. Las abreviaturas de
+movimientos encuentran también el nombre completo y al revés ("c2b" y
+"chest to bar"), y las palabras largas también sus plurales ("thruster" y
+"thrusters"). Los resultados se ordenan por relevancia o, con --recientes,
+del más reciente al más antiguo ("¿cuándo hicimos C2B + DU por última vez?").
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import configuracion
+from almacen import AlmacenWODs, obtener_almacen
+from configuracion import ConfiguracionError
+
+# Abreviaturas de movimientos y sus nombres completos (config.py puede
+# añadir otras con MOVIMIENTOS)
+MOVIMIENTOS = {
+    "c2b": ["chest to bar"],
+    "t2b": ["toes to bar"],
+    "du": ["double under"],
+    "hspu": ["handstand push up"],
+    "kbs": ["kettlebell swing"],
+    "kbsr": ["russian kettlebell swing", "kettlebell swing ruso"],
+    "sc": ["squat clean"],
+    "ohs": ["overhead squat"],
+    "wb": ["wall ball"],
+    "bmu": ["bar muscle up"],
+    "rmu": ["ring muscle up"],
+    "ygig": ["you go i go"],
+}
+
+# Letras mínimas de una palabra suelta para encontrar también las palabras
+# que empiezan por ella (plurales); las abreviaturas cortas solo se buscan
+# exactas ("du" no debe encontrar "dumbbell"). En las frases de varias
+# palabras siempre se acepta el plural de la última.
+PREFIJO_MINIMO = 4
+
+# Resultados que se muestran por defecto
+LIMITE = 10
+
+_SEPARADOR_TERMINOS = re.compile(r"[+,]")
+_PALABRA = re.compile(r"\w+")
+
+
+def vocabulario(extra=None):
+    """Relaciona cada forma de un movimiento con todas sus formas."""
+    movimientos = dict(MOVIMIENTOS)
+    for abreviatura, nombres in (extra or {}).items():
+        movimientos[abreviatura.lower()] = [n.lower() for n in nombres]
+    formas = {}
+    for abreviatura, nombres in movimientos.items():
+        grupo = [abreviatura, *nombres]
+        for forma in grupo:
+            relacionadas = formas.setdefault(forma, [])
+            relacionadas.extend(otra for otra in grupo if otra not in relacionadas)
+    return formas
+
+
+def _frase(texto):
+    palabras = _PALABRA.findall(texto)
+    if not palabras:
+        return ""
+    prefijo = "*" if len(palabras) > 1 or len(palabras[-1]) >= PREFIJO_MINIMO else ""
+    return f'"{" ".join(palabras)}"{prefijo}'
+
+
+def expresion_fts(consulta, formas=None):
+    """Convierte una consulta ("c2b + du") en una expresión FTS5.
+
+    Devuelve "" si la consulta no tiene ninguna palabra.
+    """
+    formas = vocabulario() if formas is None else formas
+    grupos = []
+    for termino in _SEPARADOR_TERMINOS.split(consulta.lower()):
+        frase = " ".join(_PALABRA.findall(termino))
+        if not frase:
+            continue
+        # "double unders" se busca como "double under" (y du), y "thrusters"
+        # como "thruster"* para encontrar también el singular
+        singular = frase[:-1] if frase.endswith("s") else frase
+        if " " not in frase and len(singular) < PREFIJO_MINIMO:
+            singular = frase
+        alternativas = [_frase(forma) for forma in formas.get(frase) or formas.get(singular) or [singular]]
+        grupos.append("(" + " OR ".join(dict.fromkeys(alternativas)) + ")")
+    return " AND ".join(grupos)
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Busca en el histórico de WODs del almacén local")
+    parser.add_argument("consulta", nargs="?", default="",
+                        help='Movimientos o frases separados por "+", p. ej. "c2b + du"')
+    parser.add_argument("--box", help="Buscar solo en este box")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (AAAA-MM-DD)")
+    parser.add_argument("--limite", type=int, default=LIMITE, help="Número máximo de resultados")
+    parser.add_argument("--recientes", action="store_true",
+                        help="Ordenar por fecha (los más recientes primero) en lugar de por relevancia")
+    parser.add_argument("--almacen", default=None,
+                        help="Base de datos en la que buscar (por defecto: la de ALMACEN)")
+    parser.add_argument("--reconstruir", action="store_true",
+                        help="Volver a indexar todos los WODs antes de buscar")
+    args = parser.parse_args(argv)
+
+    try:
+        almacen = AlmacenWODs(args.almacen) if args.almacen else obtener_almacen()
+        formas = vocabulario(configuracion.obtener("MOVIMIENTOS", None))
+    except ConfiguracionError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    if almacen is None:
+        print("❌ ERROR: la búsqueda usa el almacén; activa ALMACEN o indica --almacen")
+        return False
+    if not almacen.busqueda:
+        print("❌ ERROR: esta versión de SQLite no tiene FTS5")
+        return False
+
+    if args.reconstruir:
+        inicio = time.perf_counter()
+        almacen.reconstruir_indice()
+        print(f"🔄 Índice reconstruido en {time.perf_counter() - inicio:.2f}s")
+        if not args.consulta:
+            return True
+
+    expresion = expresion_fts(args.consulta, formas)
+    if not expresion:
+        print("❌ ERROR: indica qué buscar, p. ej. \"c2b + du\"")
+        return False
+
+    filtros = (args.box, args.desde.isoformat() if args.desde else None,
+               args.hasta.isoformat() if args.hasta else None)
+    inicio = time.perf_counter()
+    try:
+        resultados = almacen.buscar(expresion, *filtros, args.limite, args.recientes)
+        total = almacen.contar(expresion, *filtros)
+    except sqlite3.OperationalError as e:
+        print(f"❌ Consulta no válida ({expresion}): {e}")
+        return False
+    duracion = (time.perf_counter() - inicio) * 1000
+
+    orden = "más recientes" if args.recientes else "más relevantes"
+    print(f"🔍 {args.consulta}: {total} WODs ({duracion:.1f} ms)"
+          + (f", los {len(resultados)} {orden}:" if resultados else ""))
+    for resultado in resultados:
+        fragmento = " ".join(resultado["fragmento"].split())
+        print(f"  📅 {resultado['dia_semana']} {resultado['fecha_formateada']} "
+              f"[{resultado['box']}]: {fragmento}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,266 @@
+"""
+Caché en disco de las respuestas de las APIs de los boxes.
+
+Las respuestas se guardan con una clave que depende de la URL y de los
+parámetros de la petición, sin los parámetros anti-caché (como el "_" con
+la marca de tiempo que envía N8). En cada descarga se envían If-None-Match e
+If-Modified-Since con los valores guardados; si el servidor responde 304, o
+el contenido descargado es idéntico byte a byte al guardado, la respuesta se
+marca como sin cambios y el pipeline puede reutilizar los WODs ya procesados
+(guardar_resultado/resultado) sin volver a limpiar ni formatear el HTML.
+
+La caché se poda por antigüedad y por tamaño total.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import configuracion
+import metricas
+
+# Directorio por defecto de la caché
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http")
+
+# Tamaño total máximo de la caché y antigüedad máxima de una entrada
+MAX_MB = 50
+MAX_DIAS = 30
+
+# Cambiar cuando cambie el formato de los WODs procesados guardados
+VERSION_RESULTADOS = 4
+
+_DECODIFICADOR = json.JSONDecoder()
+_ESPACIOS_JSON = re.compile(r"[ \t\n\r]*")
+
+
+def iterar_lista(texto, clave):
+    """Itera los elementos de la lista clave del objeto JSON de texto, uno a uno.
+
+    Solo se decodifica cada elemento cuando se pide, así que quien recorre la
+    lista puede dejarla a medias sin pagar el resto. Los demás valores del
+    objeto se decodifican (y descartan) para saltarlos. Si la clave no está o
+    no es una lista no se devuelve nada.
+    """
+    decodificar = _DECODIFICADOR.raw_decode
+    saltar = _ESPACIOS_JSON.match
+
+    def esperar(caracteres, pos):
+        pos = saltar(texto, pos).end()
+        if texto[pos:pos + 1] not in caracteres:
+            raise json.JSONDecodeError(f"Se esperaba {' o '.join(caracteres)}", texto, pos)
+        return texto[pos], pos + 1
+
+    _, pos = esperar(("{",), 0)
+    if texto.startswith("}", saltar(texto, pos).end()):
+        return
+    while True:
+        nombre, pos = decodificar(texto, saltar(texto, pos).end())
+        _, pos = esperar((":",), pos)
+        pos = saltar(texto, pos).end()
+        if nombre == clave and texto.startswith("[", pos):
+            pos += 1
+            if texto.startswith("]", saltar(texto, pos).end()):
+                return
+            while True:
+                elemento, pos = decodificar(texto, saltar(texto, pos).end())
+                yield elemento
+                separador, pos = esperar((",", "]"), pos)
+                if separador == "]":
+                    return
+        _, pos = decodificar(texto, pos)
+        separador, pos = esperar((",", "}"), pos)
+        if separador == "}":
+            return
+
+
+class RespuestaHTTP:
+    """Cuerpo de una respuesta (descargada o de la caché) y su hash."""
+
+    def __init__(self, clave, contenido, hash_contenido, sin_cambios=False):
+        self.clave = clave
+        self.contenido = contenido
+        self.hash = hash_contenido
+        self.sin_cambios = sin_cambios
+
+    @classmethod
+    def desde_response(cls, response, clave=None):
+        """Crea la respuesta a partir de una respuesta de requests."""
+        contenido = response.content
+        return cls(clave, contenido, hashlib.sha256(contenido).hexdigest())
+
+    def json(self):
+        with metricas.medir("json"):
+            return json.loads(self.contenido)
+
+    def iterar(self, clave):
+        """Itera la lista clave del objeto JSON de la respuesta (ver iterar_lista)."""
+        texto = self.contenido.decode(json.detect_encoding(self.contenido))
+        return metricas.medir_iterador("json", iterar_lista(texto, clave))
+
+
+class CacheHTTP:
+    """Caché de respuestas HTTP con peticiones condicionales y poda."""
+
+    def __init__(self, directorio=DIRECTORIO, max_mb=MAX_MB, max_dias=MAX_DIAS):
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_edad = max_dias * 24 * 3600
+        self._lock = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def clave(self, url, params=None, ignorar=()):
+        """Clave normalizada de una petición (sin los parámetros ignorados)."""
+        normalizados = sorted(
+            (str(k), str(v)) for k, v in (params or {}).items() if k not in ignorar
+        )
+        texto = json.dumps([url, normalizados], ensure_ascii=False)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _ruta(self, clave, extension):
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def _leer_json(self, ruta):
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _escribir(self, ruta, datos):
+        """Escribe el archivo de forma atómica."""
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        modo = "wb" if isinstance(datos, bytes) else "w"
+        with open(temporal, modo, **({} if modo == "wb" else {"encoding": "utf-8"})) as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def _leer_cuerpo(self, clave):
+        try:
+            with open(self._ruta(clave, "body"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get(self, cliente, url, params=None, ignorar=(), **kwargs):
+        """Descarga una URL con petición condicional y devuelve una RespuestaHTTP."""
+        clave = self.clave(url, params, ignorar)
+        meta = self._leer_json(self._ruta(clave, "meta"))
+        cuerpo_guardado = self._leer_cuerpo(clave) if meta else None
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cuerpo_guardado is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = cliente.get(url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cuerpo_guardado is not None:
+            meta["usado"] = time.time()
+            self._escribir(self._ruta(clave, "meta"), json.dumps(meta))
+            return RespuestaHTTP(clave, cuerpo_guardado, meta["hash"], sin_cambios=True)
+
+        response.raise_for_status()
+        respuesta = RespuestaHTTP.desde_response(response, clave)
+        respuesta.sin_cambios = cuerpo_guardado is not None and meta.get("hash") == respuesta.hash
+
+        if not respuesta.sin_cambios:
+            self._escribir(self._ruta(clave, "body"), respuesta.contenido)
+        ahora = time.time()
+        self._escribir(self._ruta(clave, "meta"), json.dumps({
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": respuesta.hash,
+            "tamaño": len(respuesta.contenido),
+            "guardado": meta["guardado"] if respuesta.sin_cambios else ahora,
+            "usado": ahora,
+        }))
+        self.podar()
+        return respuesta
+
+    def resultado(self, respuesta, contexto):
+        """Devuelve los datos procesados guardados para esta respuesta, o None.
+
+        Solo hay resultado si el contenido y el contexto (box, semana...) son
+        los mismos que cuando se guardó.
+        """
+        if respuesta.clave is None:
+            return None
+        guardado = self._leer_json(self._ruta(respuesta.clave, "resultado"))
+        if (guardado and guardado.get("hash") == respuesta.hash
+                and guardado.get("contexto") == contexto
+                and guardado.get("version") == VERSION_RESULTADOS):
+            return guardado["datos"]
+        return None
+
+    def guardar_resultado(self, respuesta, contexto, datos):
+        """Guarda los datos procesados a partir de una respuesta."""
+        if respuesta.clave is None:
+            return
+        self._escribir(self._ruta(respuesta.clave, "resultado"), json.dumps({
+            "hash": respuesta.hash,
+            "contexto": contexto,
+            "version": VERSION_RESULTADOS,
+            "datos": datos,
+        }, ensure_ascii=False))
+
+    def podar(self):
+        """Elimina las entradas caducadas y las menos usadas si se supera el tamaño máximo."""
+        with self._lock:
+            entradas = {}
+            try:
+                nombres = os.listdir(self.directorio)
+            except OSError:
+                return
+            for nombre in nombres:
+                if nombre.endswith(".tmp"):
+                    continue
+                clave = nombre.split(".", 1)[0]
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue
+                entrada = entradas.setdefault(clave, {"tamaño": 0, "usado": 0.0, "rutas": []})
+                entrada["tamaño"] += estado.st_size
+                entrada["usado"] = max(entrada["usado"], estado.st_mtime)
+                entrada["rutas"].append(ruta)
+
+            limite = time.time() - self.max_edad
+            total = sum(e["tamaño"] for e in entradas.values())
+            for clave, entrada in sorted(entradas.items(), key=lambda e: e[1]["usado"]):
+                if entrada["usado"] >= limite and total <= self.max_bytes:
+                    break
+                for ruta in entrada["rutas"]:
+                    try:
+                        os.remove(ruta)
+                    except OSError:
+                        pass
+                total -= entrada["tamaño"]
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obtener_cache():
+    """Devuelve la caché del proceso según CACHE_HTTP de config.py, o None si está desactivada."""
+    global _cache
+    if _cache is None:
+        with _lock_cache:
+            if _cache is None:
+                opciones = configuracion.obtener("CACHE_HTTP", {})
+                if opciones is None or not opciones.get("activa", True):
+                    _cache = False
+                else:
+                    _cache = CacheHTTP(
+                        opciones.get("directorio", DIRECTORIO),
+                        opciones.get("max_mb", MAX_MB),
+                        opciones.get("max_dias", MAX_DIAS),
+                    )
+    return _cache or None
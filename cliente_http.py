@@ -0,0 +1,185 @@
+"""
+Cliente HTTP compartido por todos los boxes.
+
+Usa una única requests.Session con un pool de conexiones keep-alive, de modo
+que los boxes alojados en el mismo host reutilizan las conexiones. Cada
+petición tiene timeout y los errores de conexión y las respuestas 5xx se
+reintentan con backoff exponencial acotado. Si el hilo tiene un plazo (ver
+resiliencia.con_plazo) el timeout se recorta al tiempo que queda y no se
+reintenta si no da tiempo a esperar. Las estadísticas de uso (por host) y
+del pool están disponibles con estadisticas().
+
+requests se importa al crear el cliente y no al importar el módulo: es la
+dependencia que más tarda en cargarse y no la necesitan las ejecuciones que
+no descargan nada.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import resiliencia
+
+# Timeout por defecto (conexión, lectura) en segundos
+TIMEOUT = (5, 30)
+
+# Número de reintentos tras el primer intento fallido
+REINTENTOS = 3
+
+# Espera inicial y máxima entre reintentos, en segundos
+BACKOFF = 0.5
+MAX_BACKOFF = 8
+
+# Número de hosts y de conexiones por host que guarda el pool
+POOL_HOSTS = 10
+POOL_CONEXIONES = 10
+
+
+class EstadisticasHost:
+    """Contadores y latencias de las peticiones a un host."""
+
+    def __init__(self):
+        self.peticiones = 0
+        self.reintentos = 0
+        self.errores = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+
+    def registrar(self, latencia):
+        self.peticiones += 1
+        self.latencia_total += latencia
+        self.latencia_max = max(self.latencia_max, latencia)
+
+    def como_dict(self):
+        media = self.latencia_total / self.peticiones if self.peticiones else 0.0
+        return {
+            "peticiones": self.peticiones,
+            "reintentos": self.reintentos,
+            "errores": self.errores,
+            "latencia_media": media,
+            "latencia_max": self.latencia_max,
+        }
+
+
+class ClienteHTTP:
+    """Sesión HTTP con pool de conexiones, timeouts y reintentos."""
+
+    def __init__(self, timeout=TIMEOUT, reintentos=REINTENTOS, backoff=BACKOFF,
+                 max_backoff=MAX_BACKOFF, pool_hosts=POOL_HOSTS, pool_conexiones=POOL_CONEXIONES):
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._errores_reintentables = (requests.ConnectionError, requests.Timeout)
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_conexiones)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self._adaptador = adaptador
+
+        self._estadisticas = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, host):
+        with self._lock:
+            if host not in self._estadisticas:
+                self._estadisticas[host] = EstadisticasHost()
+            return self._estadisticas[host]
+
+    def _espera(self, intento):
+        """Backoff exponencial con jitter para el intento indicado (desde 0)."""
+        espera = min(self.max_backoff, self.backoff * (2 ** intento))
+        return espera * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _ultimo_intento(intento, reintentos, espera, plazo):
+        """Si no se repite la petición: no quedan reintentos o no da tiempo a esperar."""
+        return intento >= reintentos or (plazo is not None and plazo.restante() <= espera)
+
+    def get(self, url, params=None, timeout=None, reintentos=None, **kwargs):
+        """Hace un GET con timeout y reintentos; devuelve la última respuesta.
+
+        Los errores de conexión y timeouts se relanzan cuando se agotan los
+        reintentos; una respuesta 5xx final se devuelve tal cual para que
+        quien llama use raise_for_status(). Con el plazo del hilo agotado
+        lanza resiliencia.PlazoAgotado.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        reintentos = self.reintentos if reintentos is None else reintentos
+        stats = self._stats(urlsplit(url).netloc)
+        plazo = resiliencia.plazo_actual()
+
+        intento = 0
+        while True:
+            espera = self._espera(intento)
+            inicio = time.perf_counter()
+            try:
+                response = self.sesion.get(url, params=params,
+                                           timeout=plazo.recortar(timeout) if plazo else timeout, **kwargs)
+            except self._errores_reintentables as e:
+                with self._lock:
+                    stats.registrar(time.perf_counter() - inicio)
+                    stats.errores += 1
+                if plazo is not None and plazo.agotado():
+                    raise resiliencia.PlazoAgotado(f"plazo agotado descargando de {urlsplit(url).netloc}") from e
+                if self._ultimo_intento(intento, reintentos, espera, plazo):
+                    raise
+            else:
+                with self._lock:
+                    stats.registrar(time.perf_counter() - inicio)
+                    if response.status_code >= 500:
+                        stats.errores += 1
+                if response.status_code < 500 or self._ultimo_intento(intento, reintentos, espera, plazo):
+                    return response
+                response.close()
+
+            with self._lock:
+                stats.reintentos += 1
+            time.sleep(espera)
+            intento += 1
+
+    def estadisticas(self):
+        """Devuelve las estadísticas por host y del pool de conexiones."""
+        with self._lock:
+            hosts = {host: stats.como_dict() for host, stats in self._estadisticas.items()}
+
+        pool = {}
+        for clave in list(self._adaptador.poolmanager.pools.keys()):
+            conexiones = self._adaptador.poolmanager.pools.get(clave)
+            if conexiones is None:
+                continue
+            pool[f"{clave.key_scheme}://{clave.key_host}:{clave.key_port}"] = {
+                "conexiones_abiertas": getattr(conexiones, "num_connections", 0),
+                "peticiones": getattr(conexiones, "num_requests", 0),
+            }
+        return {"hosts": hosts, "pool": pool}
+
+    def cerrar(self):
+        """Cierra la sesión y sus conexiones."""
+        self.sesion.close()
+
+
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def obtener_cliente():
+    """Devuelve el cliente HTTP compartido del proceso (lo crea la primera vez)."""
+    global _cliente
+    if _cliente is None:
+        with _lock_cliente:
+            if _cliente is None:
+                _cliente = ClienteHTTP()
+    return _cliente
+
+
+def estadisticas():
+    """Estadísticas del cliente compartido (vacías si no se ha usado)."""
+    if _cliente is None:
+        return {"hosts": {}, "pool": {}}
+    return _cliente.estadisticas()
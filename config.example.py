@@ -19,4 +19,42 @@ CROSSFITDB_CONFIG = {
 # Configuración para N8
 N8_CONFIG = {
     "user_id": 123456                     # Tu ID de usuario en N8
-}
\ No newline at end of file
+}
+
+# Opcional: lista de boxes. Si se define, sustituye a CROSSFITDB_CONFIG y
+# N8_CONFIG y permite varios boxes del mismo proveedor.
+# BOXES = [
+#     {"proveedor": "n8", "nombre": "n8", "titulo": "N8", "user_id": 123456},
+# ]
+
+# Opcional: grupos de destinatarios, para usar en "destinatarios" de
+# EMAIL_CONFIG o de cada box (p. ej. "destinatarios": ["socios"])
+# GRUPOS_DESTINATARIOS = {
+#     "socios": ["ana@example.com", "luis@example.com"],
+# }
+
+# Opcional: planificación del modo daemon (python sync_wods.py --daemon)
+# PLANIFICADOR = {"dia": "lunes", "hora": "07:00", "intervalo": 60, "horas": (6, 22)}
+
+# Opcional: abreviaturas de movimientos para python buscar.py y
+# python analitica.py (además de las de buscar.MOVIMIENTOS)
+# MOVIMIENTOS = {"mu": ["muscle up"], "ttb": ["toes to bar"]}
+
+# Opcional: plazos en segundos de cada ejecución y de cada box ("plazo" en
+# la configuración del box; por defecto no hay plazos), y fallos seguidos
+# tras los que se deja de descargar un box durante "espera" minutos
+# (DISYUNTOR = None para desactivarlos)
+# PLAZOS = {"total": 120, "box": 60}
+# DISYUNTOR = {"fallos": 3, "espera": 30}
+
+# Opcional: métricas de cada ejecución (tiempo por etapa y box, contadores)
+# METRICAS = {
+#     "prometheus": "/var/lib/node_exporter/textfile_collector/wods.prom",
+#     "json": "metricas.json",
+# }
+
+# Opcional: reglas de formato (las listas que falten usan las de formato.py)
+# REGLAS_FORMATO = {
+#     "palabras_mayusculas": ["wod", "amrap", "emom", "rx", "hspu"],
+#     "tipos_entrenamiento": ["amrap", "emom", "tabata", "for time", "chipper"],
+# }
@@ -0,0 +1,52 @@
+"""
+Carga perezosa de config.py.
+
+La configuración se importa una sola vez, la primera vez que se necesita, y
+si falta el archivo se lanza ConfiguracionError en lugar de terminar el
+proceso, de modo que quien llama decide cómo informar del problema.
+"""
+
+import importlib
+import threading
+
+
+class ConfiguracionError(Exception):
+    """No se encuentra config.py o le falta algún dato."""
+
+
+_config = None
+_lock = threading.Lock()
+
+
+def cargar_config():
+    """Importa config.py (una sola vez) y devuelve el módulo."""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                try:
+                    _config = importlib.import_module("config")
+                except ImportError as e:
+                    # Un ImportError de dentro de config.py (p. ej. un import
+                    # mal escrito) no significa que falte el archivo
+                    if e.name != "config":
+                        raise
+                    raise ConfiguracionError(
+                        "No se encuentra el archivo config.py. Por favor, copia "
+                        "config.example.py a config.py y configura tus datos"
+                    )
+                print("✅ Configuración cargada correctamente")
+    return _config
+
+
+def obtener(nombre, defecto=None):
+    """Devuelve una variable de config.py o el valor por defecto."""
+    return getattr(cargar_config(), nombre, defecto)
+
+
+def requerir(nombre):
+    """Devuelve una variable obligatoria de config.py."""
+    valor = obtener(nombre)
+    if valor is None:
+        raise ConfiguracionError(f"Falta {nombre} en config.py")
+    return valor
@@ -0,0 +1,375 @@
+"""
+Construcción y envío del correo con los WODs de un box.
+
+La parte fija del documento (cabecera con los estilos y pie) se define una
+sola vez; cada correo solo genera las tarjetas de sus WODs y las une con la
+parte fija. CuerpoCorreo guarda las tarjetas ya generadas para poder
+producir el documento o el mensaje de varios destinatarios sin volver a
+formatear los WODs.
+
+Los módulos de email.mime se importan al construir el primer mensaje.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import bandeja_salida
+import metricas
+from envio import obtener_pool
+from formato import formatear_wod_para_correo, html_de_arbol
+
+# Direcciones por mensaje al enviar a muchos destinatarios (cada lote es una
+# transacción SMTP; email_config: "destinatarios_por_mensaje")
+DESTINATARIOS_POR_MENSAJE = 50
+
+# Cabecera To de los mensajes con varios destinatarios, que solo van en el
+# sobre SMTP (como con Bcc) para no mostrar las direcciones de los demás
+DESTINATARIO_OCULTO = "undisclosed-recipients:;"
+
+# Inicio del documento, con los estilos (no depende del box ni de los WODs)
+CABECERA_HTML = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>WODs de la semana</title>
+            <style>
+                @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
+
+                body {
+                    font-family: 'Roboto', Helvetica, Arial, sans-serif;
+                    line-height: 1.6;
+                    color: #333;
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                    background-color: #f5f7fa;
+                }
+
+                h1 {
+                    color: #2c3e50;
+                    font-size: 28px;
+                    text-align: center;
+                    font-weight: 700;
+                    margin-bottom: 30px;
+                }
+
+                h2 {
+                    margin: 0;
+                    padding: 15px 20px;
+                    color: white;
+                    font-size: 18px;
+                    font-weight: 600;
+                    background-color: #2980b9;
+                    border-radius: 8px 8px 0 0;
+                    letter-spacing: 0.5px;
+                }
+
+                .wod-card {
+                    background-color: white;
+                    border-radius: 8px;
+                    box-shadow: 0 4px 6px rgba(0,0,0,0.08);
+                    margin-bottom: 30px;
+                    overflow: hidden;
+                }
+
+                .wod-content {
+                    padding: 25px;
+                }
+
+                .section-header {
+                    font-weight: 700;
+                    font-size: 16px;
+                    color: #2c3e50;
+                    background-color: #ecf0f1;
+                    padding: 8px 12px;
+                    margin: 15px 0 10px 0;
+                    border-radius: 4px;
+                    border-left: 4px solid #3498db;
+                }
+
+                .workout-type {
+                    font-weight: 700;
+                    font-size: 15px;
+                    color: white;
+                    background-color: #e74c3c;
+                    padding: 6px 10px;
+                    margin: 12px 0 8px 15px;
+                    border-radius: 3px;
+                    display: inline-block;
+                }
+
+                .workout-details {
+                    margin: 5px 0 5px 25px;
+                    color: #34495e;
+                    font-weight: 500;
+                    font-size: 15px;
+                }
+
+                .subsection {
+                    margin: 8px 0 8px 20px;
+                    color: #34495e;
+                    font-weight: 500;
+                }
+
+                .wod-list {
+                    list-style-type: none;
+                    padding-left: 10px;
+                    margin: 10px 0 15px 15px;
+                }
+
+                .wod-list li {
+                    position: relative;
+                    padding-left: 20px;
+                    margin-bottom: 8px;
+                    color: #34495e;
+                }
+
+                .wod-list li:before {
+                    content: "•";
+                    position: absolute;
+                    left: 0;
+                    color: #3498db;
+                    font-weight: bold;
+                }
+
+                .wod-paragraph {
+                    margin: 10px 0;
+                    color: #34495e;
+                }
+
+                .footer {
+                    text-align: center;
+                    margin-top: 40px;
+                    font-size: 13px;
+                    color: #7f8c8d;
+                }
+
+                .logo {
+                    text-align: center;
+                    margin-bottom: 20px;
+                }
+
+                .logo span {
+                    font-size: 18px;
+                    font-weight: 700;
+                    color: #2980b9;
+                    letter-spacing: 2px;
+                }
+            </style>
+        </head>
+        <body>
+"""
+
+# Logo y título del correo
+TITULO_HTML = """            <div class="logo">
+                <span>{titulo_box} WODs</span>
+            </div>
+            <h1>{encabezado} ({lunes_fmt} - {viernes_fmt})</h1>
+        """
+
+# Tarjeta de un WOD (el contenido es el HTML generado a partir del WOD)
+TARJETA_HTML = '<div class="wod-card">\n<h2>WOD DEL {titulo}</h2>\n<div class="wod-content">{contenido}</div>\n</div>'
+
+# Tarjeta que se muestra cuando no hay WODs
+SIN_WODS_HTML = '<div class="wod-card">\n<h2>Sin WODs disponibles</h2>\n<div class="wod-content"><p>No se encontraron WODs para esta semana.</p></div>\n</div>'
+
+# Final del documento
+PIE_HTML = """
+        <div class="footer">
+            <p>Generado automáticamente — Wodify Box Sync</p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def renderizar_tarjetas(todos_wods, formatear_html=formatear_wod_para_correo):
+    """Devuelve el HTML de las tarjetas de los WODs.
+
+    Si un WOD (wod.WOD) trae su árbol (estructura) el HTML se genera a partir de él;
+    si no, se formatea su contenido con formatear_html.
+    """
+    if not todos_wods:
+        return SIN_WODS_HTML
+
+    tarjetas = []
+    for wod in todos_wods:
+        titulo = f"{wod.dia_semana} {wod.fecha_formateada}"
+
+        with metricas.medir("formatear_wod_para_correo"):
+            if wod.estructura is not None:
+                contenido_html = html_de_arbol(wod.estructura)
+            else:
+                contenido_html = formatear_html(wod.contenido)
+        tarjetas.append(TARJETA_HTML.format(titulo=titulo, contenido=contenido_html))
+    return "".join(tarjetas)
+
+
+class CuerpoCorreo:
+    """HTML de un conjunto de WODs, generado una sola vez y reutilizable.
+
+    Las tarjetas se generan al crear el objeto; html() y parte_mime() solo
+    añaden la parte fija del documento, y parte_mime() recuerda la parte ya
+    codificada para que todos los mensajes con el mismo título la compartan
+    (serializar() aprovecha eso para no volver a serializarla).
+    """
+
+    def __init__(self, todos_wods, formatear_html=formatear_wod_para_correo):
+        self.tarjetas = renderizar_tarjetas(todos_wods, formatear_html)
+        self._partes = {}
+        self._serializados = {}
+
+    def html(self, titulo_box, lunes_fmt, viernes_fmt, encabezado="WODs de la semana"):
+        """Devuelve el documento HTML completo."""
+        return "".join((
+            CABECERA_HTML,
+            TITULO_HTML.format(titulo_box=titulo_box, encabezado=encabezado,
+                               lunes_fmt=lunes_fmt, viernes_fmt=viernes_fmt),
+            self.tarjetas,
+            PIE_HTML,
+        ))
+
+    def parte_mime(self, titulo_box, lunes_fmt, viernes_fmt, encabezado="WODs de la semana"):
+        """Devuelve la parte MIME text/html del documento (codificada una sola vez)."""
+        clave = (titulo_box, lunes_fmt, viernes_fmt, encabezado)
+        parte = self._partes.get(clave)
+        if parte is None:
+            from email.mime.text import MIMEText
+
+            parte = MIMEText(self.html(*clave), "html")
+            self._partes[clave] = parte
+        return parte
+
+    def serializar(self, mensaje):
+        """Devuelve el texto de un mensaje de construir_mensaje (igual que mensaje.as_string()).
+
+        Todos los mensajes que comparten una parte usan el mismo separador
+        MIME, así que la parte HTML solo se serializa la primera vez; de cada
+        mensaje se generan únicamente las cabeceras.
+        """
+        parte = mensaje.get_payload()[0]
+        serializado = self._serializados.get(parte)
+        if serializado is None:
+            texto = mensaje.as_string()
+            self._serializados[parte] = (mensaje.get_boundary(), texto[texto.index("\n\n") + 2:])
+            return texto
+
+        separador, cuerpo = serializado
+        mensaje.set_boundary(separador)
+        politica = mensaje.policy.clone(max_line_length=0)
+        cabeceras = "".join(politica.fold(nombre, valor) for nombre, valor in mensaje.raw_items())
+        return f"{cabeceras}\n{cuerpo}"
+
+
+def construir_cuerpo_html(todos_wods, lunes_fmt, viernes_fmt, titulo_box,
+                          formatear_html=formatear_wod_para_correo, encabezado="WODs de la semana"):
+    """Construye el cuerpo HTML del correo con los WODs de un box."""
+    return CuerpoCorreo(todos_wods, formatear_html).html(titulo_box, lunes_fmt, viernes_fmt, encabezado)
+
+
+def construir_mensaje(cuerpo, lunes_fmt, viernes_fmt, titulo_box, email_config,
+                      destinatario=None, solo_cambios=False):
+    """Construye el mensaje de un destinatario a partir de un CuerpoCorreo."""
+    from email.mime.multipart import MIMEMultipart
+
+    mensaje = MIMEMultipart()
+    mensaje["From"] = email_config["remitente"]
+    mensaje["To"] = destinatario or email_config["destinatario"]
+    asunto = email_config['asunto'] + (" (cambios)" if solo_cambios else "")
+    mensaje["Subject"] = f"{titulo_box} - {asunto} ({lunes_fmt} - {viernes_fmt})"
+
+    encabezado = "WODs actualizados" if solo_cambios else "WODs de la semana"
+    mensaje.attach(cuerpo.parte_mime(titulo_box, lunes_fmt, viernes_fmt, encabezado))
+    return mensaje
+
+
+def lotes_destinatarios(destinatarios, por_mensaje=DESTINATARIOS_POR_MENSAJE):
+    """Divide los destinatarios en lotes de como mucho por_mensaje direcciones."""
+    por_mensaje = max(1, por_mensaje)
+    return [destinatarios[i:i + por_mensaje] for i in range(0, len(destinatarios), por_mensaje)]
+
+
+def enviar_correo_con_wods(todos_wods, lunes_fmt, viernes_fmt, titulo_box, email_config,
+                           formatear_html=formatear_wod_para_correo, solo_cambios=False, pool=None,
+                           destinatarios=None):
+    """Envía un correo con los WODs formateados.
+
+    Con solo_cambios el correo se presenta como una actualización con los
+    WODs nuevos o modificados. Si la bandeja de salida está activa el
+    mensaje se guarda en ella y lo envía el despachador en segundo plano; si
+    no, se envía por la sesión SMTP compartida del remitente (ver envio.py)
+    salvo que se indique otro pool.
+
+    destinatarios es la lista de direcciones (por defecto el destinatario de
+    email_config). El cuerpo se genera y serializa una sola vez y se envía
+    en lotes de "destinatarios_por_mensaje" direcciones, cada lote en una
+    transacción SMTP; sin la bandeja los lotes se envían a la vez por las
+    sesiones del pool.
+    """
+    destinatarios = destinatarios or [email_config["destinatario"]]
+    remitente = email_config["remitente"]
+    # Los lotes se preparan y envían en otros hilos: sus medidas son del box en curso
+    box = metricas.box_actual()
+    lotes = lotes_destinatarios(destinatarios, email_config.get("destinatarios_por_mensaje",
+                                                                DESTINATARIOS_POR_MENSAJE))
+    try:
+        cuerpo = CuerpoCorreo(todos_wods, formatear_html)
+
+        def preparar(lote):
+            # Con varios destinatarios en el lote solo aparecen en el sobre
+            visible = lote[0] if len(lote) == 1 else DESTINATARIO_OCULTO
+            with metricas.medir("plantilla", box):
+                mensaje = construir_mensaje(cuerpo, lunes_fmt, viernes_fmt, titulo_box, email_config,
+                                            destinatario=visible, solo_cambios=solo_cambios)
+                return mensaje, cuerpo.serializar(mensaje)
+
+        if pool is None and bandeja_salida.iniciar_despachador(email_config) is not None:
+            bandeja = bandeja_salida.obtener_bandeja()
+            for lote in lotes:
+                mensaje, texto = preparar(lote)
+                bandeja.encolar(mensaje, remitente, lote, texto, box)
+                metricas.contar("correos_encolados")
+            if len(destinatarios) > 1:
+                print(f"📤 Correo guardado en la bandeja de salida ({len(destinatarios)} destinatarios)")
+            else:
+                print("📤 Correo guardado en la bandeja de salida")
+            return True
+    except Exception as e:
+        print(f"❌ Error al enviar el correo: {e}")
+        return False
+
+    pool = pool or obtener_pool(email_config)
+    # El primer mensaje se prepara aquí para que la parte HTML ya esté
+    # codificada y serializada cuando los hilos preparen los suyos
+    try:
+        primero = preparar(lotes[0])[1]
+    except Exception as e:
+        print(f"❌ Error al enviar el correo: {e}")
+        return False
+
+    def enviar(lote):
+        texto = primero if lote is lotes[0] else preparar(lote)[1]
+        with metricas.en_box(box):
+            return pool.enviar_texto(texto, remitente, lote)
+
+    fallidos = rechazados = 0
+    with ThreadPoolExecutor(max_workers=min(pool.tamaño, len(lotes))) as ejecutor:
+        futuros = {ejecutor.submit(enviar, lote): lote for lote in lotes}
+        for futuro in as_completed(futuros):
+            try:
+                rechazados += len(futuro.result())
+            except Exception as e:
+                fallidos += len(futuros[futuro])
+                print(f"❌ Error al enviar el correo: {e}")
+
+    if rechazados:
+        print(f"⚠️ El servidor rechazó {rechazados} destinatarios")
+    if fallidos:
+        if len(destinatarios) > 1:
+            print(f"❌ No se pudo enviar a {fallidos} de {len(destinatarios)} destinatarios")
+        return False
+    if len(destinatarios) > 1:
+        print(f"✅ Correo enviado a {len(destinatarios) - rechazados} destinatarios")
+    else:
+        print("✅ Correo enviado correctamente")
+    return True
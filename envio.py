@@ -0,0 +1,248 @@
+"""
+Envío de correos por SMTP con sesiones compartidas.
+
+En lugar de abrir una conexión (con STARTTLS y LOGIN) por cada mensaje, se
+mantiene un pequeño pool de sesiones autenticadas por servidor y remitente
+durante toda la ejecución y todos los mensajes pasan por ellas. Si una
+sesión se cae se reconecta de forma transparente y se reintenta el envío.
+
+smtplib se importa al abrir la primera sesión, para que las ejecuciones que
+no envían correos no lo carguen.
+"""
+
+import queue
+import threading
+import time
+
+import metricas
+
+# Número de sesiones SMTP abiertas a la vez por servidor y remitente
+CONEXIONES = 1
+
+# Segundos de inactividad tras los que se comprueba la sesión con NOOP
+MAX_INACTIVIDAD = 60
+
+# Mensajes (transacciones SMTP) por segundo del pool; None sin límite
+MENSAJES_POR_SEGUNDO = None
+
+
+def es_error_de_conexion(error):
+    """Indica si un error se debe a la conexión (y no a la respuesta del servidor).
+
+    Las excepciones de smtplib heredan de OSError, así que hay que
+    distinguirlas de los errores de red.
+    """
+    import smtplib
+
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class LimitadorTasa:
+    """Reparte las operaciones de varios hilos a un ritmo máximo por segundo."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        """Espera hasta que toca la siguiente operación."""
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+class EstadisticasSMTP:
+    """Contadores de un pool SMTP."""
+
+    def __init__(self):
+        self.mensajes = 0
+        self.destinatarios = 0
+        self.rechazados = 0
+        self.errores = 0
+        self.conexiones = 0
+        self.reconexiones = 0
+        self.tiempo_envio = 0.0
+        self.inicio = None
+
+    def como_dict(self):
+        duracion = time.perf_counter() - self.inicio if self.inicio else 0.0
+        return {
+            "mensajes": self.mensajes,
+            "destinatarios": self.destinatarios,
+            "rechazados": self.rechazados,
+            "errores": self.errores,
+            "conexiones": self.conexiones,
+            "reconexiones": self.reconexiones,
+            "tiempo_envio": self.tiempo_envio,
+            "mensajes_por_segundo": self.mensajes / duracion if duracion else 0.0,
+        }
+
+
+class PoolSMTP:
+    """Pool de sesiones SMTP autenticadas para un servidor y remitente.
+
+    Con "mensajes_por_segundo" en email_config los envíos de todos los hilos
+    se reparten a ese ritmo como máximo.
+    """
+
+    def __init__(self, email_config, conexiones=None):
+        self.email_config = email_config
+        self.tamaño = max(1, conexiones or email_config.get("conexiones_smtp", CONEXIONES))
+        tasa = email_config.get("mensajes_por_segundo", MENSAJES_POR_SEGUNDO)
+        self.limitador = LimitadorTasa(tasa) if tasa else None
+        self.estadisticas = EstadisticasSMTP()
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+        self._ultimo_uso = {}
+
+    def _conectar(self):
+        import smtplib
+
+        config = self.email_config
+        servidor = smtplib.SMTP(config["servidor_smtp"], config["puerto_smtp"],
+                                timeout=config.get("timeout_smtp", 30))
+        if config.get("tls", True):
+            servidor.starttls()
+        if config.get("contraseña"):
+            servidor.login(config["remitente"], config["contraseña"])
+        with self._lock:
+            self.estadisticas.conexiones += 1
+        return servidor
+
+    def _tomar(self):
+        """Toma una sesión libre, o abre una nueva si el pool no está lleno."""
+        with self._lock:
+            if self.estadisticas.inicio is None:
+                self.estadisticas.inicio = time.perf_counter()
+            crear = self._libres.empty() and self._creadas < self.tamaño
+            if crear:
+                self._creadas += 1
+        if crear:
+            try:
+                return self._conectar()
+            except Exception:
+                with self._lock:
+                    self._creadas -= 1
+                raise
+
+        servidor = self._libres.get()
+        if servidor is not None and time.monotonic() - self._ultimo_uso.get(id(servidor), 0) > MAX_INACTIVIDAD:
+            try:
+                servidor.noop()
+            except OSError:  # incluye smtplib.SMTPException
+                self._cerrar_sesion(servidor)
+                servidor = None
+        return servidor
+
+    def _devolver(self, servidor):
+        if servidor is not None:
+            self._ultimo_uso[id(servidor)] = time.monotonic()
+        self._libres.put(servidor)
+
+    def enviar(self, mensaje, remitente, destinatarios):
+        """Envía un mensaje por una sesión del pool, reconectando si hace falta."""
+        return self.enviar_texto(mensaje.as_string(), remitente, destinatarios)
+
+    def enviar_texto(self, texto, remitente, destinatarios):
+        """Envía un mensaje ya serializado por una sesión del pool.
+
+        Devuelve los destinatarios rechazados por el servidor (como
+        smtplib.SMTP.sendmail); si los rechaza todos se lanza la excepción.
+        """
+        if self.limitador is not None:
+            self.limitador.esperar()
+        with metricas.medir("smtp"):
+            rechazados = self._enviar_por_sesion(texto, remitente, destinatarios)
+        metricas.contar("correos_enviados")
+        metricas.contar("destinatarios", len(destinatarios) - len(rechazados))
+        if rechazados:
+            metricas.contar("destinatarios_rechazados", len(rechazados))
+        return rechazados
+
+    def _enviar_por_sesion(self, texto, remitente, destinatarios):
+        servidor = self._tomar()
+        rechazados = {}
+        inicio = time.perf_counter()
+        try:
+            for intento in range(2):
+                if servidor is None:
+                    servidor = self._conectar()
+                    with self._lock:
+                        self.estadisticas.reconexiones += 1
+                try:
+                    rechazados = servidor.sendmail(remitente, destinatarios, texto)
+                    break
+                except Exception as e:
+                    if not es_error_de_conexion(e):
+                        raise
+                    self._cerrar_sesion(servidor)
+                    servidor = None
+                    if intento:
+                        raise
+        except Exception:
+            with self._lock:
+                self.estadisticas.errores += 1
+            raise
+        finally:
+            with self._lock:
+                self.estadisticas.tiempo_envio += time.perf_counter() - inicio
+            self._devolver(servidor)
+
+        with self._lock:
+            self.estadisticas.mensajes += 1
+            self.estadisticas.destinatarios += len(destinatarios) - len(rechazados)
+            self.estadisticas.rechazados += len(rechazados)
+        return rechazados
+
+    def _cerrar_sesion(self, servidor):
+        try:
+            servidor.quit()
+        except Exception:
+            try:
+                servidor.close()
+            except Exception:
+                pass
+
+    def cerrar(self):
+        """Cierra todas las sesiones abiertas del pool."""
+        while True:
+            try:
+                servidor = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            if servidor is not None:
+                self._cerrar_sesion(servidor)
+        with self._lock:
+            self._creadas = 0
+
+
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+def obtener_pool(email_config):
+    """Devuelve el pool compartido para el servidor y remitente de email_config."""
+    clave = (email_config["servidor_smtp"], email_config["puerto_smtp"], email_config["remitente"])
+    with _lock_pools:
+        if clave not in _pools:
+            _pools[clave] = PoolSMTP(email_config)
+        return _pools[clave]
+
+
+def cerrar_pools():
+    """Cierra todos los pools y devuelve sus estadísticas por servidor."""
+    with _lock_pools:
+        pools = dict(_pools)
+        _pools.clear()
+    estadisticas = {}
+    for (servidor, puerto, remitente), pool in pools.items():
+        pool.cerrar()
+        estadisticas[f"{remitente}@{servidor}:{puerto}"] = pool.estadisticas.como_dict()
+    return estadisticas
@@ -0,0 +1,92 @@
+"""
+Utilidades de fechas compartidas por todos los boxes.
+
+Incluye el análisis de las cabeceras en castellano de los WODs ("WOD lunes
+13 de octubre [de 2025]"): el patrón se compila una sola vez y las fechas ya
+resueltas se memorizan, porque un timeline repite las mismas cabeceras en
+cada consulta. Las cabeceras sin año toman el año que deja la fecha más
+cerca de una referencia, así que las semanas entre diciembre y enero y los
+históricos de varios años se fechan bien.
+"""
+
+import functools
+import re
+from datetime import date, datetime, timedelta
+
+# Cabecera de un WOD: "WOD [día] <n> de <mes> [de <año>]"
+PATRON_CABECERA = re.compile(r'wod\s+(?:(\w+)\s+)?(\d+)\s+de\s+(\w+)(?:\s+de\s+(\d{4}))?', re.IGNORECASE)
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4,
+    'mayo': 5, 'junio': 6, 'julio': 7, 'agosto': 8,
+    'septiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
+}
+
+# Fechas de cabecera resueltas que se memorizan
+MAX_FECHAS_MEMORIZADAS = 4096
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+ORDEN_DIAS = {
+    'Lunes': 1,
+    'Martes': 2,
+    'Miércoles': 3, 'Miercoles': 3,
+    'Jueves': 4,
+    'Viernes': 5
+}
+
+
+def obtener_rango_semana_actual():
+    """Obtiene el rango de la semana actual (lunes a viernes)."""
+    hoy = datetime.now()
+    dias_hasta_lunes = hoy.weekday()
+    lunes = hoy - timedelta(days=dias_hasta_lunes)
+    viernes = lunes + timedelta(days=4)
+    return lunes, viernes
+
+
+def ventana(lunes=None, viernes=None):
+    """Devuelve (lunes, viernes) como date; por defecto, los de la semana actual."""
+    if lunes is None or viernes is None:
+        lunes, viernes = obtener_rango_semana_actual()
+    return (lunes.date() if isinstance(lunes, datetime) else lunes,
+            viernes.date() if isinstance(viernes, datetime) else viernes)
+
+
+@functools.lru_cache(maxsize=MAX_FECHAS_MEMORIZADAS)
+def _resolver_fecha(dia, mes, año, referencia):
+    try:
+        dia = int(dia)
+        mes_num = MESES.get(mes.lower(), 0)
+        if año:
+            return date(int(año), mes_num, dia)
+    except (ValueError, AttributeError):
+        return None
+    if mes_num == 0:
+        return None
+    candidatas = []
+    for año in (referencia.year - 1, referencia.year, referencia.year + 1):
+        try:
+            candidatas.append(date(año, mes_num, dia))
+        except ValueError:
+            pass
+    return min(candidatas, key=lambda fecha: abs(fecha - referencia), default=None)
+
+
+def resolver_fecha(dia, mes, año=None, referencia=None):
+    """Devuelve la fecha de "<dia> de <mes> [de <año>]", o None si no es válida.
+
+    Sin año se usa el que deja la fecha más cerca de referencia (por
+    defecto, hoy): en un timeline, la fecha de la nota anterior.
+    """
+    return _resolver_fecha(dia, mes, año or None, referencia or date.today())
+
+
+def fecha_de_cabecera(match, referencia=None):
+    """Fecha de una coincidencia de PATRON_CABECERA (ver resolver_fecha)."""
+    return resolver_fecha(match.group(2), match.group(3), match.group(4), referencia)
+
+
+def valor_ordenamiento(dia_semana):
+    """Asigna un valor numérico a cada día para ordenamiento."""
+    return ORDEN_DIAS.get(dia_semana, 9)
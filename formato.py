@@ -0,0 +1,500 @@
+"""
+Limpieza y formato del contenido de los WODs, común a todos los boxes.
+"""
+
+import hashlib
+import json
+import re
+from html.entities import html5
+
+import metricas
+
+# Lista de palabras que siempre deben aparecer en mayúsculas
+PALABRAS_MAYUSCULAS = [
+    "wod", "amrap", "emom", "rx", "tabata", "du", "ygig",
+    "c2b", "t2b", "sc", "kbsr",
+]
+
+# Lista de palabras que identifican un tipo de entrenamiento
+TIPOS_ENTRENAMIENTO = [
+    "amrap", "emom", "tabata", "for time", "etabata"
+]
+
+# Lista de tipos de entrenamiento exactos
+TIPOS_EXACTOS = [
+    "amrap", "emom", "tabata", "etabata", "for time",
+    "buy in", "cash out", "strength", "skill", "metcon",
+    "wod", "warm up", "core", "accessory"
+]
+
+# Lista de frases que indican tipo de entrenamiento
+FRASES_TIPO = [
+    "for time", "every", "rounds", "reps", "minutes",
+    "complete", "perform", "work", "rest"
+]
+
+# Palabras formateadas que recuerda cada conjunto de reglas
+MAX_PALABRAS_MEMORIZADAS = 20000
+
+
+# Etiquetas que limpiar_html sustituye literalmente antes de extraer el texto
+SUSTITUCIONES_HTML = {
+    "<br>": "\n", "<br />": "\n", "<br/>": "\n",
+    "<p>": "", "</p>": "\n",
+    "<h1>": "", "</h1>": "\n",
+    "<h2>": "", "</h2>": "\n",
+    "<h3>": "", "</h3>": "\n",
+    "<ul>": "", "</ul>": "",
+    "<ol>": "", "</ol>": "",
+    "<li>": "• ", "</li>": "\n",
+}
+
+# Motor por defecto para extraer el texto del HTML: "rapido" (una sola pasada,
+# sin construir el árbol) o "bs4" (BeautifulSoup, implementación de referencia)
+MOTOR_HTML = "rapido"
+
+# Etiqueta de apertura, con la misma gramática tolerante que html.parser (las
+# comillas solo delimitan valores de atributos)
+_ETIQUETA_APERTURA = r"""<[a-zA-Z][^\t\n\r\f />\x00]*
+    (?:[\s/]*
+      (?:(?<=['"\s/])[^\s/>][^\s/=>]*
+        (?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?
+        (?:\s|/(?!>))*
+      )*
+    )?
+    \s*/?>"""
+
+# Una sola expresión que reconoce, en orden de prioridad, las etiquetas que se
+# sustituyen, los comentarios, el resto de etiquetas, las entidades y
+# cualquier construcción que el motor rápido no sabe tratar igual que
+# html.parser (en ese caso se usa BeautifulSoup)
+_TOKEN_HTML = re.compile(
+    "(?P<sustitucion>" + "|".join(re.escape(e) for e in SUSTITUCIONES_HTML) + ")"
+    r"|(?P<comentario><!--.*?--\s*>)"
+    r"|(?P<etiqueta>" + _ETIQUETA_APERTURA + r"|</[a-zA-Z][^>]*>)"
+    r"|(?P<entidad>&(?:\#[0-9]{1,7}|\#[xX][0-9a-fA-F]{1,6}|[a-zA-Z][a-zA-Z0-9]*);)"
+    r"|(?P<otro><[!?/a-zA-Z]|&[a-zA-Z#])",
+    re.DOTALL | re.VERBOSE
+)
+
+# Etiquetas cuyo contenido html.parser no trata como texto normal
+_CONTENIDO_ESPECIAL = re.compile(r"<(?:script|style|pre|textarea|listing|plaintext|xmp|title)\b", re.IGNORECASE)
+
+# Espacios que BeautifulSoup considera al colapsar cadenas vacías
+_ESPACIOS_ASCII = " \n\t\x0c\r"
+
+_MARCADORES_LINEA = re.compile(r'^[•·-]|\d+[\.\)]|\s*[-–—]\s*')
+_SALTOS_MULTIPLES = re.compile(r'\n{3,}')
+_ESPACIOS_MULTIPLES = re.compile(r' +')
+
+
+def _cerrar_cadena(cadena):
+    """Colapsa una cadena de solo espacios como lo hace BeautifulSoup."""
+    if cadena.strip(_ESPACIOS_ASCII):
+        return cadena
+    return "\n" if "\n" in cadena else " "
+
+
+def _decodificar_entidad(entidad):
+    """Convierte una referencia de carácter, o devuelve None si no es de las habituales."""
+    if entidad[1] == "#":
+        if entidad[2] in "xX":
+            numero = int(entidad[3:-1], 16)
+        else:
+            numero = int(entidad[2:-1])
+        if 32 <= numero < 127 or 160 <= numero < 0xD800 or 0xE000 <= numero < 0xFFFE:
+            return chr(numero)
+        return None
+    return html5.get(entidad[1:])
+
+
+def _html_a_texto_rapido(texto):
+    """Extrae el texto del HTML en una sola pasada, sin construir el árbol.
+
+    Produce lo mismo que sustituir SUSTITUCIONES_HTML y llamar a
+    BeautifulSoup(texto, "html.parser").get_text(separator=" "): el texto
+    entre etiquetas forma cadenas que se unen con un espacio. Devuelve None
+    si encuentra algo que no sabe tratar igual (declaraciones, scripts,
+    entidades poco habituales, etiquetas sin cerrar...).
+    """
+    if _CONTENIDO_ESPECIAL.search(texto):
+        return None
+
+    cadenas = []
+    actual = []
+    posicion = 0
+    # Último carácter del texto tal como lo vería html.parser tras las
+    # sustituciones (para detectar "<" o "&" que se unirían con lo siguiente)
+    ultimo = ""
+    for match in _TOKEN_HTML.finditer(texto):
+        inicio = match.start()
+        if inicio > posicion:
+            actual.append(texto[posicion:inicio])
+            ultimo = texto[inicio - 1]
+        posicion = match.end()
+
+        tipo = match.lastgroup
+        if tipo == "sustitucion":
+            sustituto = SUSTITUCIONES_HTML[match.group()]
+            if not sustituto and ultimo in ("<", "&"):
+                return None
+            actual.append(sustituto)
+            ultimo = sustituto[-1:] or ultimo
+        elif tipo == "entidad":
+            caracter = _decodificar_entidad(match.group())
+            if caracter is None:
+                return None
+            actual.append(caracter)
+            ultimo = ";"
+        elif tipo == "otro" or "<" in texto[inicio + 1:posicion]:
+            # Construcción desconocida, o etiqueta mal formada que contiene
+            # otra (las sustituciones podrían cambiarla antes de analizarla)
+            return None
+        else:
+            # Etiqueta o comentario: termina la cadena actual
+            cadena = "".join(actual)
+            if cadena:
+                cadenas.append(_cerrar_cadena(cadena))
+            actual = []
+            ultimo = ">"
+
+    actual.append(texto[posicion:])
+    cadena = "".join(actual)
+    if cadena:
+        cadenas.append(_cerrar_cadena(cadena))
+    return " ".join(cadenas)
+
+
+def _html_a_texto_bs4(texto):
+    """Extrae el texto del HTML con BeautifulSoup (implementación de referencia)."""
+    from bs4 import BeautifulSoup
+
+    for etiqueta, sustituto in SUSTITUCIONES_HTML.items():
+        texto = texto.replace(etiqueta, sustituto)
+
+    soup = BeautifulSoup(texto, "html.parser")
+    return soup.get_text(separator=" ")
+
+
+def html_a_texto(texto, motor=None):
+    """Convierte el HTML de un WOD en texto con el motor indicado (por defecto MOTOR_HTML)."""
+    if (motor or MOTOR_HTML) == "rapido":
+        resultado = _html_a_texto_rapido(texto)
+        if resultado is not None:
+            return resultado
+    return _html_a_texto_bs4(texto)
+
+
+@metricas.medido("limpiar_html")
+def limpiar_html(texto, quitar_marcadores=False, motor=None):
+    """Limpia el texto HTML preservando la estructura.
+
+    Con quitar_marcadores se eliminan además viñetas, numeraciones y guiones
+    de cada línea (formato que usa CrossfitDB).
+    """
+    if not texto:
+        return ""
+
+    texto_limpio = html_a_texto(texto, motor)
+
+    if quitar_marcadores:
+        lineas = []
+        for linea in texto_limpio.split('\n'):
+            linea = linea.strip()
+            if linea:
+                linea = _MARCADORES_LINEA.sub('', linea).strip()
+                if linea:
+                    lineas.append(linea)
+        texto_limpio = '\n'.join(lineas)
+    else:
+        texto_limpio = _SALTOS_MULTIPLES.sub('\n\n', texto_limpio)
+
+    texto_limpio = _ESPACIOS_MULTIPLES.sub(' ', texto_limpio)
+
+    return texto_limpio.strip()
+
+
+class ReglasFormato:
+    """Reglas de formato compiladas: mayúsculas y detección de tipos de entrenamiento.
+
+    Las listas se convierten una sola vez en conjuntos y en una expresión
+    regular con todas las frases, de modo que el coste por palabra o por
+    línea no depende del número de reglas. Cualquier lista que no se indique
+    toma el valor de la constante del módulo.
+    """
+
+    def __init__(self, palabras_mayusculas=None, tipos_entrenamiento=None,
+                 tipos_exactos=None, frases_tipo=None):
+        self.palabras_mayusculas = list(PALABRAS_MAYUSCULAS if palabras_mayusculas is None else palabras_mayusculas)
+        self.tipos_entrenamiento = list(TIPOS_ENTRENAMIENTO if tipos_entrenamiento is None else tipos_entrenamiento)
+        self.tipos_exactos = list(TIPOS_EXACTOS if tipos_exactos is None else tipos_exactos)
+        self.frases_tipo = list(FRASES_TIPO if frases_tipo is None else frases_tipo)
+
+        self._mayusculas = frozenset(p.lower() for p in self.palabras_mayusculas)
+        self._exactos = frozenset(t.lower() for t in self.tipos_exactos)
+        self._frases = _alternativas(f.lower() for f in self.frases_tipo)
+        self._tipos = _alternativas(t.upper() for t in self.tipos_entrenamiento)
+        # El vocabulario de los WODs es pequeño: se recuerda cada palabra ya formateada
+        self._palabras = {}
+
+        # Identifica estas reglas (p. ej. para invalidar resultados formateados con otras)
+        self.huella = hashlib.sha256(json.dumps(
+            [self.palabras_mayusculas, self.tipos_entrenamiento, self.tipos_exactos, self.frases_tipo],
+            ensure_ascii=False
+        ).encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def desde_dict(cls, opciones):
+        """Crea las reglas a partir de un diccionario con las mismas claves que __init__."""
+        opciones = dict(opciones or {})
+        desconocidas = set(opciones) - {"palabras_mayusculas", "tipos_entrenamiento", "tipos_exactos", "frases_tipo"}
+        if desconocidas:
+            raise ValueError(f"Reglas de formato desconocidas: {', '.join(sorted(desconocidas))}")
+        return cls(**opciones)
+
+    def formatear_palabra(self, palabra):
+        """Pone en mayúsculas siglas y palabras de 3 letras, y capitaliza el resto."""
+        formateada = self._palabras.get(palabra)
+        if formateada is None:
+            formateada = self._formatear_palabra(palabra)
+            if len(self._palabras) < MAX_PALABRAS_MEMORIZADAS:
+                self._palabras[palabra] = formateada
+        return formateada
+
+    def _formatear_palabra(self, palabra):
+        solo_letras_min = _NO_LETRAS.sub('', palabra.lower())
+
+        if solo_letras_min in self._mayusculas or len(solo_letras_min) == 3:
+            return palabra.upper()
+        if solo_letras_min:
+            match = _LETRA.search(palabra)
+            if match:
+                pos = match.start()
+                return palabra[:pos] + palabra[pos].upper() + palabra[pos+1:].lower()
+        return palabra
+
+    def es_tipo_entrenamiento(self, linea):
+        """Determina si una línea indica un tipo de entrenamiento (tipos exactos y frases)."""
+        linea_lower = linea.lower()
+        if linea_lower in self._exactos:
+            return True
+        return (self._frases is not None and len(linea.split()) <= 5
+                and self._frases.search(linea_lower) is not None)
+
+    def contiene_tipo_entrenamiento(self, linea):
+        """Determina si una línea empieza por (o es una línea corta con) uno de los tipos de entrenamiento."""
+        if self._tipos is None:
+            return False
+        linea_upper = linea.upper()
+        if self._tipos.match(linea_upper):
+            return True
+        return len(linea.split()) <= 5 and self._tipos.search(linea_upper) is not None
+
+    def tipos_de_texto(self, texto):
+        """Tipos de entrenamiento (en minúsculas) de las líneas de un texto.
+
+        Una línea cuenta con el mismo criterio que contiene_tipo_entrenamiento,
+        pero el texto se recorre entero de una vez en lugar de línea a línea.
+        """
+        tipos = set()
+        if self._tipos is None:
+            return tipos
+        texto_upper = texto.upper()
+        for match in self._tipos.finditer(texto_upper):
+            inicio = texto_upper.rfind("\n", 0, match.start()) + 1
+            fin = texto_upper.find("\n", match.end())
+            linea = texto_upper[inicio:fin if fin >= 0 else len(texto_upper)].strip()
+            if linea.startswith(match.group()) or len(linea.split()) <= 5:
+                tipos.add(match.group().lower())
+        return tipos
+
+
+def _alternativas(frases):
+    """Compila una expresión que encuentra cualquiera de las frases, o None si no hay ninguna."""
+    frases = sorted(set(frases), key=len, reverse=True)
+    if not frases:
+        return None
+    return re.compile("|".join(re.escape(f) for f in frases))
+
+
+_NO_LETRAS = re.compile(r'[^a-zA-ZáéíóúÁÉÍÓÚüÜñÑ]')
+_LETRA = re.compile(r'[a-zA-ZáéíóúÁÉÍÓÚüÜñÑ]')
+_CABECERA_WOD = re.compile(r'^wod\s+')
+_SECCION = re.compile(r'^([a-zA-Z])[)\.]\s*(.*)$')
+_NUMERACION = re.compile(r'^\d+[\.\)]')
+_NUMERACION_INICIAL = re.compile(r'^\d+[\.\)]\s*')
+
+# Reglas por defecto, compiladas a partir de las listas del módulo
+REGLAS = ReglasFormato()
+
+
+def es_tipo_entrenamiento(linea, reglas=None):
+    """Determina si una línea indica un tipo de entrenamiento (tipos exactos y frases)."""
+    return (reglas or REGLAS).es_tipo_entrenamiento(linea)
+
+
+def contiene_tipo_entrenamiento(linea, reglas=None):
+    """Determina si una línea empieza por (o es una línea corta con) un tipo de TIPOS_ENTRENAMIENTO."""
+    return (reglas or REGLAS).contiene_tipo_entrenamiento(linea)
+
+
+# Árbol de un WOD
+#
+# analizar_wod() recorre el texto una sola vez y devuelve una lista de nodos
+# (listas, para que se puedan guardar en JSON junto al WOD). Cada nodo lleva
+# la línea tal como aparece en el texto formateado y lo que muestra el correo:
+#
+#   ["seccion", linea, letra, titulo, hijos]  "A) ..." (hasta la siguiente sección)
+#   ["tipo", linea, texto, hijos]             tipo de entrenamiento y sus detalles
+#   ["item", linea, texto]                    elemento de lista, sin viñeta
+#   ["parrafo", linea, texto]                 cualquier otra línea
+#   ["vacia", linea]                          línea en blanco
+#
+# texto_de_arbol() y html_de_arbol() generan a partir del árbol el texto
+# que se guarda y el HTML del correo, sin volver a analizar el contenido.
+
+_VINETA_INICIAL = re.compile(r'^(\s*)(•|-|\d+[\.\)])\s*')
+
+
+def _formatear_linea(linea, limpia, formatear_palabra, seccion_actual):
+    """Formatea una línea que no es de sección; devuelve (línea, es_lista)."""
+    es_lista = True
+    if limpia.startswith("•"):
+        linea = "  " + linea
+    elif limpia.startswith("-"):
+        linea = "  • " + linea[1:].strip()
+    elif _NUMERACION.match(limpia):
+        linea = "  • " + _NUMERACION_INICIAL.sub("", limpia)
+    else:
+        es_lista = False
+
+    linea_formateada = ' '.join([formatear_palabra(palabra) for palabra in linea.split()])
+
+    if seccion_actual and not es_lista and not linea_formateada.startswith(seccion_actual):
+        linea_formateada = "    " + linea_formateada
+    return linea_formateada
+
+
+def analizar_wod(texto, detectar_tipo=contiene_tipo_entrenamiento, reglas=None, formatear=True):
+    """Analiza el texto limpio de un WOD y devuelve su árbol.
+
+    Con formatear las líneas se formatean como en aplicar_formato (se quita
+    la cabecera "WOD ...", mayúsculas, viñetas y sangrías); sin él se
+    conservan tal cual. detectar_tipo decide qué líneas son un tipo de
+    entrenamiento; cada box puede usar su propio criterio.
+    """
+    formatear_palabra = (reglas or REGLAS).formatear_palabra
+    lineas = texto.split("\n")
+    if formatear and lineas and _CABECERA_WOD.search(lineas[0].lower()):
+        lineas = lineas[1:]
+
+    arbol = []
+    seccion = None
+    tipo = None
+    letra_actual = None
+
+    for linea in lineas:
+        limpia = linea.strip()
+        if formatear:
+            if not limpia:
+                linea = ""
+            else:
+                match_seccion = _SECCION.match(limpia)
+                if match_seccion:
+                    letra, resto = match_seccion.groups()
+                    letra_actual = letra.upper()
+                    linea = f"{letra_actual}) {resto.strip().upper()}"
+                else:
+                    linea = _formatear_linea(linea, limpia, formatear_palabra, letra_actual)
+            limpia = linea.strip()
+
+        if not limpia:
+            nodo = ["vacia", linea]
+        else:
+            match_seccion = _SECCION.match(limpia)
+            if match_seccion:
+                letra, resto = match_seccion.groups()
+                seccion = ["seccion", linea, letra.upper(), resto, []]
+                tipo = None
+                arbol.append(seccion)
+                continue
+            if detectar_tipo(limpia):
+                nodo = ["tipo", linea, limpia, []]
+            elif (limpia.startswith("• ") or limpia.startswith("-")
+                  or _NUMERACION.match(limpia)):
+                nodo = ["item", linea, _VINETA_INICIAL.sub('', limpia)]
+            else:
+                nodo = ["parrafo", linea, limpia]
+
+        if tipo is not None:
+            tipo[3].append(nodo)
+        elif seccion is not None:
+            seccion[4].append(nodo)
+        else:
+            arbol.append(nodo)
+        if nodo[0] == "tipo":
+            tipo = nodo
+
+    return arbol
+
+
+def _lineas_de_nodos(nodos, lineas):
+    for nodo in nodos:
+        lineas.append(nodo[1])
+        if nodo[0] in ("seccion", "tipo"):
+            _lineas_de_nodos(nodo[-1], lineas)
+
+
+def texto_de_arbol(arbol):
+    """Devuelve el texto de un WOD a partir de su árbol."""
+    lineas = []
+    _lineas_de_nodos(arbol, lineas)
+    return _SALTOS_MULTIPLES.sub('\n\n', '\n'.join(lineas))
+
+
+def _html_de_nodos(nodos, en_tipo, en_lista, html_resultado):
+    """Añade el HTML de los nodos y devuelve si queda una lista abierta."""
+    for nodo in nodos:
+        clase = nodo[0]
+        if clase == "vacia" or clase == "seccion":
+            if en_lista:
+                html_resultado.append("</ul>")
+                en_lista = False
+            if clase == "seccion":
+                html_resultado.append(f'<div class="section-header">{nodo[2]}) {nodo[3]}</div>')
+                en_lista = _html_de_nodos(nodo[4], False, en_lista, html_resultado)
+        elif clase == "tipo":
+            html_resultado.append(f'<div class="workout-type">{nodo[2]}</div>')
+            en_lista = _html_de_nodos(nodo[3], True, en_lista, html_resultado)
+        elif clase == "item":
+            if not en_lista:
+                html_resultado.append('<ul class="wod-list">')
+                en_lista = True
+            html_resultado.append(f'<li>{nodo[2]}</li>')
+        elif en_tipo:
+            html_resultado.append(f'<div class="workout-details">{nodo[2]}</div>')
+        else:
+            html_resultado.append(f'<p class="wod-paragraph">{nodo[2]}</p>')
+    return en_lista
+
+
+def html_de_arbol(arbol):
+    """Devuelve el HTML del correo de un WOD a partir de su árbol."""
+    html_resultado = []
+    if _html_de_nodos(arbol, False, False, html_resultado):
+        html_resultado.append("</ul>")
+    return "\n".join(html_resultado)
+
+
+def aplicar_formato(texto, dia_semana="", fecha_formateada="", reglas=None):
+    """Aplica formato al texto del WOD."""
+    return texto_de_arbol(analizar_wod(texto, reglas=reglas))
+
+
+def formatear_wod_para_correo(contenido, detectar_tipo=contiene_tipo_entrenamiento):
+    """Formatea el contenido del WOD para correo HTML.
+
+    detectar_tipo decide qué líneas son un tipo de entrenamiento; cada box
+    puede usar su propio criterio.
+    """
+    return html_de_arbol(analizar_wod(contenido, detectar_tipo, formatear=False))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Importa el histórico de WODs de los boxes en el almacén local.
+
+    python historico.py --desde 2024-01-01 [--hasta 2024-12-31] [boxes...]
+
+Cada box divide el rango en tramos a la medida de su API (Proveedor.tramos:
+cuatro semanas por petición en CrossfitDB) y los tramos de todos los boxes
+se descargan en paralelo con un número acotado de hilos. El timeline de N8
+no se puede pedir por fechas: se lee en un solo tramo y solo trae las notas
+que devuelve la API en una petición, las más recientes, así que de N8 solo
+se importa la parte del rango que sigue en el timeline. Los WODs de cada
+tramo se guardan en el almacén en cuanto llegan y el tramo se apunta en un
+archivo de progreso por box, así que si la importación se interrumpe o
+falla algún tramo, al repetir el comando solo se descargan los que faltan
+(el de N8 no se apunta: se vuelve a leer cada vez, por si el timeline
+llega más atrás). No se envía ningún correo.
+
+Por defecto el rango termina el domingo anterior a la semana actual, para
+que la ejecución semanal siga detectando (y enviando) los WODs de la semana.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import cliente_http
+import proveedores
+from almacen import AlmacenWODs, obtener_almacen
+from configuracion import ConfiguracionError
+from sync_wods import imprimir_estadisticas_http, seleccionar_boxes
+
+# Número máximo de tramos descargados a la vez
+WORKERS = 4
+
+# Directorio con el progreso de la importación de cada box
+PROGRESO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "historico")
+
+
+class Progreso:
+    """Tramos ya importados de un box, guardados en disco tras cada uno."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                self.tramos = set(json.load(f)["tramos"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.tramos = set()
+
+    @staticmethod
+    def clave(inicio, fin):
+        return f"{inicio.isoformat()}:{fin.isoformat()}"
+
+    def hecho(self, inicio, fin):
+        return self.clave(inicio, fin) in self.tramos
+
+    def marcar(self, inicio, fin):
+        """Apunta un tramo como importado y guarda el progreso."""
+        self.tramos.add(self.clave(inicio, fin))
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"tramos": sorted(self.tramos)}, f, indent=1)
+        os.replace(temporal, self.ruta)
+
+    def borrar(self):
+        self.tramos = set()
+        try:
+            os.remove(self.ruta)
+        except FileNotFoundError:
+            pass
+
+
+def domingo_anterior(hoy=None):
+    """Último día de la semana anterior a la actual."""
+    hoy = hoy or date.today()
+    return hoy - timedelta(days=hoy.weekday() + 1)
+
+
+def importar_tramo(box, inicio, fin, almacen):
+    """Descarga un tramo de un box y guarda sus WODs; devuelve cuántos había."""
+    wods = box.obtener_rango(inicio, fin)
+    almacen.guardar(box.nombre, wods)
+    return len(wods)
+
+
+def importar(boxes, desde, hasta, almacen, workers=WORKERS, directorio=PROGRESO, reiniciar=False):
+    """Importa los tramos pendientes de los boxes entre desde y hasta.
+
+    Devuelve (tramos importados, WODs guardados, tramos con error).
+    """
+    pendientes = []
+    for box in boxes:
+        progreso = Progreso(os.path.join(directorio, f"{box.nombre}.json"))
+        if reiniciar:
+            progreso.borrar()
+        tramos = box.tramos(desde, hasta)
+        faltan = [(inicio, fin) for inicio, fin in tramos if not progreso.hecho(inicio, fin)]
+        print(f"📦 {box.nombre}: {len(tramos)} tramos, {len(tramos) - len(faltan)} ya importados")
+        pendientes.extend((box, progreso, inicio, fin) for inicio, fin in faltan)
+
+    importados = total_wods = errores = 0
+    if not pendientes:
+        return importados, total_wods, errores
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="historico") as pool:
+        futuros = {pool.submit(importar_tramo, box, inicio, fin, almacen): (box, progreso, inicio, fin)
+                   for box, progreso, inicio, fin in pendientes}
+        try:
+            for futuro in as_completed(futuros):
+                box, progreso, inicio, fin = futuros[futuro]
+                rango = f"{inicio.strftime('%d/%m/%Y')} - {fin.strftime('%d/%m/%Y')}"
+                try:
+                    cantidad = futuro.result()
+                except Exception as e:
+                    print(f"❌ {box.nombre} {rango}: {e}")
+                    errores += 1
+                    continue
+                if box.tramos_completos:
+                    progreso.marcar(inicio, fin)
+                importados += 1
+                total_wods += cantidad
+                print(f"✅ {box.nombre} {rango}: {cantidad} WODs "
+                      f"({importados + errores}/{len(pendientes)})")
+        except KeyboardInterrupt:
+            print("🛑 Interrumpido: repite el comando para importar los tramos que faltan")
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    return importados, total_wods, errores
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Importa el histórico de WODs en el almacén local")
+    parser.add_argument("boxes", nargs="*",
+                        help="Boxes a importar, por nombre o proveedor (por defecto: todos)")
+    parser.add_argument("--desde", type=date.fromisoformat, required=True,
+                        help="Primer día del rango (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None,
+                        help="Último día del rango (por defecto: el domingo pasado)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Número máximo de tramos descargados a la vez")
+    parser.add_argument("--almacen", default=None,
+                        help="Base de datos en la que guardar (por defecto: la de ALMACEN)")
+    parser.add_argument("--reiniciar", action="store_true",
+                        help="Olvidar el progreso guardado y descargar todos los tramos")
+    args = parser.parse_args(argv)
+
+    hasta = args.hasta or domingo_anterior()
+    if args.desde > hasta:
+        print(f"❌ ERROR: el rango empieza después de terminar ({args.desde} > {hasta})")
+        return False
+
+    try:
+        boxes = seleccionar_boxes(proveedores.crear_boxes(), args.boxes)
+        almacen = AlmacenWODs(args.almacen) if args.almacen else obtener_almacen()
+    except ConfiguracionError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    if almacen is None:
+        print("❌ ERROR: el histórico se guarda en el almacén; activa ALMACEN o indica --almacen")
+        return False
+
+    print(f"🔄 Importando WODs del {args.desde.strftime('%d/%m/%Y')} al {hasta.strftime('%d/%m/%Y')}...")
+    inicio = time.perf_counter()
+    try:
+        importados, total_wods, errores = importar(boxes, args.desde, hasta, almacen,
+                                                   args.workers, reiniciar=args.reiniciar)
+    except KeyboardInterrupt:
+        return False
+    finally:
+        almacen.cerrar()
+    duracion = time.perf_counter() - inicio
+
+    print("-" * 50)
+    print(f"📊 {importados} tramos importados, {total_wods} WODs guardados, {errores} tramos con error")
+    print(f"⏱️ Tiempo total: {duracion:.2f}s")
+    imprimir_estadisticas_http(cliente_http.estadisticas())
+    if errores:
+        print("⚠️ Repite el comando para reintentar los tramos con error")
+    return not errores
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,368 @@
+"""
+Métricas de las ejecuciones: tiempo de cada etapa por box y contadores.
+
+Cada etapa del pipeline (descarga HTTP, decodificación del JSON,
+limpiar_html, aplicar_formato, formatear_wod_para_correo, construcción del
+mensaje y envío SMTP) se mide con medir() o con el decorador medido() y se
+acumula en un histograma por etapa y box; los contadores (WODs encontrados,
+bytes descargados, correos enviados, errores...) se suman con contar(). El
+box de cada medida es el de la ejecución en curso en el hilo (ver en_box).
+
+Al terminar, exportar() escribe las métricas en formato de texto de
+Prometheus (para el textfile collector de node_exporter) y un informe JSON
+de la ejecución, según METRICAS de config.py:
+
+    METRICAS = {"prometheus": "/var/lib/node_exporter/textfile_collector/wods.prom",
+                "json": "metricas.json"}
+
+Si las métricas no se han iniciado, medir() y contar() no hacen nada y las
+funciones medidas solo pagan una comprobación.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+# Límites superiores (segundos) de las cubetas de los histogramas de etapas
+CUBETAS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Etapas del pipeline, en orden (los informes las muestran así; "total" es
+# la ejecución completa de un box)
+ETAPAS = ("http", "json", "limpiar_html", "aplicar_formato", "formatear_wod_para_correo",
+          "plantilla", "smtp", "total")
+
+# Prefijo de los nombres de las métricas en Prometheus
+PREFIJO = "wods_"
+
+# Descripción de cada contador (las que no estén aquí se exportan sin HELP)
+CONTADORES = {
+    "encontrados": "WODs obtenidos de la semana",
+    "nuevos": "WODs nuevos o modificados respecto al almacén",
+    "http_peticiones": "Descargas de la API de los boxes",
+    "http_bytes": "Bytes de las respuestas de la API",
+    "correos_enviados": "Mensajes enviados por SMTP",
+    "correos_encolados": "Mensajes guardados en la bandeja de salida",
+    "correos_sin_entregar": "Mensajes de la ejecución que seguían en la bandeja de salida al terminar",
+    "correos_descartados": "Mensajes de la ejecución descartados tras agotar los intentos de envío",
+    "destinatarios": "Destinatarios aceptados por el servidor SMTP",
+    "destinatarios_rechazados": "Destinatarios rechazados por el servidor SMTP",
+    "plazos_agotados": "Descargas cortadas por el plazo del box o de la ejecución",
+    "descargas_omitidas": "Descargas no hechas por tener el disyuntor del box abierto",
+    "respaldos": "Ejecuciones que usaron los WODs guardados al no poder descargar",
+    "errores": "Errores en cada etapa",
+    "ejecuciones": "Ejecuciones de cada box por resultado",
+}
+
+_metricas = None
+_lock = threading.Lock()
+_box = contextvars.ContextVar("box", default="")
+
+
+class Histograma:
+    """Número, suma, máximo y distribución por cubetas de unas duraciones."""
+
+    __slots__ = ("cubetas", "cantidad", "suma", "maximo")
+
+    def __init__(self):
+        self.cubetas = [0] * (len(CUBETAS) + 1)  # la última es +Inf
+        self.cantidad = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(CUBETAS, valor)] += 1
+        self.cantidad += 1
+        self.suma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def sumar(self, otro):
+        for i, cantidad in enumerate(otro.cubetas):
+            self.cubetas[i] += cantidad
+        self.cantidad += otro.cantidad
+        self.suma += otro.suma
+        self.maximo = max(self.maximo, otro.maximo)
+
+    def como_dict(self):
+        return {
+            "cantidad": self.cantidad,
+            "segundos": round(self.suma, 6),
+            "media": round(self.suma / self.cantidad, 6) if self.cantidad else 0.0,
+            "max": round(self.maximo, 6),
+        }
+
+
+class Metricas:
+    """Histogramas de las etapas y contadores de una ejecución (o de un daemon)."""
+
+    def __init__(self, prometheus=None, json_informe=None):
+        self.prometheus = prometheus
+        self.json_informe = json_informe
+        self.inicio = time.time()
+        self._etapas = {}
+        self._contadores = {}
+        self._boxes = {}
+        self._lock = threading.Lock()
+
+    def observar(self, etapa, segundos, box=""):
+        clave = (etapa, box)
+        with self._lock:
+            histograma = self._etapas.get(clave)
+            if histograma is None:
+                histograma = self._etapas[clave] = Histograma()
+            histograma.observar(segundos)
+
+    def contar(self, nombre, cantidad=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def resultado_box(self, box, exito, duracion):
+        """Apunta el resultado y la duración total de la ejecución de un box."""
+        self.observar("total", duracion, box)
+        self.contar("ejecuciones", box=box, resultado="ok" if exito else "error")
+        with self._lock:
+            self._boxes[box] = {"exito": exito, "duracion": round(duracion, 6),
+                                "fin": datetime.now().isoformat(timespec="seconds")}
+
+    def informe(self):
+        """Diccionario serializable en JSON con las etapas y contadores, por box y en total."""
+        with self._lock:
+            etapas = dict(self._etapas)
+            contadores = dict(self._contadores)
+            resultados = dict(self._boxes)
+
+        boxes = {}
+        totales = {}
+        sin_box = {}
+        for (etapa, box), histograma in sorted(etapas.items(), key=_orden_etapa):
+            if box:
+                boxes.setdefault(box, {"etapas": {}, "contadores": {}})["etapas"][etapa] = histograma.como_dict()
+            else:
+                sin_box[etapa] = histograma.como_dict()
+            total = totales.setdefault(etapa, Histograma())
+            total.sumar(histograma)
+
+        contadores_totales = {}
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            etiquetas = dict(etiquetas)
+            box = etiquetas.pop("box", "")
+            detalle = nombre + "".join(f"[{v}]" for _, v in sorted(etiquetas.items()))
+            contadores_totales[detalle] = contadores_totales.get(detalle, 0) + valor
+            if box:
+                boxes.setdefault(box, {"etapas": {}, "contadores": {}})["contadores"][detalle] = valor
+
+        for box, resultado in resultados.items():
+            boxes.setdefault(box, {"etapas": {}, "contadores": {}}).update(resultado)
+
+        return {
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+            "duracion": round(time.time() - self.inicio, 3),
+            "etapas": {etapa: histograma.como_dict() for etapa, histograma in totales.items()},
+            "contadores": contadores_totales,
+            "boxes": dict(sorted(boxes.items())),
+            # Medidas fuera de la ejecución de un box (p. ej. los envíos de la bandeja de salida)
+            "sin_box": sin_box,
+        }
+
+    def texto_prometheus(self):
+        """Las métricas en el formato de texto de Prometheus."""
+        with self._lock:
+            etapas = sorted(self._etapas.items())
+            contadores = sorted(self._contadores.items())
+
+        lineas = [
+            f"# HELP {PREFIJO}etapa_segundos Duración de cada etapa del pipeline por box",
+            f"# TYPE {PREFIJO}etapa_segundos histogram",
+        ]
+        for (etapa, box), histograma in etapas:
+            etiquetas = _etiquetas(etapa=etapa, box=box)
+            acumulado = 0
+            for limite, cantidad in zip((*CUBETAS, "+Inf"), histograma.cubetas):
+                acumulado += cantidad
+                lineas.append(f'{PREFIJO}etapa_segundos_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+            lineas.append(f"{PREFIJO}etapa_segundos_sum{{{etiquetas}}} {histograma.suma:.6f}")
+            lineas.append(f"{PREFIJO}etapa_segundos_count{{{etiquetas}}} {histograma.cantidad}")
+
+        anterior = None
+        for (nombre, etiquetas), valor in contadores:
+            if nombre != anterior:
+                if nombre in CONTADORES:
+                    lineas.append(f"# HELP {PREFIJO}{nombre}_total {CONTADORES[nombre]}")
+                lineas.append(f"# TYPE {PREFIJO}{nombre}_total counter")
+                anterior = nombre
+            etiquetas = _etiquetas(**dict(etiquetas))
+            lineas.append(f"{PREFIJO}{nombre}_total{{{etiquetas}}} {valor}" if etiquetas
+                          else f"{PREFIJO}{nombre}_total {valor}")
+
+        lineas.append(f"# HELP {PREFIJO}ultima_ejecucion_timestamp_seconds Fin de la última exportación")
+        lineas.append(f"# TYPE {PREFIJO}ultima_ejecucion_timestamp_seconds gauge")
+        lineas.append(f"{PREFIJO}ultima_ejecucion_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self):
+        """Escribe el textfile de Prometheus y el informe JSON configurados; devuelve las rutas."""
+        rutas = []
+        if self.prometheus:
+            _escribir(self.prometheus, self.texto_prometheus())
+            rutas.append(self.prometheus)
+        if self.json_informe:
+            _escribir(self.json_informe, json.dumps(self.informe(), ensure_ascii=False, indent=2))
+            rutas.append(self.json_informe)
+        return rutas
+
+
+def _orden_etapa(elemento):
+    (etapa, box), _ = elemento
+    return (ETAPAS.index(etapa) if etapa in ETAPAS else len(ETAPAS), etapa, box)
+
+
+def _etiquetas(**etiquetas):
+    def escapar(valor):
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{nombre}="{escapar(valor)}"' for nombre, valor in etiquetas.items() if valor != "")
+
+
+def _escribir(ruta, texto):
+    """Escribe un archivo de forma atómica (el collector no debe leerlo a medias)."""
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(temporal, ruta)
+
+
+def iniciar(forzar=False):
+    """Empieza a medir según METRICAS de config.py y devuelve las métricas, o None.
+
+    Con forzar se mide aunque METRICAS no esté definido (p. ej. para mostrar
+    las etapas en la consola), sin exportar nada que no esté configurado.
+    """
+    global _metricas
+    import configuracion
+
+    opciones = configuracion.obtener("METRICAS", None)
+    if opciones is None and not forzar:
+        return None
+    opciones = opciones or {}
+    with _lock:
+        if _metricas is None:
+            _metricas = Metricas(opciones.get("prometheus"), opciones.get("json"))
+        return _metricas
+
+
+def obtener_metricas():
+    """Las métricas en curso, o None si no se han iniciado."""
+    return _metricas
+
+
+@contextlib.contextmanager
+def en_box(box):
+    """Atribuye al box indicado las medidas del hilo mientras dura el bloque."""
+    token = _box.set(box)
+    try:
+        yield
+    finally:
+        _box.reset(token)
+
+
+def box_actual():
+    return _box.get()
+
+
+class _Medida:
+    __slots__ = ("metricas", "etapa", "box", "inicio")
+
+    def __init__(self, metricas, etapa, box):
+        self.metricas = metricas
+        self.etapa = etapa
+        self.box = box
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        box = _box.get() if self.box is None else self.box
+        self.metricas.observar(self.etapa, time.perf_counter() - self.inicio, box)
+        if tipo is not None:
+            self.metricas.contar("errores", etapa=self.etapa, box=box)
+
+
+class _SinMedida:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        return None
+
+
+_SIN_MEDIDA = _SinMedida()
+
+
+def medir(etapa, box=None):
+    """Bloque cuya duración se suma a la etapa (y cuyas excepciones cuentan como errores)."""
+    metricas = _metricas
+    if metricas is None:
+        return _SIN_MEDIDA
+    return _Medida(metricas, etapa, box)
+
+
+def medido(etapa):
+    """Decorador que mide cada llamada a la función como la etapa indicada."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if _metricas is None:
+                return funcion(*args, **kwargs)
+            with _Medida(_metricas, etapa, None):
+                return funcion(*args, **kwargs)
+        return medida
+    return decorador
+
+
+def medir_iterador(etapa, iterable):
+    """Itera iterable sumando a la etapa solo el tiempo que tarda en dar cada elemento.
+
+    Sirve para las respuestas que se decodifican por partes: el trabajo que
+    hace quien recorre los elementos no cuenta como parte de la etapa.
+    """
+    metricas = _metricas
+    if metricas is None:
+        yield from iterable
+        return
+    box = _box.get()
+    iterador = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            inicio = time.perf_counter()
+            try:
+                elemento = next(iterador)
+            except StopIteration:
+                total += time.perf_counter() - inicio
+                return
+            except Exception:
+                metricas.contar("errores", etapa=etapa, box=box)
+                raise
+            total += time.perf_counter() - inicio
+            yield elemento
+    finally:
+        metricas.observar(etapa, total, box)
+
+
+def contar(nombre, cantidad=1, **etiquetas):
+    """Suma cantidad al contador (con el box en curso si no se indica otro)."""
+    metricas = _metricas
+    if metricas is None:
+        return
+    etiquetas.setdefault("box", _box.get())
+    metricas.contar(nombre, cantidad, **etiquetas)
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Perfil de una ejecución: tiempo de CPU por función y memoria por sitio.
+
+    python sync_wods.py --profile
+    python n8.py --profile
+    python perfilado.py ANTERIOR.json ACTUAL.json   # compara dos perfiles
+
+Durante la ejecución se mide la CPU con cProfile (también en los hilos que
+procesan los boxes) y las reservas de memoria con tracemalloc. Al terminar
+se guardan en .cache/perfiles/ el perfil completo (.prof, para pstats o
+snakeviz) y un informe (.json y .txt) con las funciones que más CPU gastan
+y la memoria reservada en el pico de la ejecución y al terminar, por línea
+y por la función del proyecto desde la que se reservó (así los árboles de
+BeautifulSoup cuentan en formato.py:limpiar_html), sin lo que reservan las
+importaciones. El informe se compara con el perfil anterior del mismo
+comando.
+
+Las funciones y los sitios se identifican por archivo y función (sin el
+número de línea, que cambia al editar el código), así que los informes de
+distintas ejecuciones o versiones se pueden comparar. tracemalloc hace más
+lentas las reservas de memoria: los tiempos solo son comparables entre
+ejecuciones con --profile.
+"""
+
+import argparse
+import contextlib
+import cProfile
+import functools
+import glob
+import json
+import os
+import platform
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from bisect import bisect_right
+from datetime import datetime
+
+# Directorio en el que se guardan los perfiles
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "perfiles")
+
+# Funciones y sitios de memoria que se guardan en el informe (los que más
+# gastan); la consola muestra solo los primeros MOSTRAR
+FUNCIONES = 40
+SITIOS = 25
+MOSTRAR = 10
+
+# Cada cuánto (segundos) se mira la memoria reservada para guardar el pico,
+# y cuánto tiene que haber crecido respecto al último pico guardado para
+# volver a tomar una instantánea (tomarla cuesta, hay que recorrer todas
+# las reservas)
+INTERVALO_MEMORIA = 0.01
+CRECIMIENTO_PICO = 1.1
+
+# Marcos de la pila que se guardan de cada reserva de memoria, para
+# atribuirla a la función del proyecto que la pidió y descartar las de las
+# importaciones
+MARCOS = 25
+
+# Cambio mínimo para que la comparación muestre una función o un sitio: en
+# proporción a lo que gastaba y a la CPU o la memoria de toda la ejecución
+CAMBIO_MINIMO = 0.1
+CAMBIO_TOTAL = 0.01
+
+_RAIZ = os.path.dirname(os.path.abspath(__file__))
+# La más larga primero: site-packages suele estar dentro de la biblioteca estándar
+_BIBLIOTECAS = sorted({os.path.realpath(sysconfig.get_path(nombre)) for nombre in ("stdlib", "purelib", "platlib")},
+                      key=len, reverse=True)
+
+# Reservas que no son del programa: las del propio perfilador y las de las
+# importaciones (en cualquier marco de la pila)
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>", all_frames=True),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>", all_frames=True),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def ruta_corta(ruta):
+    """Ruta de un módulo relativa al proyecto o a la biblioteca en la que está."""
+    if not os.path.isabs(ruta):
+        return ruta
+    real = os.path.realpath(ruta)
+    if real.startswith(_RAIZ + os.sep):
+        return os.path.relpath(real, _RAIZ)
+    for biblioteca in _BIBLIOTECAS:
+        if real.startswith(biblioteca + os.sep):
+            return os.path.relpath(real, biblioteca)
+    return real
+
+
+class Perfilador:
+    """Mide la CPU por función y la memoria por sitio entre iniciar() y detener()."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.inicio = None
+        self.duracion = 0.0
+        self.estadisticas = None
+        self.pico = 0
+        self.final = 0
+        self.instantanea_pico = None
+        self.instantanea_final = None
+        # Un cProfile por hilo: cProfile solo ve el hilo en el que se activa
+        self._perfiles = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._vigilante = None
+        self._reloj = 0.0
+
+    def iniciar(self):
+        self.inicio = datetime.now()
+        tracemalloc.start(MARCOS)
+        # El vigilante de la memoria se arranca antes de perfilar los hilos
+        # nuevos para que no aparezca en el perfil
+        self._vigilante = threading.Thread(target=self._vigilar_memoria, name="perfil-memoria", daemon=True)
+        self._vigilante.start()
+        threading.setprofile(self._perfilar_hilo)
+        self._reloj = time.perf_counter()
+        self._perfilar_hilo()
+
+    def _perfilar_hilo(self, *_):
+        # Con threading.setprofile se llama en la primera llamada de cada hilo
+        # nuevo; activar el cProfile del hilo sustituye a esta función
+        perfil = cProfile.Profile(time.thread_time)
+        with self._lock:
+            self._perfiles.append(perfil)
+        perfil.enable()
+
+    def _vigilar_memoria(self):
+        guardado = 0
+        while not self._parar.wait(INTERVALO_MEMORIA):
+            actual, _ = tracemalloc.get_traced_memory()
+            if actual > guardado * CRECIMIENTO_PICO:
+                instantanea = tracemalloc.take_snapshot()
+                with self._lock:
+                    self.instantanea_pico = instantanea
+                guardado = actual
+
+    def detener(self):
+        self.duracion = time.perf_counter() - self._reloj
+        threading.setprofile(None)
+        with self._lock:
+            perfiles, self._perfiles = self._perfiles, []
+        for perfil in perfiles:
+            perfil.disable()
+        self._parar.set()
+        self._vigilante.join()
+        self.final, self.pico = tracemalloc.get_traced_memory()
+        self.instantanea_final = tracemalloc.take_snapshot()
+        # Si no llegó a tomarse ninguna instantánea mayor, el pico es el final
+        if self.instantanea_pico is None or _total(self.instantanea_pico) < _total(self.instantanea_final):
+            self.instantanea_pico = self.instantanea_final
+        tracemalloc.stop()
+
+        self.estadisticas = pstats.Stats()
+        for perfil in perfiles:
+            perfil.create_stats()
+            if perfil.stats:
+                self.estadisticas.add(perfil)
+
+    def informe(self, funciones=FUNCIONES, sitios=SITIOS):
+        """Informe de la ejecución: funciones por CPU y sitios de memoria."""
+        todas = _funciones(self.estadisticas.stats)
+        cpu = sum(f["propio"] for f in todas.values())
+        por_propio = sorted(todas.values(), key=lambda f: -f["propio"])[:funciones]
+        por_acumulado = sorted(todas.values(), key=lambda f: -f["acumulado"])[:funciones]
+        seleccion = {f["funcion"]: f for f in por_propio + por_acumulado}
+        lineas = _lineas_de_funciones(self.estadisticas.stats)
+        pico = self.instantanea_pico.filter_traces(_FILTROS)
+        final = self.instantanea_final.filter_traces(_FILTROS)
+        return {
+            "nombre": self.nombre,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "duracion": round(self.duracion, 4),
+            "cpu": round(cpu, 4),
+            "funciones": sorted(seleccion.values(), key=lambda f: (-f["propio"], f["funcion"])),
+            "memoria": {
+                "pico": self.pico,
+                "final": self.final,
+                "origenes_pico": _origenes(pico, lineas, sitios),
+                "sitios_pico": _sitios(pico, lineas, sitios),
+                "sitios_final": _sitios(final, lineas, sitios),
+            },
+        }
+
+    def guardar(self, directorio=DIRECTORIO):
+        """Guarda el perfil y el informe; devuelve el informe y las rutas."""
+        os.makedirs(directorio, exist_ok=True)
+        base = os.path.join(directorio, f"{self.nombre}-{self.inicio.strftime('%Y%m%d-%H%M%S')}")
+        datos = self.informe()
+        self.estadisticas.dump_stats(f"{base}.prof")
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(texto(datos, FUNCIONES, SITIOS))
+        return datos, [f"{base}.json", f"{base}.txt", f"{base}.prof"]
+
+
+def _total(instantanea):
+    return sum(traza.size for traza in instantanea.traces)
+
+
+def _nombre_funcion(ruta, nombre):
+    # Las funciones de C (ruta "~") se llaman p. ej. "<method 'sub' of 're.Pattern' objects>"
+    return nombre if ruta == "~" else f"{ruta_corta(ruta)}:{nombre}"
+
+
+def _funciones(estadisticas):
+    """Suma las estadísticas de pstats por archivo y función (sin la línea)."""
+    funciones = {}
+    for (ruta, linea, nombre), (_, llamadas, propio, acumulado, _) in estadisticas.items():
+        clave = _nombre_funcion(ruta, nombre)
+        funcion = funciones.get(clave)
+        if funcion is None:
+            funciones[clave] = {"funcion": clave, "linea": linea, "llamadas": llamadas,
+                                "propio": propio, "acumulado": acumulado}
+        else:
+            funcion["llamadas"] += llamadas
+            funcion["propio"] += propio
+            funcion["acumulado"] += acumulado
+    for funcion in funciones.values():
+        funcion["propio"] = round(funcion["propio"], 6)
+        funcion["acumulado"] = round(funcion["acumulado"], 6)
+    return funciones
+
+
+def _lineas_de_funciones(estadisticas):
+    """Primera línea de cada función ejecutada, por archivo, para saber en qué función está una línea."""
+    funciones = {}
+    for ruta, linea, nombre in estadisticas:
+        if ruta != "~":
+            funciones.setdefault(ruta, []).append((linea, nombre))
+    lineas = {}
+    for ruta, lista in funciones.items():
+        lista.sort()
+        lineas[ruta] = ([linea for linea, _ in lista], [nombre for _, nombre in lista])
+    return lineas
+
+
+def _funcion_de_linea(lineas, ruta, linea):
+    # La función que empieza más cerca antes de la línea
+    inicios, nombres = lineas.get(ruta, ((), ()))
+    posicion = bisect_right(inicios, linea)
+    nombre = nombres[posicion - 1] if posicion else "<module>"
+    return f"{ruta_corta(ruta)}:{nombre}"
+
+
+def _en_proyecto(ruta):
+    return os.path.realpath(ruta).startswith(_RAIZ + os.sep)
+
+
+def _origenes(instantanea, lineas, limite):
+    """Memoria reservada por la función del proyecto más cercana en la pila de cada reserva."""
+    origenes = {}
+    en_proyecto = functools.lru_cache(maxsize=None)(_en_proyecto)
+    for traza in instantanea.traces:
+        # Los marcos van del más antiguo al más reciente
+        marco = next((m for m in reversed(traza.traceback) if en_proyecto(m.filename)), None)
+        clave = _funcion_de_linea(lineas, marco.filename, marco.lineno) if marco else "(fuera del proyecto)"
+        tamaño, bloques = origenes.get(clave, (0, 0))
+        origenes[clave] = (tamaño + traza.size, bloques + 1)
+    mayores = sorted(origenes.items(), key=lambda o: (-o[1][0], o[0]))[:limite]
+    return [{"sitio": clave, "bytes": tamaño, "bloques": bloques} for clave, (tamaño, bloques) in mayores]
+
+
+def _sitios(instantanea, lineas, limite):
+    """Las líneas con más memoria reservada, con la función en la que están."""
+    sitios = []
+    for estadistica in instantanea.statistics("lineno")[:limite]:
+        marco = estadistica.traceback[0]
+        sitios.append({
+            "sitio": _funcion_de_linea(lineas, marco.filename, marco.lineno),
+            "linea": f"{ruta_corta(marco.filename)}:{marco.lineno}",
+            "bytes": estadistica.size,
+            "bloques": estadistica.count,
+        })
+    return sitios
+
+
+def _tamaño(n):
+    for unidad in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unidad}" if unidad == "B" else f"{n:.1f} {unidad}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def texto(informe, funciones=MOSTRAR, sitios=MOSTRAR):
+    """Informe legible: las funciones que más CPU gastan y los sitios con más memoria."""
+    memoria = informe["memoria"]
+    lineas = [
+        f"Perfil de {informe['nombre']} ({informe['inicio']}, Python {informe['python']}): "
+        f"{informe['duracion']:.2f}s, CPU {informe['cpu']:.2f}s, "
+        f"memoria pico {_tamaño(memoria['pico'])}, al terminar {_tamaño(memoria['final'])}",
+    ]
+    for titulo, clave in (("tiempo propio", "propio"), ("tiempo acumulado", "acumulado")):
+        lineas.append(f"\nFunciones por {titulo}:")
+        lineas.append(f"{'propio':>9} {'acumulado':>10} {'llamadas':>9}  función")
+        for f in sorted(informe["funciones"], key=lambda f: -f[clave])[:funciones]:
+            lineas.append(f"{f['propio']:>9.3f} {f['acumulado']:>10.3f} {f['llamadas']:>9}  "
+                          f"{f['funcion']} (línea {f['linea']})")
+    lineas.append("\nMemoria reservada en el pico, por función del proyecto:")
+    for s in memoria["origenes_pico"][:sitios]:
+        lineas.append(f"{_tamaño(s['bytes']):>10} {s['bloques']:>8} bloques  {s['sitio']}")
+    for titulo, clave in (("en el pico", "sitios_pico"), ("al terminar", "sitios_final")):
+        lineas.append(f"\nMemoria reservada {titulo}, por línea:")
+        for s in memoria[clave][:sitios]:
+            lineas.append(f"{_tamaño(s['bytes']):>10} {s['bloques']:>8} bloques  {s['sitio']} ({s['linea']})")
+    return "\n".join(lineas) + "\n"
+
+
+def comparar(anterior, actual, limite=MOSTRAR):
+    """Cambios de tiempo propio por función y de memoria en el pico por función del proyecto.
+
+    Devuelve dos listas de (nombre, antes, ahora), de más a menos cambio,
+    sin los cambios menores que CAMBIO_MINIMO y CAMBIO_TOTAL. Se comparan
+    las que están en los dos informes (cada informe guarda solo las que más
+    gastan).
+    """
+    def cambios(antes, ahora, total):
+        filas = [(clave, antes[clave], ahora[clave]) for clave in antes.keys() & ahora.keys()]
+        filas = [f for f in filas
+                 if abs(f[2] - f[1]) > max(CAMBIO_MINIMO * max(f[1], f[2]), CAMBIO_TOTAL * total)]
+        return sorted(filas, key=lambda f: (-abs(f[2] - f[1]), f[0]))[:limite]
+
+    tiempos = cambios({f["funcion"]: f["propio"] for f in anterior["funciones"]},
+                      {f["funcion"]: f["propio"] for f in actual["funciones"]},
+                      max(anterior["cpu"], actual["cpu"]))
+    memoria = cambios({s["sitio"]: s["bytes"] for s in anterior["memoria"]["origenes_pico"]},
+                      {s["sitio"]: s["bytes"] for s in actual["memoria"]["origenes_pico"]},
+                      max(anterior["memoria"]["pico"], actual["memoria"]["pico"]))
+    return tiempos, memoria
+
+
+def imprimir_comparacion(anterior, actual, limite=MOSTRAR):
+    tiempos, sitios = comparar(anterior, actual, limite)
+    memoria_antes, memoria_ahora = anterior["memoria"]["pico"], actual["memoria"]["pico"]
+    print(f"📊 Respecto a {anterior['inicio']}: CPU {anterior['cpu']:.2f}s → {actual['cpu']:.2f}s, "
+          f"memoria pico {_tamaño(memoria_antes)} → {_tamaño(memoria_ahora)}")
+    for funcion, antes, ahora in tiempos:
+        print(f"  {'🔺' if ahora > antes else '🔻'} {antes:.3f}s → {ahora:.3f}s  {funcion}")
+    for sitio, antes, ahora in sitios:
+        print(f"  {'🔺' if ahora > antes else '🔻'} {_tamaño(antes)} → {_tamaño(ahora)}  {sitio}")
+
+
+def anterior(nombre, directorio=DIRECTORIO):
+    """El informe más reciente guardado de un comando, o None."""
+    rutas = sorted(glob.glob(os.path.join(directorio, f"{nombre}-*.json")))
+    if not rutas:
+        return None
+    with open(rutas[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def perfilar(nombre, directorio=DIRECTORIO):
+    """Perfila el bloque y, al salir, guarda el informe y lo compara con el anterior."""
+    previo = anterior(nombre, directorio)
+    perfilador = Perfilador(nombre)
+    perfilador.iniciar()
+    try:
+        yield perfilador
+    finally:
+        perfilador.detener()
+        datos, rutas = perfilador.guardar(directorio)
+        print()
+        print(texto(datos), end="")
+        if previo is not None:
+            imprimir_comparacion(previo, datos)
+        print(f"💾 Perfil guardado en {rutas[0]} (y .txt, .prof)")
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Compara dos perfiles guardados con --profile")
+    parser.add_argument("anterior", help="Informe JSON de referencia")
+    parser.add_argument("actual", help="Informe JSON con el que compararlo")
+    parser.add_argument("--mostrar", type=int, default=MOSTRAR,
+                        help="Funciones y sitios de memoria que se muestran")
+    args = parser.parse_args(argv)
+
+    try:
+        informes = []
+        for ruta in (args.anterior, args.actual):
+            with open(ruta, encoding="utf-8") as f:
+                informes.append(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    print(texto(informes[1], args.mostrar, args.mostrar), end="")
+    imprimir_comparacion(*informes, args.mostrar)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
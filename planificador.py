@@ -0,0 +1,220 @@
+"""
+Planificación de las ejecuciones del modo daemon (sync_wods.py --daemon).
+
+Cada box tiene dos tareas: el resumen semanal, un día y a una hora fijos, y
+la consulta periódica durante el día, que solo envía los WODs nuevos o
+modificados. Cada ejecución se retrasa un tiempo aleatorio (jitter) para no
+consultar todas las APIs a la vez, y la última ejecución de cada tarea se
+guarda en disco: si el proceso estaba parado cuando tocaba un resumen, se
+envía al arrancar (una sola vez), y las consultas perdidas se agrupan en una.
+"""
+
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+import configuracion
+from configuracion import ConfiguracionError
+
+# Archivo con la última ejecución de cada tarea
+ESTADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "planificador.json")
+
+# Día (0 = lunes, o su nombre) y hora del resumen semanal
+DIA_RESUMEN = 0
+HORA_RESUMEN = "07:00"
+
+# Horas tras la hora del resumen en las que aún se recupera si no se envió
+RECUPERAR_RESUMEN = 48
+
+# Minutos entre consultas (None: sin consultas) y horas del día en que se hacen
+INTERVALO_CONSULTA = 60
+HORAS_CONSULTA = (6, 22)
+
+# Retraso aleatorio máximo de cada ejecución, en segundos
+JITTER = 120
+
+# Minutos hasta el siguiente intento de una tarea que ha fallado
+REINTENTO = 15
+
+# Segundos máximos entre comprobaciones del reloj, para notar suspensiones
+# del equipo y cambios de hora
+MAX_ESPERA = 60
+
+DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+OPCIONES = {"dia", "hora", "recuperar_horas", "intervalo", "horas", "jitter", "reintento"}
+
+
+def leer_opciones(generales=None, del_box=None):
+    """Combina las opciones de PLANIFICADOR con las del box y las valida."""
+    opciones = {
+        "dia": DIA_RESUMEN, "hora": HORA_RESUMEN, "recuperar_horas": RECUPERAR_RESUMEN,
+        "intervalo": INTERVALO_CONSULTA, "horas": HORAS_CONSULTA, "jitter": JITTER,
+        "reintento": REINTENTO,
+    }
+    for origen in (generales or {}, del_box or {}):
+        desconocidas = set(origen) - OPCIONES - {"estado"}
+        if desconocidas:
+            raise ConfiguracionError(f"Opciones del planificador desconocidas: {', '.join(sorted(desconocidas))}")
+        opciones.update({k: v for k, v in origen.items() if k != "estado"})
+
+    dia = opciones["dia"]
+    if isinstance(dia, str):
+        if dia.lower() not in DIAS:
+            raise ConfiguracionError(f"Día del resumen desconocido: {dia}")
+        dia = DIAS.index(dia.lower())
+    try:
+        hora, minuto = (int(parte) for parte in str(opciones["hora"]).split(":"))
+        desde, hasta = opciones["horas"] or (0, 24)
+    except ValueError:
+        raise ConfiguracionError(f"Hora del planificador no válida: {opciones['hora']} / {opciones['horas']}")
+    opciones.update(dia=dia, hora=(hora, minuto), horas=(desde, hasta))
+    return opciones
+
+
+class Tarea:
+    """Resumen semanal ("resumen") o consulta periódica ("consulta") de un box."""
+
+    def __init__(self, box, tipo, opciones):
+        self.box = box
+        self.tipo = tipo
+        self.opciones = opciones
+        self.clave = f"{box.nombre}:{tipo}"
+        self.siguiente = None
+
+    @property
+    def modo(self):
+        """Modo de correo de la ejecución (None: el configurado en el box)."""
+        return "cambios" if self.tipo == "consulta" else None
+
+    def __repr__(self):
+        return f"Tarea({self.clave}, {self.siguiente})"
+
+
+class Planificador:
+    """Calcula cuándo toca cada tarea y recuerda cuándo se ejecutó."""
+
+    def __init__(self, boxes, opciones=None, ruta_estado=None, consultas=True, azar=None):
+        opciones = opciones if opciones is not None else configuracion.obtener("PLANIFICADOR", {}) or {}
+        self.ruta_estado = ruta_estado or opciones.get("estado", ESTADO)
+        self.azar = azar or random.Random()
+        self.ultimas = self._cargar()
+
+        self.tareas = []
+        for box in boxes:
+            del_box = leer_opciones(opciones, box.config.get("planificador"))
+            self.tareas.append(Tarea(box, "resumen", del_box))
+            if consultas and del_box["intervalo"]:
+                self.tareas.append(Tarea(box, "consulta", del_box))
+
+        ahora = datetime.now()
+        for tarea in self.tareas:
+            self.programar(tarea, ahora)
+
+    def _cargar(self):
+        try:
+            with open(self.ruta_estado, encoding="utf-8") as f:
+                return {clave: datetime.fromisoformat(valor) for clave, valor in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def guardar(self):
+        """Guarda en disco la última ejecución de cada tarea."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta_estado)), exist_ok=True)
+        temporal = f"{self.ruta_estado}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({clave: valor.isoformat() for clave, valor in self.ultimas.items()}, f, indent=1)
+        os.replace(temporal, self.ruta_estado)
+
+    @staticmethod
+    def ultimo_resumen(opciones, ahora):
+        """Momento del resumen más reciente que no es posterior a ahora."""
+        hora, minuto = opciones["hora"]
+        momento = ahora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        momento -= timedelta(days=(ahora.weekday() - opciones["dia"]) % 7)
+        if momento > ahora:
+            momento -= timedelta(days=7)
+        return momento
+
+    @staticmethod
+    def dentro_de_horario(opciones, momento):
+        """Devuelve momento, o el inicio del siguiente horario de consultas si cae fuera."""
+        desde, hasta = opciones["horas"]
+        if desde <= momento.hour < hasta:
+            return momento
+        inicio = momento.replace(hour=desde, minute=0, second=0, microsecond=0)
+        return inicio if momento.hour < desde else inicio + timedelta(days=1)
+
+    def programar(self, tarea, desde):
+        """Calcula la siguiente ejecución de la tarea a partir del momento desde."""
+        opciones = tarea.opciones
+        ultima = self.ultimas.get(tarea.clave)
+        if tarea.tipo == "resumen":
+            anterior = self.ultimo_resumen(opciones, desde)
+            pendiente = ultima is None or ultima < anterior
+            if pendiente and desde - anterior <= timedelta(hours=opciones["recuperar_horas"]):
+                momento = desde
+            else:
+                momento = anterior + timedelta(days=7)
+        else:
+            momento = desde
+            if ultima is not None:
+                momento = max(desde, ultima + timedelta(minutes=opciones["intervalo"]))
+            momento = self.dentro_de_horario(opciones, momento)
+        tarea.siguiente = momento + timedelta(seconds=self.azar.uniform(0, opciones["jitter"]))
+
+    def vencidas(self, ahora):
+        """Tareas que tocan ahora, como mucho una por box (el resumen antes que la consulta)."""
+        por_box = {}
+        for tarea in self.tareas:
+            if tarea.siguiente <= ahora and (tarea.box.nombre not in por_box or tarea.tipo == "resumen"):
+                por_box[tarea.box.nombre] = tarea
+        return list(por_box.values())
+
+    def completar(self, tarea, inicio, exito):
+        """Registra una ejecución de la tarea (empezada en inicio) y la vuelve a programar.
+
+        Un resumen también cuenta como consulta del box. Si la ejecución ha
+        fallado la tarea se reintenta pasados "reintento" minutos.
+        """
+        if exito:
+            self.ultimas[tarea.clave] = inicio
+            self.programar(tarea, inicio)
+            if tarea.tipo == "resumen":
+                for consulta in self.tareas:
+                    if consulta.box is tarea.box and consulta.tipo == "consulta":
+                        self.ultimas[consulta.clave] = inicio
+                        self.programar(consulta, inicio)
+        else:
+            self.programar(tarea, inicio + timedelta(minutes=tarea.opciones["reintento"]))
+
+    def espera(self, ahora):
+        """Segundos hasta la siguiente tarea (como mucho MAX_ESPERA)."""
+        if not self.tareas:
+            return MAX_ESPERA
+        siguiente = min(tarea.siguiente for tarea in self.tareas)
+        return max(0.0, min(MAX_ESPERA, (siguiente - ahora).total_seconds()))
+
+    def ejecutar(self, funcion, parar):
+        """Ejecuta las tareas según su planificación hasta que se active parar.
+
+        funcion recibe la lista de tareas que tocan y devuelve, para cada una,
+        si se ejecutó bien. Las tareas en curso siempre terminan antes de salir.
+        """
+        while not parar.is_set():
+            ahora = datetime.now()
+            tareas = self.vencidas(ahora)
+            if not tareas:
+                parar.wait(self.espera(ahora))
+                continue
+            for tarea, exito in zip(tareas, funcion(tareas)):
+                self.completar(tarea, ahora, exito)
+            self.guardar()
+            siguiente = self.proximas()[0]
+            print(f"⏭️ Siguiente: {siguiente.box.nombre} ({siguiente.tipo}) "
+                  f"el {siguiente.siguiente.strftime('%d/%m/%Y %H:%M:%S')}")
+
+    def proximas(self):
+        """Devuelve las tareas ordenadas por su siguiente ejecución."""
+        return sorted(self.tareas, key=lambda tarea: tarea.siguiente)
@@ -0,0 +1,479 @@
+"""
+Registro de proveedores de WODs y pipeline común a todos los boxes.
+
+Cada proveedor es un adaptador pequeño que sabe obtener los datos crudos de
+su API y convertirlos en registros de WOD. Ordenar, formatear y enviar el
+correo es común y vive aquí, así que añadir un box nuevo solo requiere un
+adaptador registrado con @registrar.
+"""
+
+import argparse
+import functools
+import importlib
+import json
+from datetime import timedelta
+from operator import attrgetter
+
+import cache_http
+import cliente_http
+import configuracion
+import metricas
+import resiliencia
+from configuracion import ConfiguracionError
+from fechas import obtener_rango_semana_actual, ventana
+from formato import REGLAS, ReglasFormato, analizar_wod, html_de_arbol
+from wod import WOD
+
+# Módulos con adaptadores que se cargan por defecto (config.py puede
+# sustituirlos con MODULOS_PROVEEDORES)
+MODULOS_PROVEEDORES = ["crossfitdb", "n8"]
+
+# Clases de proveedor registradas, por clave
+PROVEEDORES = {}
+
+# Cuándo se envía el correo de un box (config.py: MODO_CORREO, o "modo_correo"
+# en la configuración del box):
+#   "siempre": la semana completa en cada ejecución
+#   "semana":  la semana completa solo si hay WODs nuevos o modificados
+#   "cambios": solo los WODs nuevos o modificados
+MODO_CORREO = "siempre"
+MODOS_CORREO = ("siempre", "semana", "cambios")
+
+# Grupos de destinatarios por nombre (config.py: GRUPOS_DESTINATARIOS); las
+# listas de destinatarios pueden incluir nombres de grupo además de direcciones
+GRUPOS_DESTINATARIOS = {}
+
+
+def registrar(cls):
+    """Decorador que añade una clase de proveedor al registro."""
+    PROVEEDORES[cls.clave] = cls
+    return cls
+
+
+class Proveedor:
+    """Adaptador base de un box: obtener datos crudos → registros de WOD.
+
+    Las subclases definen clave, titulo y clave_config e implementan
+    peticion() y normalizar(). Cada instancia representa un box concreto.
+    """
+
+    # Nombre del proveedor en el registro
+    clave = None
+    # Nombre del box que aparece en el correo
+    titulo = None
+    # Variable de config.py con los datos del box
+    clave_config = None
+    # Timeout (conexión, lectura) en segundos de las peticiones del box
+    timeout = cliente_http.TIMEOUT
+    # Reintentos ante errores de conexión o respuestas 5xx
+    reintentos = cliente_http.REINTENTOS
+    # Parámetros que no forman parte de la clave de caché (anti-caché)
+    parametros_ignorados = ()
+    # Días que se piden de una vez al importar el histórico (None: todo el
+    # rango en una petición)
+    dias_por_tramo = 7
+    # Si la petición de un tramo trae todos sus WODs (si no, historico.py no
+    # apunta el tramo como importado y lo vuelve a pedir cada vez)
+    tramos_completos = True
+
+    def __init__(self, config=None):
+        self.config = dict(config or {})
+        self.nombre = self.config.get("nombre") or self.clave
+        self.titulo = self.config.get("titulo") or self.titulo or self.nombre
+
+    @classmethod
+    def desde_config(cls):
+        """Crea el box a partir de su variable en config.py."""
+        return cls(configuracion.requerir(cls.clave_config))
+
+    def descargar(self, url, params=None):
+        """Hace un GET con el cliente HTTP compartido y la caché en disco.
+
+        Devuelve una cache_http.RespuestaHTTP. config.py puede ajustar
+        "timeout" y "reintentos" para cada box.
+        """
+        cliente = cliente_http.obtener_cliente()
+        opciones = {
+            "timeout": self.config.get("timeout", self.timeout),
+            "reintentos": self.config.get("reintentos", self.reintentos),
+        }
+        cache = cache_http.obtener_cache()
+        with metricas.medir("http"):
+            if cache is not None:
+                respuesta = cache.get(cliente, url, params, ignorar=self.parametros_ignorados, **opciones)
+            else:
+                response = cliente.get(url, params=params, **opciones)
+                response.raise_for_status()
+                respuesta = cache_http.RespuestaHTTP.desde_response(response)
+        metricas.contar("http_peticiones")
+        metricas.contar("http_bytes", len(respuesta.contenido))
+        return respuesta
+
+    def peticion(self, lunes, viernes):
+        """Devuelve la URL y los parámetros para descargar la semana indicada."""
+        raise NotImplementedError
+
+    def obtener(self, lunes, viernes):
+        """Descarga los datos crudos del box para la semana indicada."""
+        url, params = self.peticion(lunes, viernes)
+        return self.descargar(url, params)
+
+    def normalizar(self, datos, lunes, viernes):
+        """Convierte los datos crudos en una lista de WODs (ver crear_wod)."""
+        raise NotImplementedError
+
+    def normalizar_respuesta(self, respuesta, lunes, viernes):
+        """Convierte la respuesta descargada en WODs.
+
+        Por defecto decodifica el JSON completo y llama a normalizar(); un box
+        con respuestas grandes puede recorrerla por partes (ver
+        RespuestaHTTP.iterar).
+        """
+        return self.normalizar(respuesta.json(), lunes, viernes)
+
+    def tramos(self, desde, hasta):
+        """Divide el rango de fechas [desde, hasta] en los tramos que se piden de una vez.
+
+        Cada tramo tiene "dias_por_tramo" días (config.py puede ajustarlo
+        para cada box), salvo el último.
+        """
+        dias = self.config.get("dias_por_tramo", self.dias_por_tramo) or (hasta - desde).days + 1
+        tramos = []
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(hasta, inicio + timedelta(days=dias - 1))
+            tramos.append((inicio, fin))
+            inicio = fin + timedelta(days=1)
+        return tramos
+
+    def obtener_rango(self, desde, hasta):
+        """Descarga y normaliza los WODs entre dos fechas (un tramo del histórico)."""
+        wods = self.normalizar_respuesta(self.obtener(desde, hasta), desde, hasta)
+        return [wod for wod in wods if desde <= wod.fecha <= hasta]
+
+    def crear_wod(self, fecha, contenido, id_wod, estructura=None, **opciones):
+        """Crea el registro (wod.WOD) de un WOD de este box.
+
+        estructura es el árbol del contenido (analizar()); si se indica, el
+        correo se genera a partir de él sin volver a analizar el texto.
+        """
+        return WOD(fecha, contenido, id_wod, self.nombre, estructura, **opciones)
+
+    @functools.cached_property
+    def reglas(self):
+        """Reglas de formato del box: REGLAS_FORMATO de config.py y "reglas_formato" del box."""
+        opciones = dict(configuracion.obtener("REGLAS_FORMATO", None) or {})
+        opciones.update(self.config.get("reglas_formato") or {})
+        if not opciones:
+            return REGLAS
+        try:
+            return ReglasFormato.desde_dict(opciones)
+        except ValueError as e:
+            raise ConfiguracionError(f"{self.nombre}: {e}")
+
+    def es_tipo_entrenamiento(self, linea):
+        """Determina si una línea indica un tipo de entrenamiento."""
+        return self.reglas.contiene_tipo_entrenamiento(linea)
+
+    def analizar(self, texto, formatear=True):
+        """Devuelve el árbol del texto limpio de un WOD (ver formato.analizar_wod)."""
+        with metricas.medir("aplicar_formato"):
+            return analizar_wod(texto, self.es_tipo_entrenamiento, self.reglas, formatear)
+
+    def formatear_html(self, contenido):
+        """Formatea el contenido de un WOD para el correo HTML."""
+        # Sin self.analizar: el tiempo ya cuenta como formatear_wod_para_correo
+        return html_de_arbol(analizar_wod(contenido, self.es_tipo_entrenamiento, self.reglas, False))
+
+
+def descubrir(modulos=None):
+    """Importa los módulos de proveedores (una sola vez) y devuelve el registro."""
+    if modulos is None:
+        modulos = configuracion.obtener("MODULOS_PROVEEDORES", MODULOS_PROVEEDORES)
+    for modulo in modulos:
+        importlib.import_module(modulo)
+    return PROVEEDORES
+
+
+def crear_boxes():
+    """Crea los boxes definidos en config.py.
+
+    Si config.py define BOXES (lista de diccionarios con la clave
+    "proveedor"), se crea un box por entrada; si no, se crea uno por cada
+    proveedor registrado cuya variable de configuración exista.
+    """
+    descubrir()
+    boxes_config = configuracion.obtener("BOXES")
+    if boxes_config is None:
+        return [
+            cls.desde_config() for cls in PROVEEDORES.values()
+            if cls.clave_config and configuracion.obtener(cls.clave_config) is not None
+        ]
+
+    boxes = []
+    for datos in boxes_config:
+        clave = datos.get("proveedor")
+        if clave not in PROVEEDORES:
+            raise ConfiguracionError(f"Proveedor desconocido en BOXES: {clave}")
+        boxes.append(PROVEEDORES[clave](datos))
+    return boxes
+
+
+def obtener_wods(proveedor, lunes, viernes):
+    """Obtiene y normaliza los WODs de un box, ordenados por día.
+
+    Si la respuesta es idéntica a la de la última descarga se reutilizan los
+    WODs ya procesados y no se vuelve a limpiar ni formatear el contenido.
+    """
+    respuesta = proveedor.obtener(lunes, viernes)
+    cache = cache_http.obtener_cache()
+    contexto = f"{proveedor.nombre}:{lunes.strftime('%Y-%m-%d')}:{proveedor.reglas.huella}"
+
+    guardados = cache.resultado(respuesta, contexto) if cache is not None else None
+    if guardados is not None:
+        print(f"♻️ {proveedor.titulo}: sin cambios desde la última descarga")
+        return [WOD.desde_dict(datos) for datos in guardados]
+
+    todos_wods = proveedor.normalizar_respuesta(respuesta, lunes, viernes)
+    todos_wods.sort(key=attrgetter("valor_orden"))
+    if cache is not None:
+        cache.guardar_resultado(respuesta, contexto, [wod.como_dict() for wod in todos_wods])
+    return todos_wods
+
+
+def wods_guardados(proveedor, lunes, viernes):
+    """WODs de la semana del box guardados en el almacén (los de la última ejecución correcta)."""
+    from almacen import obtener_almacen
+
+    almacen = obtener_almacen()
+    if almacen is None:
+        return []
+    lunes, viernes = ventana(lunes, viernes)
+    filas = almacen.wods(proveedor.nombre, lunes.isoformat(), viernes.isoformat())
+    wods = [WOD.desde_fila(fila) for fila in filas]
+    wods.sort(key=attrgetter("valor_orden"))
+    return wods
+
+
+def obtener_wods_o_guardados(proveedor, lunes, viernes, plazo=None, simular=False):
+    """Obtiene los WODs del box o, si no se pueden descargar, los guardados.
+
+    La descarga acaba con el plazo del box o con plazo, el de toda la
+    ejecución, si vence antes (ver resiliencia), y solo se hace si el
+    disyuntor del box lo permite. Los fallos de descarga y las descargas
+    correctas abren y cierran el disyuntor (salvo al simular); agotar el
+    plazo de la ejecución no es un fallo del box. Si no se puede descargar
+    se usan los WODs de la semana que hay en el almacén.
+
+    Devuelve los WODs y si son los guardados; si no hay WODs guardados
+    relanza el error.
+    """
+    import requests  # para sus excepciones; ya cargado al descargar
+
+    disyuntores = None if simular else resiliencia.obtener_disyuntores()
+    try:
+        if disyuntores is not None:
+            disyuntores.comprobar(proveedor.nombre)
+        with resiliencia.con_plazo(resiliencia.plazo_box(proveedor.config, plazo)):
+            wods = obtener_wods(proveedor, lunes, viernes)
+    except resiliencia.DisyuntorAbierto as e:
+        metricas.contar("descargas_omitidas")
+        guardados = wods_guardados(proveedor, lunes, viernes)
+        if not guardados:
+            raise
+        print(f"⏭️ {e}")
+    except (requests.RequestException, json.JSONDecodeError, resiliencia.PlazoAgotado) as e:
+        if isinstance(e, resiliencia.PlazoAgotado):
+            metricas.contar("plazos_agotados")
+        guardados = wods_guardados(proveedor, lunes, viernes)
+        if guardados:
+            print(f"❌ No se pudieron descargar los WODs de {proveedor.titulo}: {e}")
+        # Si se ha acabado el tiempo de toda la ejecución (o el box no llegó
+        # a tenerlo) no se sabe si el box responde
+        if disyuntores is not None and not (plazo is not None and plazo.agotado()):
+            disyuntores.fallo(proveedor.nombre, proveedor.config.get("disyuntor"))
+        if not guardados:
+            raise
+    else:
+        if disyuntores is not None:
+            disyuntores.exito(proveedor.nombre)
+        return wods, False
+
+    print(f"♻️ Se usan los {len(guardados)} WODs de la semana guardados en el almacén")
+    metricas.contar("respaldos")
+    return guardados, True
+
+
+def modo_correo(proveedor):
+    """Devuelve el modo de correo del box."""
+    modo = proveedor.config.get("modo_correo") or configuracion.obtener("MODO_CORREO", MODO_CORREO)
+    if modo not in MODOS_CORREO:
+        raise ConfiguracionError(f"Modo de correo desconocido: {modo}")
+    return modo
+
+
+def destinatarios(proveedor, email_config):
+    """Devuelve las direcciones a las que se envía el correo del box.
+
+    La lista sale de "destinatarios" en la configuración del box o, si no
+    tiene, de EMAIL_CONFIG ("destinatarios" o "destinatario"). Los nombres
+    de GRUPOS_DESTINATARIOS se sustituyen por sus direcciones (un grupo puede
+    incluir otros) y las direcciones repetidas se envían una sola vez.
+    """
+    lista = (proveedor.config.get("destinatarios") or email_config.get("destinatarios")
+             or email_config["destinatario"])
+    grupos = configuracion.obtener("GRUPOS_DESTINATARIOS", GRUPOS_DESTINATARIOS) or {}
+
+    direcciones = []
+    vistas = set()
+    pendientes = [lista] if isinstance(lista, str) else list(lista)
+    pendientes.reverse()
+    expandidos = set()
+    while pendientes:
+        entrada = pendientes.pop().strip()
+        if entrada in grupos:
+            if entrada not in expandidos:
+                expandidos.add(entrada)
+                miembros = grupos[entrada]
+                pendientes.extend(reversed([miembros] if isinstance(miembros, str) else miembros))
+        elif "@" in entrada:
+            if entrada.lower() not in vistas:
+                vistas.add(entrada.lower())
+                direcciones.append(entrada)
+        else:
+            raise ConfiguracionError(f"Grupo de destinatarios desconocido: {entrada}")
+    if not direcciones:
+        raise ConfiguracionError(f"El box {proveedor.nombre} no tiene destinatarios")
+    return direcciones
+
+
+def ejecutar(proveedor, email_config=None, modo=None, simular=False, semana=None, plazo=None):
+    """Obtiene, formatea y envía los WODs de la semana de un box.
+
+    Los WODs se comparan con el almacén local y solo se guardan los nuevos o
+    modificados una vez enviado (o guardado en la bandeja de salida) el
+    correo, así que si el envío falla se vuelven a detectar en la siguiente
+    ejecución. Los correos de la bandeja se reintentan en las siguientes
+    ejecuciones, y los que no se hayan entregado al terminar dan el box por
+    fallido (ver sync_wods.marcar_sin_entregar).
+
+    modo sustituye al modo de correo del box (ver MODOS_CORREO). Con simular
+    solo se descargan los WODs y se muestra qué se enviaría, sin enviar nada
+    ni guardar los cambios en el almacén. semana es el (lunes, viernes) de
+    la ejecución; por defecto, la semana actual. plazo es el de toda la
+    ejecución, si lo hay: la descarga acaba con el que venza antes, este o
+    el del box (ver resiliencia). Si no se puede descargar se usan los WODs
+    guardados en el almacén (ver obtener_wods_o_guardados).
+
+    Devuelve True si el box se procesó sin errores.
+    """
+    import requests  # para sus excepciones; ya cargado al descargar
+
+    # El almacén (sqlite3) y el correo se cargan al usarlos para no alargar el arranque
+    from almacen import obtener_almacen
+    from correo import enviar_correo_con_wods
+
+    if email_config is None:
+        email_config = configuracion.requerir("EMAIL_CONFIG")
+
+    lunes, viernes = semana or obtener_rango_semana_actual()
+    lunes_fmt = lunes.strftime("%d/%m/%Y")
+    viernes_fmt = viernes.strftime("%d/%m/%Y")
+
+    print(f"🔄 Obteniendo WODs de {proveedor.titulo}...")
+    try:
+        modo = modo or modo_correo(proveedor)
+        lista_destinatarios = destinatarios(proveedor, email_config)
+        todos_wods, guardados = obtener_wods_o_guardados(proveedor, lunes, viernes, plazo, simular)
+
+        almacen = obtener_almacen()
+        cambios = almacen.cambios(proveedor.nombre, todos_wods) if almacen else todos_wods
+
+        if not guardados:
+            print(f"✅ Se encontraron {len(todos_wods)} WODs ({len(cambios)} nuevos o modificados)")
+            metricas.contar("encontrados", len(todos_wods))
+            metricas.contar("nuevos", len(cambios))
+
+        if modo == "cambios":
+            a_enviar = cambios
+        elif modo == "semana":
+            a_enviar = todos_wods if cambios else []
+        else:
+            a_enviar = todos_wods
+
+        if simular:
+            print(f"🔍 Simulación: se enviarían {len(a_enviar)} WODs a {len(lista_destinatarios)} destinatarios")
+            return True
+
+        if a_enviar:
+            exito = enviar_correo_con_wods(a_enviar, lunes_fmt, viernes_fmt, proveedor.titulo,
+                                           email_config, proveedor.formatear_html,
+                                           solo_cambios=(modo == "cambios"),
+                                           destinatarios=lista_destinatarios)
+        else:
+            if todos_wods:
+                print("💤 Sin cambios, no se envía correo")
+            else:
+                print("❌ No se encontraron WODs para esta semana")
+            exito = True
+
+        if exito and almacen:
+            almacen.guardar(proveedor.nombre, cambios)
+        return exito
+
+    except requests.RequestException as e:
+        print(f"❌ Error en la solicitud: {e}")
+    except json.JSONDecodeError:
+        print("❌ Error al procesar la respuesta JSON")
+    except resiliencia.PlazoAgotado as e:
+        print(f"⏱️ {proveedor.titulo}: {e}")
+    except resiliencia.DisyuntorAbierto as e:
+        print(f"⏭️ {e}")
+    except Exception as e:
+        import traceback
+
+        print(f"❌ Error inesperado: {e}")
+        traceback.print_exc()
+    return False
+
+
+def ejecutar_box(cls, argv=None):
+    """Ejecuta un box a partir de config.py (uso desde la línea de comandos)."""
+    parser = argparse.ArgumentParser(description=f"Obtiene y envía los WODs de {cls.__name__}")
+    # Siempre se obtiene la semana actual; la opción se admite porque la
+    # documentaban las versiones anteriores
+    parser.add_argument("--semana", action="store_true",
+                        help="Obtener los WODs de la semana actual (lo que se hace siempre)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar la CPU y la memoria de la ejecución (ver perfilado.py)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        import perfilado
+        with perfilado.perfilar(cls.clave):
+            return _ejecutar_desde_config(cls)
+    return _ejecutar_desde_config(cls)
+
+
+def _ejecutar_desde_config(cls):
+    import bandeja_salida
+    import envio
+
+    try:
+        proveedor = cls.desde_config()
+        email_config = configuracion.requerir("EMAIL_CONFIG")
+    except ConfiguracionError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    try:
+        with metricas.en_box(proveedor.nombre):
+            exito = ejecutar(proveedor, email_config)
+    finally:
+        estadisticas_bandeja = bandeja_salida.detener_despachador()
+        envio.cerrar_pools()
+    # Se espera a enviar el correo: si no se ha entregado, el box no ha terminado bien
+    error = bandeja_salida.error_de_entrega(estadisticas_bandeja, proveedor.nombre)
+    if error:
+        print(f"❌ {error}")
+        return False
+    return exito
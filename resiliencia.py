@@ -0,0 +1,229 @@
+"""
+Plazos de ejecución y disyuntores de los boxes.
+
+Un box lento o caído no debe retrasar ni tumbar toda la sincronización:
+
+- Cada ejecución puede tener un plazo total y cada box uno propio (PLAZOS
+  de config.py, "plazo" en la configuración del box; por defecto no hay
+  plazos). El plazo del box en curso
+  se guarda en el hilo (ver con_plazo) y el cliente HTTP recorta con él el
+  timeout de cada petición y no reintenta si ya no queda tiempo; agotado,
+  las descargas lanzan PlazoAgotado.
+- El disyuntor de un box se abre tras varios fallos seguidos de descarga y
+  durante un tiempo no se le pide nada (DisyuntorAbierto); pasado ese tiempo
+  se vuelve a probar con una ejecución y, si va bien, se cierra. Su estado
+  se guarda en disco, así que lo comparten las ejecuciones desde cron:
+
+    PLAZOS = {"total": 120, "box": 60}        # segundos; None: sin plazo
+    DISYUNTOR = {"fallos": 3, "espera": 30}   # minutos; DISYUNTOR = None lo desactiva
+
+Cuando no se puede descargar un box se usan los WODs de la semana que ya
+hay en el almacén (ver proveedores.obtener_wods_o_guardados).
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import configuracion
+
+# Plazos por defecto, en segundos, de cada ejecución (todos los boxes) y de
+# cada box: None, sin plazo salvo que se configuren en PLAZOS (cortar una
+# ejecución que va bien tiene su coste: los boxes cortados usan los WODs
+# guardados o se dan por fallidos)
+PLAZO_TOTAL = None
+PLAZO_BOX = None
+
+# Fallos de descarga seguidos tras los que se abre el disyuntor de un box, y
+# minutos que se deja sin pedirle nada antes de volver a probar
+FALLOS = 3
+ESPERA = 30
+
+# Estado de los disyuntores entre ejecuciones
+ESTADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "disyuntores.json")
+
+_plazo = contextvars.ContextVar("plazo", default=None)
+
+
+class PlazoAgotado(TimeoutError):
+    """Se ha agotado el plazo del box antes de terminar la descarga."""
+
+
+class DisyuntorAbierto(Exception):
+    """El box ha fallado varias veces seguidas y todavía no toca volver a probarlo."""
+
+
+class Plazo:
+    """Momento límite para terminar algo (con el reloj monotónico)."""
+
+    __slots__ = ("limite",)
+
+    def __init__(self, segundos):
+        self.limite = time.monotonic() + segundos
+
+    def restante(self):
+        return self.limite - time.monotonic()
+
+    def agotado(self):
+        return self.restante() <= 0
+
+    def recortar(self, timeout):
+        """El timeout (número o (conexión, lectura)) limitado al tiempo que queda.
+
+        Lanza PlazoAgotado si ya no queda tiempo.
+        """
+        restante = self.restante()
+        if restante <= 0:
+            raise PlazoAgotado("plazo agotado")
+        if isinstance(timeout, tuple):
+            return tuple(restante if t is None else min(t, restante) for t in timeout)
+        return restante if timeout is None else min(timeout, restante)
+
+
+def mas_cercano(*plazos):
+    """El plazo que vence antes (ignora los None)."""
+    return min((p for p in plazos if p is not None), key=lambda p: p.limite, default=None)
+
+
+def plazos():
+    """Segundos de los plazos total y por box según PLAZOS de config.py (None: sin plazo)."""
+    opciones = configuracion.obtener("PLAZOS", {})
+    if opciones is None:
+        return {"total": None, "box": None}
+    return {"total": opciones.get("total", PLAZO_TOTAL), "box": opciones.get("box", PLAZO_BOX)}
+
+
+def plazo_total():
+    """Plazo de una ejecución de todos los boxes, o None."""
+    segundos = plazos()["total"]
+    return Plazo(segundos) if segundos else None
+
+
+def plazo_box(config_box, total=None):
+    """Plazo de un box ("plazo" en su configuración o el de PLAZOS), sin pasar del total."""
+    segundos = config_box.get("plazo", plazos()["box"])
+    return mas_cercano(Plazo(segundos) if segundos else None, total)
+
+
+@contextlib.contextmanager
+def con_plazo(plazo):
+    """Aplica el plazo a las descargas del hilo mientras dura el bloque (None: sin plazo)."""
+    token = _plazo.set(plazo)
+    try:
+        yield plazo
+    finally:
+        _plazo.reset(token)
+
+
+def plazo_actual():
+    return _plazo.get()
+
+
+class Disyuntor:
+    """Fallos seguidos de un box y hasta cuándo no se le pide nada."""
+
+    def __init__(self, fallos=0, abierto_hasta=None):
+        self.fallos = fallos
+        self.abierto_hasta = abierto_hasta
+
+    def permite(self, ahora):
+        """Si se puede descargar: cerrado, o abierto pero ya toca volver a probar."""
+        return self.abierto_hasta is None or ahora >= self.abierto_hasta
+
+    def como_dict(self):
+        return {"fallos": self.fallos,
+                "abierto_hasta": self.abierto_hasta.isoformat(timespec="seconds") if self.abierto_hasta else None}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        abierto = datos.get("abierto_hasta")
+        return cls(int(datos.get("fallos", 0)), datetime.fromisoformat(abierto) if abierto else None)
+
+
+class Disyuntores:
+    """Disyuntores de los boxes, guardados en disco."""
+
+    def __init__(self, ruta=ESTADO, fallos=FALLOS, espera=ESPERA):
+        self.ruta = ruta
+        self.fallos = fallos
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._disyuntores = self._cargar()
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                return {box: Disyuntor.desde_dict(datos) for box, datos in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def guardar(self):
+        """Guarda el estado de los disyuntores (de forma atómica)."""
+        with self._lock:
+            datos = {box: d.como_dict() for box, d in self._disyuntores.items() if d.fallos}
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        temporal = f"{self.ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=1)
+        os.replace(temporal, self.ruta)
+
+    def comprobar(self, box):
+        """Lanza DisyuntorAbierto si no se debe descargar el box todavía."""
+        with self._lock:
+            disyuntor = self._disyuntores.get(box)
+            if disyuntor is not None and not disyuntor.permite(datetime.now()):
+                raise DisyuntorAbierto(
+                    f"{box} ha fallado {disyuntor.fallos} veces seguidas; no se vuelve a probar "
+                    f"hasta las {disyuntor.abierto_hasta.strftime('%H:%M')}")
+
+    def fallo(self, box, opciones=None):
+        """Registra un fallo de descarga; devuelve True si el disyuntor se abre (o sigue abierto)."""
+        opciones = opciones or {}
+        with self._lock:
+            disyuntor = self._disyuntores.setdefault(box, Disyuntor())
+            disyuntor.fallos += 1
+            abierto = disyuntor.fallos >= opciones.get("fallos", self.fallos)
+            if abierto:
+                disyuntor.abierto_hasta = datetime.now() + timedelta(minutes=opciones.get("espera", self.espera))
+        self.guardar()
+        if abierto:
+            print(f"🛑 {box}: {disyuntor.fallos} fallos seguidos, no se descargará hasta las "
+                  f"{disyuntor.abierto_hasta.strftime('%H:%M')}")
+        return abierto
+
+    def exito(self, box):
+        """Registra una descarga correcta: el disyuntor del box se cierra."""
+        with self._lock:
+            disyuntor = self._disyuntores.pop(box, None)
+        if disyuntor is not None:
+            if disyuntor.abierto_hasta is not None:
+                print(f"✅ {box} vuelve a responder")
+            self.guardar()
+
+    def estado(self):
+        """Fallos y apertura de los disyuntores de los boxes que han fallado."""
+        with self._lock:
+            return {box: d.como_dict() for box, d in self._disyuntores.items()}
+
+
+_disyuntores = None
+_lock = threading.Lock()
+
+
+def obtener_disyuntores():
+    """Los disyuntores del proceso según DISYUNTOR de config.py, o None si están desactivados."""
+    global _disyuntores
+    if _disyuntores is None:
+        with _lock:
+            if _disyuntores is None:
+                opciones = configuracion.obtener("DISYUNTOR", {})
+                if opciones is None:
+                    _disyuntores = False
+                else:
+                    _disyuntores = Disyuntores(opciones.get("estado", ESTADO), opciones.get("fallos", FALLOS),
+                                               opciones.get("espera", ESPERA))
+    return _disyuntores or None
@@ -1,39 +1,402 @@
 #!/usr/bin/env python3
 """
-Script unificado para obtener WODs de CrossfitDB y N8.
+Script unificado para obtener WODs de todos los boxes configurados.
+
+Los boxes se descubren a través del registro de proveedores. Cada box se
+ejecuta dentro del mismo proceso (obtener → formatear → enviar) y los boxes
+se procesan en paralelo con un número acotado de hilos, de modo que el
+tiempo total se acerca al del box más lento y no a la suma de todos. Las
+descargas pueden tener un plazo por box y por ejecución (PLAZOS), y los
+boxes que fallan seguido se dejan de descargar durante un tiempo; en los
+dos casos se usan sus WODs guardados (ver resiliencia.py).
+
+Con --daemon el proceso queda en marcha y ejecuta cada box según el
+planificador (planificador.py): el resumen semanal y consultas periódicas
+de los WODs nuevos, reutilizando las sesiones HTTP y SMTP, las reglas ya
+compiladas y la bandeja de salida entre ejecuciones. SIGTERM o Ctrl+C
+terminan las ejecuciones en curso, envían la bandeja y salen.
 """
 
+import argparse
+import queue
+import signal
 import sys
-import os
+import threading
+import time
 from datetime import datetime
-import traceback
 
-def ejecutar_script(nombre_script):
-    """Ejecuta un script Python y maneja sus errores."""
+import cliente_http
+import configuracion
+import metricas
+import proveedores
+import resiliencia
+from configuracion import ConfiguracionError
+from fechas import obtener_rango_semana_actual
+
+# Número máximo de boxes procesados a la vez
+MAX_WORKERS = 4
+
+# Segundos que se espera a los boxes después del plazo de la ejecución (las
+# descargas ya se han cortado, pero puede quedar el envío del correo); los
+# que sigan en marcha se dan por fallidos y se abandonan
+MARGEN_PLAZO = 15
+
+
+# Hilos de los boxes abandonados al agotarse el plazo que siguen en marcha,
+# por nombre de box (ver ejecutar_boxes)
+_abandonados = {}
+_lock_abandonados = threading.Lock()
+
+
+class ResultadoBox:
+    """Resultado y duración de la ejecución de un box."""
+
+    def __init__(self, nombre, exito, duracion, error=None):
+        self.nombre = nombre
+        self.exito = exito
+        self.duracion = duracion
+        self.error = error
+
+
+def ejecutar_box(box, email_config, modo=None, simular=False, semana=None, plazo=None):
+    """Ejecuta el pipeline de un box y mide cuánto tarda."""
+    inicio = time.perf_counter()
     try:
-        print(f"\n🔄 Ejecutando {nombre_script}...")
-        __import__(nombre_script.replace(".py", ""))
-        return True
+        print(f"\n🔄 Ejecutando {box.nombre}...")
+        with metricas.en_box(box.nombre):
+            exito = proveedores.ejecutar(box, email_config, modo, simular, semana, plazo)
+        resultado = ResultadoBox(box.nombre, exito, time.perf_counter() - inicio)
     except Exception as e:
-        print(f"❌ Error al ejecutar {nombre_script}: {str(e)}")
+        import traceback
+
+        print(f"❌ Error al ejecutar {box.nombre}: {str(e)}")
         traceback.print_exc()
-        return False
+        resultado = ResultadoBox(box.nombre, False, time.perf_counter() - inicio, error=str(e))
+    en_curso = metricas.obtener_metricas()
+    if en_curso is not None:
+        en_curso.resultado_box(box.nombre, resultado.exito, resultado.duracion)
+    return resultado
+
+
+def ejecutar_boxes(boxes, email_config, max_workers=MAX_WORKERS, modos=None, simular=False):
+    """Ejecuta los boxes en paralelo y devuelve sus resultados en orden.
+
+    modos puede indicar, por nombre de box, un modo de correo distinto del
+    configurado. Con simular no se envía ni se guarda nada. La semana se
+    calcula una sola vez, así que todos los boxes usan la misma aunque la
+    ejecución cruce la medianoche del domingo.
+
+    Las descargas de todos los boxes acaban con el plazo total (PLAZOS, ver
+    resiliencia); pasado MARGEN_PLAZO, los boxes que sigan en marcha se dan
+    por fallidos y se abandonan: no se empiezan los que queden y los hilos
+    (daemon) de los que no terminan no retrasan la salida del proceso. Un
+    box abandonado no se vuelve a ejecutar (en el modo daemon) hasta que
+    termina su hilo.
+    """
+    modos = modos or {}
+    if not boxes:
+        return []
+    semana = obtener_rango_semana_actual()
+    plazo = resiliencia.plazo_total()
+    inicio = time.perf_counter()
+
+    resultados = {}
+    with _lock_abandonados:
+        for nombre, hilo in list(_abandonados.items()):
+            if not hilo.is_alive():
+                del _abandonados[nombre]
+        for box in boxes:
+            if box.nombre in _abandonados:
+                print(f"⏭️ {box.nombre}: la ejecución anterior sigue en marcha; no se vuelve a ejecutar")
+                resultados[box.nombre] = ResultadoBox(box.nombre, False, 0.0,
+                                                      error="la ejecución anterior sigue en marcha")
+
+    pendientes = queue.SimpleQueue()
+    for box in boxes:
+        if box.nombre not in resultados:
+            pendientes.put(box)
+    terminados = queue.SimpleQueue()
+    abandonar = threading.Event()
+    # Hilo que ejecuta cada box en curso
+    en_curso = {}
+
+    def trabajar():
+        while not abandonar.is_set():
+            try:
+                box = pendientes.get_nowait()
+            except queue.Empty:
+                return
+            with _lock_abandonados:
+                en_curso[box.nombre] = threading.current_thread()
+            terminados.put(ejecutar_box(box, email_config, modos.get(box.nombre), simular, semana, plazo))
+            with _lock_abandonados:
+                del en_curso[box.nombre]
+
+    # Hilos daemon y no ThreadPoolExecutor: sus hilos se esperan al salir del
+    # intérprete, así que un box colgado no dejaría terminar el proceso
+    for i in range(max(1, min(max_workers, len(boxes) - len(resultados)))):
+        threading.Thread(target=trabajar, name=f"box-{i}", daemon=True).start()
+
+    while len(resultados) < len(boxes):
+        try:
+            resultado = terminados.get(timeout=None if plazo is None
+                                       else max(0, plazo.restante() + MARGEN_PLAZO))
+        except queue.Empty:
+            abandonar.set()
+            with _lock_abandonados:
+                for box in boxes:
+                    if box.nombre in resultados:
+                        continue
+                    if box.nombre in en_curso:
+                        _abandonados[box.nombre] = en_curso[box.nombre]
+                        print(f"⏱️ {box.nombre} sigue en marcha después del plazo de la ejecución; "
+                              "no se le espera")
+                    else:
+                        print(f"⏱️ {box.nombre} no llegó a empezar antes del plazo de la ejecución")
+                    resultados[box.nombre] = ResultadoBox(box.nombre, False, time.perf_counter() - inicio,
+                                                          error="plazo agotado")
+            break
+        resultados[resultado.nombre] = resultado
+
+    return [resultados[box.nombre] for box in boxes]
+
+
+def marcar_sin_entregar(resultados, estadisticas_bandeja):
+    """Da por fallidos los boxes con correos de la ejecución que no se han entregado.
+
+    Son los que siguen en la bandeja de salida y los que se han descartado
+    tras agotar los intentos (ver bandeja_salida.error_de_entrega).
+    """
+    import bandeja_salida
+
+    estadisticas_bandeja = estadisticas_bandeja or {}
+    for resultado in resultados:
+        for clave, contador in (("sin_entregar", "correos_sin_entregar"), ("descartados", "correos_descartados")):
+            cantidad = (estadisticas_bandeja.get(clave) or {}).get(resultado.nombre)
+            if cantidad:
+                metricas.contar(contador, cantidad, box=resultado.nombre)
+        error = bandeja_salida.error_de_entrega(estadisticas_bandeja, resultado.nombre)
+        if error and resultado.exito:
+            resultado.exito = False
+            resultado.error = error
+    return resultados
+
+
+def seleccionar_boxes(boxes, nombres):
+    """Filtra los boxes por nombre o por proveedor."""
+    if not nombres:
+        return boxes
+    seleccion = [box for box in boxes if box.nombre in nombres or box.clave in nombres]
+    encontrados = {box.nombre for box in seleccion} | {box.clave for box in seleccion}
+    for nombre in nombres:
+        if nombre not in encontrados:
+            print(f"❌ No se encuentra el box {nombre}")
+    return seleccion
+
+
+def imprimir_resumen(resultados, duracion_total):
+    """Muestra el resultado y el tiempo de cada box."""
+    print("-" * 50)
+    print("📊 Resumen:")
+    for resultado in resultados:
+        estado = "✅" if resultado.exito else "❌"
+        detalle = f" ({resultado.error})" if resultado.error else ""
+        print(f"  {estado} {resultado.nombre}: {resultado.duracion:.2f}s{detalle}")
+    suma = sum(r.duracion for r in resultados)
+    print(f"⏱️ Tiempo total: {duracion_total:.2f}s (suma de boxes: {suma:.2f}s)")
+
 
-def main():
+def imprimir_estadisticas_http(estadisticas):
+    """Muestra las peticiones, reintentos y latencias de cada host."""
+    if not estadisticas["hosts"]:
+        return
+    print("🌐 HTTP:")
+    for host, stats in estadisticas["hosts"].items():
+        print(f"  {host}: {stats['peticiones']} peticiones, {stats['reintentos']} reintentos, "
+              f"{stats['errores']} errores, latencia media {stats['latencia_media']:.2f}s "
+              f"(máx {stats['latencia_max']:.2f}s)")
+    for destino, pool in estadisticas["pool"].items():
+        print(f"  pool {destino}: {pool['conexiones_abiertas']} conexiones para "
+              f"{pool['peticiones']} peticiones")
+
+
+def imprimir_estadisticas_smtp(estadisticas):
+    """Muestra los mensajes enviados por cada sesión SMTP."""
+    if not estadisticas:
+        return
+    print("📧 SMTP:")
+    for destino, stats in estadisticas.items():
+        print(f"  {destino}: {stats['mensajes']} mensajes ({stats['destinatarios']} destinatarios, "
+              f"{stats['rechazados']} rechazados), {stats['errores']} errores, "
+              f"{stats['conexiones']} conexiones ({stats['reconexiones']} reconexiones), "
+              f"{stats['mensajes_por_segundo']:.1f} mensajes/s")
+
+
+def imprimir_estadisticas_bandeja(estadisticas):
+    """Muestra los mensajes enviados y pendientes de la bandeja de salida."""
+    if not estadisticas:
+        return
+    print(f"📤 Bandeja de salida: {estadisticas['enviados']} enviados, "
+          f"{estadisticas['reintentos']} reintentos, {estadisticas['fallidos']} fallidos, "
+          f"{estadisticas['pendientes']} pendientes")
+
+
+def imprimir_metricas(informe):
+    """Muestra el tiempo de cada etapa por box (segundos y número de medidas)."""
+    if not informe["boxes"] and not informe["sin_box"]:
+        return
+    print("⏱️ Etapas:")
+    for box, datos in informe["boxes"].items():
+        etapas = " · ".join(f"{etapa} {medida['segundos']:.3f}s ({medida['cantidad']})"
+                            for etapa, medida in datos["etapas"].items() if etapa != "total")
+        print(f"  {box}: {etapas}")
+    if informe["sin_box"]:
+        print("  bandeja: " + " · ".join(f"{etapa} {medida['segundos']:.3f}s ({medida['cantidad']})"
+                                         for etapa, medida in informe["sin_box"].items()))
+
+
+def exportar_metricas(mostrar=False):
+    """Escribe las métricas configuradas en METRICAS y, con mostrar, las etapas de cada box."""
+    en_curso = metricas.obtener_metricas()
+    if en_curso is None:
+        return
+    if mostrar:
+        imprimir_metricas(en_curso.informe())
+    try:
+        for ruta in en_curso.exportar():
+            print(f"📊 Métricas guardadas en {ruta}")
+    except OSError as e:
+        print(f"⚠️ No se pudieron guardar las métricas: {e}")
+
+
+def ejecutar_daemon(boxes, email_config, max_workers=MAX_WORKERS, consultas=True, mostrar_metricas=False):
+    """Ejecuta los boxes según el planificador hasta recibir SIGTERM o SIGINT."""
+    import bandeja_salida
+    import envio
+    import planificador
+    from almacen import obtener_almacen
+
+    parar = threading.Event()
+
+    def al_recibir_senal(numero, marco):
+        if parar.is_set():
+            raise KeyboardInterrupt
+        print(f"\n🛑 Señal {signal.Signals(numero).name}: terminando las ejecuciones en curso...")
+        parar.set()
+
+    if consultas and obtener_almacen() is None:
+        # Sin almacén cada consulta enviaría otra vez la semana completa
+        print("⚠️ Sin ALMACEN no se pueden detectar los WODs nuevos: solo se envía el resumen semanal")
+        consultas = False
+
+    plan = planificador.Planificador(boxes, consultas=consultas)
+    anteriores = {s: signal.signal(s, al_recibir_senal) for s in (signal.SIGTERM, signal.SIGINT)}
+
+    def ejecutar_tareas(tareas):
+        print(f"\n📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}: "
+              + ", ".join(f"{t.box.nombre} ({t.tipo})" for t in tareas))
+        inicio = time.perf_counter()
+        resultados = ejecutar_boxes([t.box for t in tareas], email_config, max_workers,
+                                    {t.box.nombre: t.modo for t in tareas})
+        imprimir_resumen(resultados, time.perf_counter() - inicio)
+        # Los contadores se acumulan durante todo el daemon
+        exportar_metricas(mostrar_metricas)
+        return [r.exito for r in resultados]
+
+    print(f"🕒 Modo daemon con {len(boxes)} boxes; próximas ejecuciones:")
+    for tarea in plan.proximas()[:10]:
+        print(f"  {tarea.box.nombre} ({tarea.tipo}): {tarea.siguiente.strftime('%d/%m/%Y %H:%M:%S')}")
+
+    bandeja_salida.iniciar_despachador(email_config)
+    try:
+        plan.ejecutar(ejecutar_tareas, parar)
+    except KeyboardInterrupt:
+        print("⚠️ Salida inmediata")
+    finally:
+        for numero, anterior in anteriores.items():
+            signal.signal(numero, anterior)
+        estadisticas_bandeja = bandeja_salida.detener_despachador()
+        imprimir_estadisticas_http(cliente_http.estadisticas())
+        imprimir_estadisticas_smtp(envio.cerrar_pools())
+        imprimir_estadisticas_bandeja(estadisticas_bandeja)
+        exportar_metricas()
+    return True
+
+
+def main(argv=None):
     """Función principal."""
+    parser = argparse.ArgumentParser(description="Sincroniza los WODs de todos los boxes")
+    parser.add_argument("boxes", nargs="*",
+                        help="Boxes a ejecutar, por nombre o proveedor (por defecto: todos)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Número máximo de boxes en paralelo")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Quedarse en marcha y ejecutar los boxes según PLANIFICADOR")
+    parser.add_argument("--sin-consultas", action="store_true",
+                        help="En modo daemon, enviar solo el resumen semanal")
+    parser.add_argument("--simular", action="store_true",
+                        help="Descargar los WODs y mostrar qué se enviaría, sin enviar ni guardar nada")
+    parser.add_argument("--metricas", action="store_true",
+                        help="Mostrar el tiempo de cada etapa por box (y medir aunque no haya METRICAS)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar la CPU y la memoria de la ejecución (ver perfilado.py)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        # Solo se carga al perfilar: cProfile y tracemalloc alargan el arranque
+        import perfilado
+        with perfilado.perfilar("sync_wods"):
+            return sincronizar(args)
+    return sincronizar(args)
+
+
+def sincronizar(args):
+    """Ejecuta los boxes según las opciones de la línea de comandos."""
+    # El almacén (sqlite3), la bandeja de salida y el envío se cargan aquí y
+    # no al importar, para no alargar el arranque (ver benchmarks/arranque.py)
+    import bandeja_salida
+    import envio
     print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    
-    # Lista de scripts a ejecutar
-    scripts = ["crossfitdb.py", "n8.py"]
-    
-    # Ejecutar cada script
-    for script in scripts:
-        if not os.path.exists(script):
-            print(f"❌ No se encuentra el script {script}")
-            continue
-        
-        ejecutar_script(script)
-        print("-" * 50)
+
+    try:
+        boxes = seleccionar_boxes(proveedores.crear_boxes(), args.boxes)
+        email_config = configuracion.requerir("EMAIL_CONFIG")
+        metricas.iniciar(forzar=args.metricas)
+    except ConfiguracionError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+
+    if args.daemon:
+        try:
+            return ejecutar_daemon(boxes, email_config, args.workers, not args.sin_consultas,
+                                   args.metricas)
+        except ConfiguracionError as e:
+            print(f"❌ ERROR: {e}")
+            return False
+
+    inicio = time.perf_counter()
+    if args.simular:
+        resultados = ejecutar_boxes(boxes, email_config, args.workers, simular=True)
+        imprimir_resumen(resultados, time.perf_counter() - inicio)
+        imprimir_estadisticas_http(cliente_http.estadisticas())
+        exportar_metricas(args.metricas)
+        return all(r.exito for r in resultados)
+
+    # Los correos que quedaron pendientes de otras ejecuciones se envían
+    # mientras se descargan los WODs, y al terminar se espera a los de esta:
+    # un box cuyo correo no se ha entregado no ha terminado bien
+    bandeja_salida.iniciar_despachador(email_config)
+    resultados = ejecutar_boxes(boxes, email_config, args.workers)
+    estadisticas_bandeja = bandeja_salida.detener_despachador()
+    marcar_sin_entregar(resultados, estadisticas_bandeja)
+    imprimir_resumen(resultados, time.perf_counter() - inicio)
+    imprimir_estadisticas_http(cliente_http.estadisticas())
+    imprimir_estadisticas_smtp(envio.cerrar_pools())
+    imprimir_estadisticas_bandeja(estadisticas_bandeja)
+    exportar_metricas(args.metricas)
+
+    return all(r.exito for r in resultados)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
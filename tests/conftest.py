@@ -0,0 +1,30 @@
+"""Configuración común de las pruebas (pytest)."""
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import configuracion  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Escribe un config.py temporal con las variables indicadas y lo carga.
+
+    Devuelve una función: config(PLAZOS={"total": 1}, ...).
+    """
+    def escribir(**variables):
+        with open(tmp_path / "config.py", "w", encoding="utf-8") as f:
+            for nombre, valor in variables.items():
+                f.write(f"{nombre} = {valor!r}\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        sys.modules.pop("config", None)
+        monkeypatch.setattr(configuracion, "_config", None)
+        return tmp_path
+
+    yield escribir
+    sys.modules.pop("config", None)
@@ -0,0 +1,69 @@
+"""Pruebas de los correos sin entregar de la bandeja de salida."""
+
+import os
+from email.message import EmailMessage
+
+import sync_wods
+from bandeja_salida import BandejaSalida, error_de_entrega
+
+
+def mensaje(asunto):
+    mensaje = EmailMessage()
+    mensaje["Subject"] = asunto
+    mensaje.set_content("WOD")
+    return mensaje
+
+
+def test_sin_entregar_por_box(tmp_path):
+    bandeja = BandejaSalida(str(tmp_path), max_intentos=1)
+    bandeja.encolar(mensaje("a"), "box@ejemplo.com", ["a@ejemplo.com"], box="norte")
+    bandeja.encolar(mensaje("b"), "box@ejemplo.com", ["b@ejemplo.com"], box="sur")
+    bandeja.encolar(mensaje("c"), "box@ejemplo.com", ["c@ejemplo.com"], box="sur")
+    assert bandeja.sin_entregar() == {"norte": 1, "sur": 2}
+
+    entregados = {"a", "b"}
+    while (entrada := bandeja.tomar(lambda: True)) is not None:
+        if entrada["asunto"] in entregados:
+            bandeja.completar(entrada)
+        else:
+            bandeja.fallar(entrada, OSError("conexión rechazada"))
+
+    # El que pasa a fallidos ya no se reintenta: se cuenta como descartado
+    assert bandeja.sin_entregar() == {}
+    assert bandeja.descartados() == {"sur": 1}
+    assert len(os.listdir(tmp_path / "fallidos")) == 1
+    # Los de ejecuciones anteriores no cuentan
+    assert BandejaSalida(str(tmp_path)).sin_entregar() == {}
+
+
+def test_reintento_pendiente(tmp_path):
+    bandeja = BandejaSalida(str(tmp_path), max_intentos=3)
+    bandeja.encolar(mensaje("a"), "box@ejemplo.com", ["a@ejemplo.com"], box="norte")
+    bandeja.fallar(bandeja.tomar(lambda: True), OSError("conexión rechazada"))
+
+    assert bandeja.sin_entregar() == {"norte": 1}
+    assert bandeja.descartados() == {}
+
+
+def test_error_de_entrega():
+    estadisticas = {"sin_entregar": {"norte": 2}, "descartados": {"norte": 1, "sur": 1}}
+    assert error_de_entrega(estadisticas, "norte") == (
+        "1 correos descartados tras agotar los intentos (en fallidos/); "
+        "2 correos sin entregar; se reintentarán en la próxima ejecución")
+    assert error_de_entrega(estadisticas, "sur").startswith("1 correos descartados")
+    assert error_de_entrega(estadisticas, "este") is None
+    assert error_de_entrega(None, "norte") is None
+
+
+def test_marcar_sin_entregar():
+    resultados = [sync_wods.ResultadoBox("norte", True, 1.0), sync_wods.ResultadoBox("sur", True, 1.0),
+                  sync_wods.ResultadoBox("este", False, 1.0, error="plazo agotado")]
+
+    sync_wods.marcar_sin_entregar(resultados, {"sin_entregar": {"sur": 2, "este": 1},
+                                               "descartados": {"norte": 1}})
+
+    assert [r.exito for r in resultados] == [False, False, False]
+    assert resultados[0].error.startswith("1 correos descartados")
+    assert resultados[1].error.startswith("2 correos sin entregar")
+    assert resultados[2].error == "plazo agotado"
+    assert sync_wods.marcar_sin_entregar(resultados, None) is resultados
@@ -0,0 +1,14 @@
+"""Prueba rápida de que la suite de rendimiento funciona."""
+
+import subprocess
+import sys
+
+from conftest import RAIZ
+
+
+def test_suite_rapida():
+    proceso = subprocess.run([sys.executable, "benchmarks/suite.py", "--rapido"], cwd=RAIZ,
+                             capture_output=True, text=True, timeout=300)
+    assert proceso.returncode == 0, proceso.stdout + proceso.stderr
+    assert "limpiar_html" in proceso.stdout
+    assert "construir_cuerpo_html" in proceso.stdout
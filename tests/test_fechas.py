@@ -0,0 +1,41 @@
+"""Pruebas de la resolución de las fechas sin año de las cabeceras."""
+
+from datetime import date
+
+import pytest
+
+from fechas import MESES, _resolver_fecha, resolver_fecha
+
+
+@pytest.mark.parametrize("dia, mes, referencia, esperada", [
+    # Cambio de año hacia delante y hacia atrás
+    ("2", "enero", date(2025, 12, 29), date(2026, 1, 2)),
+    ("30", "diciembre", date(2026, 1, 3), date(2025, 12, 30)),
+    ("31", "Diciembre", date(2025, 12, 31), date(2025, 12, 31)),
+    # A mitad de año se queda en el de la referencia
+    ("15", "junio", date(2025, 1, 10), date(2025, 6, 15)),
+    ("10", "enero", date(2025, 6, 15), date(2025, 1, 10)),
+    # El 29 de febrero solo existe en el año bisiesto más cercano
+    ("29", "febrero", date(2025, 1, 2), date(2024, 2, 29)),
+    ("29", "febrero", date(2027, 12, 30), date(2028, 2, 29)),
+])
+def test_sin_año_la_mas_cercana(dia, mes, referencia, esperada):
+    assert _resolver_fecha(dia, mes, None, referencia) == esperada
+
+
+def test_con_año():
+    assert _resolver_fecha("2", "enero", "2024", date(2025, 12, 29)) == date(2024, 1, 2)
+    assert resolver_fecha("06", "octubre", "2025") == date(2025, 10, 6)
+
+
+@pytest.mark.parametrize("dia, mes, año", [
+    ("31", "febrero", None), ("31", "febrero", "2025"), ("5", "brumario", None), ("x", "enero", None),
+])
+def test_fechas_no_validas(dia, mes, año):
+    assert _resolver_fecha(dia, mes, año, date(2025, 10, 6)) is None
+
+
+def test_referencia_por_defecto_hoy():
+    hoy = date.today()
+    mes = next(nombre for nombre, numero in MESES.items() if numero == hoy.month)
+    assert resolver_fecha(str(hoy.day), mes) == hoy
@@ -0,0 +1,52 @@
+"""Pruebas del motor rápido de limpiar_html frente a BeautifulSoup."""
+
+import os
+import random
+import sys
+
+import pytest
+
+import formato
+
+pytest.importorskip("bs4")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from corpus import notas_n8, payload_crossfitdb  # noqa: E402
+
+# Piezas con las que se generan los HTML aleatorios: las etiquetas que se
+# sustituyen, otras etiquetas y comentarios, entidades y texto con los
+# caracteres que pueden confundir al motor rápido
+PIEZAS = [
+    "<br>", "<br />", "<br/>", "<p>", "</p>", "<h2>", "</h2>", "<ul>", "</ul>", "<li>", "</li>",
+    "<strong>", "</strong>", "<span style=\"color: red\">", "</span>", "<div class='x'>", "</div>",
+    "<img src=x.png/>", "<a href=\"/wod?a=1&b=2\">", "</a>", "<!-- nota -->", "<!---->", "<!DOCTYPE html>",
+    "&amp;", "&nbsp;", "&lt;", "&gt;", "&quot;", "&#39;", "&#x2022;", "&#8217;", "&aacute;", "&ntilde;",
+    "&euro;", "&bogus;", "&#0;", "&", "<", ">", "< ", "<3", "&&", "a=b", "'", "\"",
+    "WOD", "lunes 6 de octubre", "AMRAP 12'", "3x10 @ 70%", "•", "-", "1.", " ", "  ", "\n", "\t", "\r\n",
+    "<script>x<y</script>", "<style>p{}</style>", "<?php ?>", "</ br>", "<p", "<br", "<b", "</",
+]
+
+
+def html_aleatorio(rng):
+    return "".join(rng.choice(PIEZAS) for _ in range(rng.randint(1, 25)))
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_motor_rapido_igual_que_bs4_aleatorio(semilla):
+    rng = random.Random(semilla)
+    for _ in range(250):
+        texto = html_aleatorio(rng)
+        rapido = formato._html_a_texto_rapido(texto)
+        if rapido is not None:
+            assert rapido == formato._html_a_texto_bs4(texto), texto
+
+
+@pytest.mark.parametrize("notas, quitar_marcadores", [
+    (notas_n8(60), False),
+    ([w["content"] for w in payload_crossfitdb(60)["wods"]], True),
+], ids=["n8", "crossfitdb"])
+def test_motor_rapido_igual_que_bs4_corpus(notas, quitar_marcadores):
+    for nota in notas:
+        assert formato._html_a_texto_rapido(nota) is not None
+        assert (formato.limpiar_html(nota, quitar_marcadores, motor="rapido")
+                == formato.limpiar_html(nota, quitar_marcadores, motor="bs4"))
@@ -0,0 +1,37 @@
+"""Pruebas del progreso de la importación del histórico."""
+
+from datetime import date
+
+import historico
+from crossfitdb import CrossfitDB
+from n8 import N8
+
+
+class Almacen:
+    def guardar(self, box, wods):
+        pass
+
+
+def importar(box, directorio):
+    return historico.importar([box], date(2025, 1, 1), date(2025, 3, 31), Almacen(),
+                              workers=1, directorio=str(directorio))
+
+
+def test_tramos_completos_no_se_repiten(tmp_path, monkeypatch):
+    box = CrossfitDB({"api_url": "http://localhost", "dias_por_tramo": 28})
+    pedidos = []
+    monkeypatch.setattr(box, "obtener_rango", lambda inicio, fin: pedidos.append(inicio) or [])
+
+    assert importar(box, tmp_path) == (4, 0, 0)
+    assert importar(box, tmp_path) == (0, 0, 0)
+    assert len(pedidos) == 4
+
+
+def test_timeline_de_n8_se_vuelve_a_leer(tmp_path, monkeypatch):
+    box = N8({"user_id": 1})
+    pedidos = []
+    monkeypatch.setattr(box, "obtener_rango", lambda inicio, fin: pedidos.append((inicio, fin)) or [])
+
+    assert importar(box, tmp_path) == (1, 0, 0)
+    assert importar(box, tmp_path) == (1, 0, 0)
+    assert pedidos == [(date(2025, 1, 1), date(2025, 3, 31))] * 2
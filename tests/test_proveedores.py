@@ -0,0 +1,13 @@
+"""Pruebas de la ejecución de un box desde la línea de comandos."""
+
+import proveedores
+from crossfitdb import CrossfitDB
+
+
+def test_ejecutar_box_admite_semana(monkeypatch):
+    ejecutados = []
+    monkeypatch.setattr(proveedores, "_ejecutar_desde_config", lambda cls: ejecutados.append(cls) or True)
+
+    assert proveedores.ejecutar_box(CrossfitDB, ["--semana"])
+    assert proveedores.ejecutar_box(CrossfitDB, [])
+    assert ejecutados == [CrossfitDB, CrossfitDB]
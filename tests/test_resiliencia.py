@@ -0,0 +1,86 @@
+"""Pruebas de los disyuntores de los boxes (cerrado → abierto → a prueba → cerrado)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import resiliencia
+
+
+class Reloj(datetime):
+    """datetime con un now() que se puede adelantar."""
+
+    ahora = datetime(2025, 10, 6, 8, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    monkeypatch.setattr(resiliencia, "datetime", Reloj)
+    monkeypatch.setattr(Reloj, "ahora", datetime(2025, 10, 6, 8, 0))
+    return Reloj
+
+
+def test_se_abre_tras_fallos_seguidos(tmp_path, reloj):
+    disyuntores = resiliencia.Disyuntores(str(tmp_path / "d.json"), fallos=3, espera=30)
+    assert not disyuntores.fallo("norte")
+    assert not disyuntores.fallo("norte")
+    disyuntores.comprobar("norte")
+    assert disyuntores.fallo("norte")
+    with pytest.raises(resiliencia.DisyuntorAbierto):
+        disyuntores.comprobar("norte")
+    # Los demás boxes no se ven afectados
+    disyuntores.comprobar("sur")
+
+
+def test_un_exito_reinicia_los_fallos(tmp_path, reloj):
+    disyuntores = resiliencia.Disyuntores(str(tmp_path / "d.json"), fallos=2)
+    disyuntores.fallo("norte")
+    disyuntores.exito("norte")
+    assert not disyuntores.fallo("norte")
+    assert disyuntores.estado()["norte"]["fallos"] == 1
+
+
+def test_a_prueba_tras_la_espera(tmp_path, reloj):
+    disyuntores = resiliencia.Disyuntores(str(tmp_path / "d.json"), fallos=1, espera=30)
+    disyuntores.fallo("norte")
+
+    reloj.ahora += timedelta(minutes=29)
+    with pytest.raises(resiliencia.DisyuntorAbierto):
+        disyuntores.comprobar("norte")
+
+    # Pasada la espera se deja probar; si vuelve a fallar se abre otra vez
+    reloj.ahora += timedelta(minutes=2)
+    disyuntores.comprobar("norte")
+    assert disyuntores.fallo("norte")
+    with pytest.raises(resiliencia.DisyuntorAbierto):
+        disyuntores.comprobar("norte")
+
+    # Y si responde se cierra
+    reloj.ahora += timedelta(minutes=31)
+    disyuntores.comprobar("norte")
+    disyuntores.exito("norte")
+    assert disyuntores.estado() == {}
+    disyuntores.comprobar("norte")
+
+
+def test_estado_en_disco(tmp_path, reloj):
+    ruta = str(tmp_path / "d.json")
+    disyuntores = resiliencia.Disyuntores(ruta, fallos=1, espera=30)
+    disyuntores.fallo("norte")
+
+    with pytest.raises(resiliencia.DisyuntorAbierto):
+        resiliencia.Disyuntores(ruta).comprobar("norte")
+
+    disyuntores.exito("norte")
+    resiliencia.Disyuntores(ruta).comprobar("norte")
+
+
+def test_opciones_del_box(tmp_path, reloj):
+    disyuntores = resiliencia.Disyuntores(str(tmp_path / "d.json"), fallos=3)
+    assert disyuntores.fallo("norte", {"fallos": 1, "espera": 5})
+    reloj.ahora += timedelta(minutes=6)
+    disyuntores.comprobar("norte")
@@ -0,0 +1,93 @@
+"""Pruebas de la ejecución en paralelo de los boxes (sync_wods.ejecutar_boxes)."""
+
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import proveedores
+import resiliencia
+import sync_wods
+from conftest import RAIZ
+
+# Ejecuta dos boxes, uno colgado para siempre, con un plazo total de medio segundo
+SCRIPT = textwrap.dedent("""
+    import threading
+    import proveedores
+    import sync_wods
+
+    sync_wods.MARGEN_PLAZO = 0
+
+    def ejecutar(box, *args):
+        if box.nombre == "colgado":
+            threading.Event().wait()
+        return True
+
+    proveedores.ejecutar = ejecutar
+
+    class Box:
+        def __init__(self, nombre):
+            self.nombre = nombre
+
+    for resultado in sync_wods.ejecutar_boxes([Box("colgado"), Box("rapido")], {}, 2):
+        print(resultado.nombre, resultado.exito, resultado.error)
+""")
+
+
+def test_box_colgado_no_impide_salir(config):
+    tmp_path = config(PLAZOS={"total": 0.5})
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), RAIZ]))
+
+    inicio = time.monotonic()
+    proceso = subprocess.run([sys.executable, "-c", SCRIPT], cwd=tmp_path, env=entorno,
+                             capture_output=True, text=True, timeout=30)
+    duracion = time.monotonic() - inicio
+
+    assert proceso.returncode == 0, proceso.stderr
+    assert "colgado False plazo agotado" in proceso.stdout
+    assert "rapido True None" in proceso.stdout
+    assert duracion < 10
+
+
+class Box:
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+
+def test_sin_plazos_por_defecto(config):
+    config()
+    assert resiliencia.plazo_total() is None
+    assert resiliencia.plazo_box({}) is None
+    assert resiliencia.plazo_box({"plazo": 5}) is not None
+
+
+def test_box_abandonado_no_se_vuelve_a_ejecutar(config, monkeypatch):
+    config(PLAZOS={"total": 0.2})
+    monkeypatch.setattr(sync_wods, "MARGEN_PLAZO", 0)
+    monkeypatch.setattr(sync_wods, "_abandonados", {})
+    soltar = threading.Event()
+    ejecutados = []
+
+    def ejecutar(box, *args):
+        ejecutados.append(box.nombre)
+        if box.nombre == "colgado":
+            soltar.wait(10)
+        return True
+
+    monkeypatch.setattr(proveedores, "ejecutar", ejecutar)
+    boxes = [Box("colgado"), Box("rapido")]
+
+    primera = sync_wods.ejecutar_boxes(boxes, {}, 2)
+    assert [r.error for r in primera] == ["plazo agotado", None]
+
+    # Mientras su hilo siga en marcha, el box colgado no se vuelve a empezar
+    segunda = sync_wods.ejecutar_boxes(boxes, {}, 2)
+    assert [r.error for r in segunda] == ["la ejecución anterior sigue en marcha", None]
+    assert sorted(ejecutados) == ["colgado", "rapido", "rapido"]
+
+    soltar.set()
+    sync_wods._abandonados["colgado"].join(5)
+    tercera = sync_wods.ejecutar_boxes(boxes, {}, 2)
+    assert [r.exito for r in tercera] == [True, True]
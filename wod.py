@@ -0,0 +1,131 @@
+"""
+Registro de un WOD.
+
+Cada WOD guarda su fecha como date, el box del que viene, el id que le da
+el box y su contenido (con el árbol de formato.analizar_wod, si se tiene).
+Las cadenas que se muestran (fecha en ISO y formateada, día de la semana) se
+calculan al pedirlas en lugar de guardarse, y el hash del contenido se
+calcula una sola vez. Los registros son inmutables y usan __slots__, así que
+ocupan bastante menos que un diccionario por WOD al procesar históricos.
+"""
+
+import hashlib
+import json
+from datetime import date
+
+from fechas import DIAS_SEMANA, MESES, valor_ordenamiento
+
+# Campos que forman parte del hash del contenido (el del almacén)
+CAMPOS_HASH = ("fecha_iso", "fecha_formateada", "dia_semana", "contenido")
+
+# Formatos de fecha_formateada: "numerico" (14/10/2025) o "texto" (14/Octubre/2025)
+FORMATOS_FECHA = ("numerico", "texto")
+
+_NOMBRES_MESES = {numero: nombre.capitalize() for nombre, numero in MESES.items()}
+
+
+class WOD:
+    """WOD de un box (inmutable).
+
+    dia_semana solo se indica si el box lo da con otro nombre que el que
+    corresponde a la fecha (p. ej. "Miercoles" sin tilde), y fecha_formateada
+    solo si el box la escribe distinta de la que sale de formato_fecha (p. ej.
+    "06/Octubre/2025" con el día como viene en la cabecera).
+    """
+
+    __slots__ = ("fecha", "contenido", "id", "box", "estructura", "formato_fecha",
+                 "_dia_semana", "_fecha_formateada", "valor_orden", "_hash")
+
+    def __init__(self, fecha, contenido, id_wod, box=None, estructura=None,
+                 dia_semana=None, formato_fecha="numerico", fecha_formateada=None):
+        if formato_fecha not in FORMATOS_FECHA:
+            raise ValueError(f"Formato de fecha desconocido: {formato_fecha}")
+        iniciar = object.__setattr__
+        iniciar(self, "fecha", fecha)
+        iniciar(self, "contenido", contenido)
+        iniciar(self, "id", id_wod)
+        iniciar(self, "box", box)
+        iniciar(self, "estructura", estructura)
+        iniciar(self, "formato_fecha", formato_fecha)
+        # Solo se guarda el nombre del día si no es el que corresponde a la fecha
+        iniciar(self, "_dia_semana", dia_semana if dia_semana and dia_semana != DIAS_SEMANA[fecha.weekday()] else None)
+        iniciar(self, "_fecha_formateada", None)
+        if fecha_formateada and fecha_formateada != self.fecha_formateada:
+            iniciar(self, "_fecha_formateada", fecha_formateada)
+        iniciar(self, "valor_orden", valor_ordenamiento(self.dia_semana))
+        iniciar(self, "_hash", None)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("Los WODs son inmutables")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("Los WODs son inmutables")
+
+    @property
+    def fecha_iso(self):
+        return self.fecha.isoformat()
+
+    @property
+    def fecha_formateada(self):
+        if self._fecha_formateada is not None:
+            return self._fecha_formateada
+        fecha = self.fecha
+        if self.formato_fecha == "texto":
+            return f"{fecha.day}/{_NOMBRES_MESES[fecha.month]}/{fecha.year}"
+        return f"{fecha.day:02d}/{fecha.month:02d}/{fecha.year}"
+
+    @property
+    def dia_semana(self):
+        return self._dia_semana or DIAS_SEMANA[self.fecha.weekday()]
+
+    @property
+    def hash(self):
+        """Hash del contenido (fechas, día y texto), calculado una sola vez."""
+        if self._hash is None:
+            datos = [getattr(self, campo) for campo in CAMPOS_HASH]
+            object.__setattr__(self, "_hash", hashlib.sha256(
+                json.dumps(datos, ensure_ascii=False).encode("utf-8")).hexdigest())
+        return self._hash
+
+    def como_dict(self):
+        """Diccionario serializable en JSON (ver desde_dict)."""
+        return {
+            "fecha_iso": self.fecha_iso,
+            "contenido": self.contenido,
+            "id": self.id,
+            "box": self.box,
+            "estructura": self.estructura,
+            "dia_semana": self.dia_semana,
+            "formato_fecha": self.formato_fecha,
+            "fecha_formateada": self.fecha_formateada,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye un WOD guardado con como_dict."""
+        return cls(date.fromisoformat(datos["fecha_iso"]), datos["contenido"], datos["id"],
+                   datos.get("box"), datos.get("estructura"), datos.get("dia_semana"),
+                   datos.get("formato_fecha", "numerico"), datos.get("fecha_formateada"))
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Reconstruye un WOD guardado en el almacén (fila de AlmacenWODs.wods)."""
+        # El almacén no guarda el formato de la fecha, pero se ve en la fecha formateada
+        formato = "texto" if any(c.isalpha() for c in fila["fecha_formateada"]) else "numerico"
+        return cls(date.fromisoformat(fila["fecha_iso"]), fila["contenido"], fila["id"],
+                   fila["box"], None, fila["dia_semana"], formato, fila["fecha_formateada"])
+
+    def _clave(self):
+        return (self.box, self.id, self.fecha, self.contenido, self._dia_semana, self.formato_fecha,
+                self._fecha_formateada)
+
+    def __eq__(self, otro):
+        if not isinstance(otro, WOD):
+            return NotImplemented
+        return self._clave() == otro._clave()
+
+    def __hash__(self):
+        return hash((self.box, self.id, self.fecha))
+
+    def __repr__(self):
+        return f"WOD({self.box}, {self.id!r}, {self.fecha_iso})"